@@ -8,7 +8,6 @@ pyinstaller --noconfirm --onefile --windowed ^
 --hidden-import PyQt5.QtWidgets ^
 --hidden-import PyQt5.QtCore ^
 --hidden-import PyQt5.QtGui ^
---hidden-import google.generativeai ^
 --hidden-import yt_dlp ^
 --hidden-import moviepy ^
 --hidden-import sponsorblock ^
@@ -24,6 +24,10 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import processing
 import transcription
+import media_probe
+from ffmpeg_runner import format_progress
+from transcription_engines import DEFAULT_ENGINE, ENGINES
+from llm_client import PROVIDERS
 
 # força UTF-8 como padrão (apenas se stdout estiver disponível)
 # Nota: Esta configuração pode causar problemas em alguns ambientes
@@ -58,6 +62,9 @@ class ClipGeneratorGUI(QMainWindow):
         self.max_clips = 8
         self.whisper_model = "base"
         self.api_key = self.saved_api_key
+        self.llm_provider = self.saved_llm_provider
+        self.llm_base_url = self.saved_llm_base_url
+        self.llm_model = self.saved_llm_model
         self.captions = True
         self.no_review = True
         self.max_segment_duration = 30
@@ -104,6 +111,9 @@ class ClipGeneratorGUI(QMainWindow):
     def load_config(self):
         """Carregar configurações do usuário"""
         self.saved_api_key = ""
+        self.saved_llm_provider = "openai"
+        self.saved_llm_base_url = ""
+        self.saved_llm_model = ""
         self.saved_theme = "light"  # padrão light
         self.saved_font_size = 10  # padrão 10
         try:
@@ -111,6 +121,9 @@ class ClipGeneratorGUI(QMainWindow):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     config = json.load(f)
                     self.saved_api_key = config.get('api_key', '')
+                    self.saved_llm_provider = config.get('llm_provider', 'openai')
+                    self.saved_llm_base_url = config.get('llm_base_url', '')
+                    self.saved_llm_model = config.get('llm_model', '')
                     self.saved_theme = config.get('theme', 'light')
                     self.saved_font_size = config.get('font_size', 10)
         except Exception as e:
@@ -121,6 +134,9 @@ class ClipGeneratorGUI(QMainWindow):
         try:
             config = {
                 'api_key': self.api_key,
+                'llm_provider': self.llm_provider,
+                'llm_base_url': self.llm_base_url,
+                'llm_model': self.llm_model,
                 'theme': self.theme,
                 'font_size': self.font_size
             }
@@ -289,10 +305,29 @@ class ClipGeneratorGUI(QMainWindow):
         self.whisper_combo.setCurrentText(self.whisper_model)
         clips_layout.addRow("Modelo Whisper:", self.whisper_combo)
 
+        self.asr_engine_combo = QComboBox()
+        self.asr_engine_combo.addItems(list(ENGINES))
+        self.asr_engine_combo.setCurrentText(DEFAULT_ENGINE)
+        clips_layout.addRow("Motor de transcrição:", self.asr_engine_combo)
+
         self.api_key_entry = QLineEdit(self.api_key)
         self.api_key_entry.setEchoMode(QLineEdit.Password)
         clips_layout.addRow("API Key:", self.api_key_entry)
 
+        # Provedor do LLM: OpenAI, Gemini ou servidor local compatível com a OpenAI (llama.cpp)
+        self.llm_provider_combo = QComboBox()
+        self.llm_provider_combo.addItems(list(PROVIDERS))
+        self.llm_provider_combo.setCurrentText(self.llm_provider)
+        clips_layout.addRow("Provedor do LLM:", self.llm_provider_combo)
+
+        self.llm_model_entry = QLineEdit(self.llm_model)
+        self.llm_model_entry.setPlaceholderText("padrão do provedor")
+        clips_layout.addRow("Modelo do LLM:", self.llm_model_entry)
+
+        self.llm_base_url_entry = QLineEdit(self.llm_base_url)
+        self.llm_base_url_entry.setPlaceholderText("padrão do provedor (local: http://127.0.0.1:8080)")
+        clips_layout.addRow("URL da API:", self.llm_base_url_entry)
+
         self.captions_check = QCheckBox("Gerar legendas")
         self.captions_check.setChecked(self.captions)
         clips_layout.addRow(self.captions_check)
@@ -585,6 +620,21 @@ class ClipGeneratorGUI(QMainWindow):
         if file_path:
             self.vm_video_entry.setText(file_path)
             self.vm_video_path = file_path
+            self.show_vm_media_info(file_path)
+
+    def show_vm_media_info(self, file_path):
+        """Mostrar resolução, fps, codec e duração do vídeo (sondagem em cache, usada depois na conversão)"""
+        try:
+            info = media_probe.probe(file_path)
+        except Exception as e:
+            self.vm_log.append(f"⚠️ Não foi possível ler as informações do vídeo: {e}")
+            return
+        video = media_probe.first_stream(info, "video") or {}
+        duration = int(info["duration"] or 0)
+        orientation = "vertical" if (video.get("height") or 0) >= (video.get("width") or 0) else "horizontal"
+        self.vm_log.append(f"📐 {video.get('width')}x{video.get('height')} ({orientation}), "
+                           f"{video.get('fps') or '?'} fps, {video.get('codec') or '?'}, "
+                           f"{duration // 60}:{duration % 60:02d}")
 
     def browse_output(self):
         folder = QFileDialog.getExistingDirectory(self, "Selecionar Pasta de Saída")
@@ -694,6 +744,9 @@ class ClipGeneratorGUI(QMainWindow):
                 elif message_type == "render_status":
                     if hasattr(self, 'render_status_label'):
                         self.render_status_label.setText(data)
+                elif message_type == "render_progress":
+                    if hasattr(self, 'render_status_label'):
+                        self.render_status_label.setText(f"🎬 Renderizando: {format_progress(data)}")
                 elif message_type == "render_error":
                     QMessageBox.critical(self, "Erro na Renderização", data)
                 elif message_type == "render_success":
@@ -749,6 +802,11 @@ class ClipGeneratorGUI(QMainWindow):
         self.transcription_model_combo.setCurrentText("base")
         config_layout.addRow("Modelo Whisper:", self.transcription_model_combo)
 
+        self.transcription_engine_combo = QComboBox()
+        self.transcription_engine_combo.addItems(list(ENGINES))
+        self.transcription_engine_combo.setCurrentText(DEFAULT_ENGINE)
+        config_layout.addRow("Motor de transcrição:", self.transcription_engine_combo)
+
         self.transcription_gpu_check = QCheckBox("Usar GPU (CUDA)")
         config_layout.addRow(self.transcription_gpu_check)
 
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import sys
 import os
-import json
 import queue
 import threading
 import subprocess
@@ -10,10 +9,23 @@ import re
 import unicodedata
 import urllib.parse
 import yt_dlp
-import requests
 import sponsorblock as sb
 import io
 
+# Adicionar src/utils ao path para os módulos auxiliares compartilhados
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils'))
+import whisper_models
+from transcription_cache import TranscriptionCache
+from audio_decode import decode_audio
+from transcription_engines import cache_model_name, get_engine
+from llm_client import API_KEY_ENV, DEFAULT_MODELS, get_client
+from prompt_corte_youtube import get_clip_detection_prompt
+from transcript_encoder import encode_transcript
+from json_stream import parse_clip_response
+from clip_selection import parse_time
+from clip_extraction import DEFAULT_ENCODE_ARGS, extract_ranges, run_ordered, unique_path
+from keyframes import EDGE_ENCODERS, KeyframeIndex, smart_cut, stream_info
+
 # força UTF-8 como padrão (apenas se stdout estiver disponível)
 if hasattr(sys.stdout, 'buffer') and sys.stdout.buffer is not None:
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
@@ -62,8 +74,17 @@ def start_processing(gui_instance):
             gui_instance.output_queue.put(("error", f"Erro ao criar pasta de saída: {e}"))
             return
 
-    # Verificar se API key foi fornecida
-    if not gui_instance.api_key:
+    # Configurações da API escolhidas na interface
+    gui_instance.api_key = gui_instance.api_key_entry.text().strip()
+    gui_instance.llm_provider = gui_instance.llm_provider_combo.currentText()
+    gui_instance.llm_model = gui_instance.llm_model_entry.text().strip()
+    gui_instance.llm_base_url = gui_instance.llm_base_url_entry.text().strip()
+    gui_instance.save_config()
+
+    # Verificar se API key foi fornecida, na interface ou na variável de ambiente do provedor
+    # (servidores locais não exigem chave)
+    key_env = API_KEY_ENV.get(gui_instance.llm_provider)
+    if not gui_instance.api_key and key_env and not os.getenv(key_env) and not gui_instance.llm_base_url:
         gui_instance.output_queue.put(("error", "Por favor, forneça uma API Key válida!"))
         return
 
@@ -96,105 +117,86 @@ def process_video_thread(gui_instance):
         gui_instance.output_queue.put(("log", "✅ FFmpeg detectado\n"))
         gui_instance.output_queue.put(("progress", 10))
 
-        # Verificar se whisper está instalado
+        # Verificar se o motor de transcrição escolhido está instalado
+        engine_name = gui_instance.asr_engine_combo.currentText()
         try:
-            import whisper
-            gui_instance.output_queue.put(("log", "✅ Whisper detectado\n"))
-        except ImportError:
-            gui_instance.output_queue.put(("error", "Whisper não está instalado. Instale com: pip install openai-whisper"))
+            asr_engine = get_engine(engine_name)
+            gui_instance.output_queue.put(("log", f"✅ Whisper detectado ({engine_name})\n"))
+        except ImportError as e:
+            gui_instance.output_queue.put(("error", str(e)))
             return
 
         gui_instance.output_queue.put(("progress", 15))
 
-        # Carregar modelo Whisper
-        gui_instance.output_queue.put(("log", f"🔄 Carregando modelo Whisper '{gui_instance.whisper_model}'...\n"))
-        try:
-            model = whisper.load_model(gui_instance.whisper_model)
-            gui_instance.output_queue.put(("log", "✅ Modelo Whisper carregado\n"))
-        except Exception as e:
-            gui_instance.output_queue.put(("error", f"Erro ao carregar modelo Whisper: {e}"))
-            return
-
-        gui_instance.output_queue.put(("progress", 25))
-
-        # Transcrever vídeo
-        gui_instance.output_queue.put(("log", "🎙️ Transcrevendo vídeo...\n"))
-        try:
-            result = model.transcribe(gui_instance.video_path, language="pt")
-            transcription = result["text"]
-            segments = result["segments"]
-            gui_instance.output_queue.put(("log", "✅ Transcrição concluída\n"))
-        except Exception as e:
-            gui_instance.output_queue.put(("error", f"Erro na transcrição: {e}"))
-            return
-
-        gui_instance.output_queue.put(("progress", 40))
+        # Procurar transcrição em cache antes de carregar o modelo
+        cache_model = cache_model_name(engine_name, gui_instance.whisper_model)
+        transcription_cache = TranscriptionCache()
+        result = transcription_cache.get(gui_instance.video_path, cache_model,
+                                         language="pt", word_timestamps=False)
+        if result is not None:
+            gui_instance.output_queue.put(("log", "⚡ Transcrição encontrada em cache\n"))
+        else:
+            # Carregar modelo Whisper
+            gui_instance.output_queue.put(("log", f"🔄 Carregando modelo Whisper '{gui_instance.whisper_model}'...\n"))
+            try:
+                asr_engine.load(gui_instance.whisper_model)
+                gui_instance.output_queue.put(("log", "✅ Modelo Whisper carregado\n"))
+                gui_instance.output_queue.put(("log", f"📊 {whisper_models.get_registry().format_stats()}\n"))
+            except Exception as e:
+                gui_instance.output_queue.put(("error", f"Erro ao carregar modelo Whisper: {e}"))
+                return
 
-        # Preparar prompt para IA
-        gui_instance.output_queue.put(("log", "🤖 Preparando prompt para IA...\n"))
+            gui_instance.output_queue.put(("progress", 25))
 
-        # Ler arquivo de prompt
-        prompt_file = os.path.join(os.path.dirname(__file__), "../../../prompt_corte_youtube.py")
-        if os.path.exists(prompt_file):
+            # Transcrever vídeo
+            gui_instance.output_queue.put(("log", "🎙️ Transcrevendo vídeo...\n"))
             try:
-                with open(prompt_file, 'r', encoding='utf-8') as f:
-                    prompt_content = f.read()
-                # Extrair apenas a parte do prompt
-                if 'PROMPT_CORTE' in prompt_content:
-                    start = prompt_content.find('PROMPT_CORTE = """') + len('PROMPT_CORTE = """')
-                    end = prompt_content.find('"""', start)
-                    base_prompt = prompt_content[start:end]
-                else:
-                    base_prompt = "Analise a transcrição e identifique os momentos mais interessantes para criar clipes curtos de até 60 segundos."
+                audio = decode_audio(gui_instance.video_path)
+                result = asr_engine.transcribe(audio, gui_instance.whisper_model, language="pt", word_timestamps=False)
+                result = transcription_cache.put(gui_instance.video_path, cache_model, result,
+                                                 language="pt", word_timestamps=False)
             except Exception as e:
-                gui_instance.output_queue.put(("error", f"Erro ao ler arquivo de prompt: {e}"))
+                gui_instance.output_queue.put(("error", f"Erro na transcrição: {e}"))
                 return
-        else:
-            base_prompt = "Analise a transcrição e identifique os momentos mais interessantes para criar clipes curtos de até 60 segundos."
 
-        # Montar prompt completo
-        full_prompt = f"""{base_prompt}
+        segments = result["segments"]
+        gui_instance.output_queue.put(("log", "✅ Transcrição concluída\n"))
 
-Transcrição do vídeo:
-{transcription}
+        gui_instance.output_queue.put(("progress", 40))
+
+        # Preparar prompt para IA
+        gui_instance.output_queue.put(("log", "🤖 Preparando prompt para IA...\n"))
 
+        # Mesmo prompt do generateClips.py, com a transcrição compacta (tempos em segundos)
+        transcript_text, _ = encode_transcript(segments)
+        full_prompt = get_clip_detection_prompt(transcript_text, gui_instance.min_clips, gui_instance.max_clips)
+        full_prompt += f"""
 Instruções adicionais:
 - Gere entre {gui_instance.min_clips} e {gui_instance.max_clips} clipes
 - Cada clipe deve ter no máximo {gui_instance.max_segment_duration} segundos
 - Foque em momentos interessantes, polêmicos ou de alto engajamento
-- Retorne apenas um JSON válido com o formato especificado
 """
 
         gui_instance.output_queue.put(("progress", 50))
 
-        # Chamar API da OpenAI
-        gui_instance.output_queue.put(("log", "🔄 Enviando para IA...\n"))
+        # Chamar o LLM escolhido (OpenAI, Gemini ou servidor local)
+        provider = gui_instance.llm_provider
+        model = gui_instance.llm_model or DEFAULT_MODELS[provider]
+        key_env = API_KEY_ENV.get(provider)
+        gui_instance.output_queue.put(("log", f"🔄 Enviando para IA ({provider}/{model})...\n"))
         try:
-            headers = {
-                'Authorization': f'Bearer {gui_instance.api_key}',
-                'Content-Type': 'application/json'
-            }
-
-            data = {
-                'model': 'gpt-4',
-                'messages': [{'role': 'user', 'content': full_prompt}],
-                'temperature': 0.7,
-                'max_tokens': 2000
-            }
-
-            response = requests.post('https://api.openai.com/v1/chat/completions', headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-
-            # Extrair JSON da resposta
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                json_content = content[json_start:json_end]
-                clips_data = json.loads(json_content)
-            else:
+            # Cliente compartilhado: reaproveita conexões, tenta de novo em 429/5xx e respeita o limite da conta;
+            # sem tempo limite fixo, o provedor local recebe um proporcional ao prompt
+            content = get_client().complete(
+                provider, model, full_prompt,
+                api_key=gui_instance.api_key or (os.getenv(key_env) if key_env else None),
+                params={'temperature': 0.7, 'max_tokens': 2000} if provider != "gemini" else {'temperature': 0.7},
+                job_id=gui_instance.video_path,
+                base_url=gui_instance.llm_base_url or None
+            )
+
+            clips_data = parse_clip_response(content)
+            if clips_data is None:
                 raise Exception("JSON não encontrado na resposta da IA")
 
             gui_instance.output_queue.put(("log", "✅ Análise da IA concluída\n"))
@@ -213,46 +215,53 @@ Instruções adicionais:
         clips = clips_data['clips']
         gui_instance.output_queue.put(("log", f"🎬 Processando {len(clips)} clipes...\n"))
 
+        # Monta os trabalhos na ordem dos clipes (nomes únicos definidos antes da extração em paralelo)
+        jobs = []
+        used_paths = set()
         for i, clip in enumerate(clips):
             try:
-                start_time = clip['start_time']
-                end_time = clip['end_time']
-                title = clip['title']
-
-                gui_instance.output_queue.put(("log", f"📝 Processando clipe {i+1}/{len(clips)}: {title}\n"))
-
-                # Gerar nome do arquivo
-                safe_title = normalize_filename(title)
-                output_file = os.path.join(gui_instance.output_dir, f"{safe_title}.mp4")
-
-                # Comando FFmpeg
-                cmd = [
-                    'ffmpeg', '-y',
-                    '-i', gui_instance.video_path,
-                    '-ss', str(start_time),
-                    '-t', str(end_time - start_time),
-                    '-c:v', 'libx264',
-                    '-c:a', 'aac',
-                    '-preset', 'fast',
-                    '-crf', '23',
-                    output_file
-                ]
-
-                # Executar FFmpeg
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    gui_instance.output_queue.put(("log", f"⚠️ Erro no clipe '{title}': {result.stderr}\n"))
-                    continue
+                # Esquema do prompt_corte_youtube ("start"/"end" em mm:ss, "caption") ou o antigo
+                start_time = parse_time(clip.get('start', clip.get('start_time')))
+                end_time = parse_time(clip.get('end', clip.get('end_time')))
+            except (TypeError, ValueError) as e:
+                gui_instance.output_queue.put(("log", f"⚠️ Erro no clipe {i+1}: tempos inválidos ({e})\n"))
+                continue
+            title = clip.get('caption') or clip.get('title') or f"clipe_{i + 1}"
 
+            # Gerar nome do arquivo
+            safe_title = normalize_filename(title)
+            output_file = unique_path(os.path.join(gui_instance.output_dir, f"{safe_title}.mp4"), used_paths)
+            jobs.append((i, title, start_time, end_time, output_file))
+
+        def on_done(index, output_file, error, done):
+            title = jobs[index][1]
+            if error is not None:
+                gui_instance.output_queue.put(("log", f"⚠️ Erro no clipe '{title}': {error}\n"))
+            else:
                 gui_instance.output_queue.put(("log", f"✅ Clipe salvo: {os.path.basename(output_file)}\n"))
 
-                # Atualizar progresso
-                progress = 70 + ((i + 1) / len(clips)) * 25
-                gui_instance.output_queue.put(("progress", progress))
+            # Atualizar progresso (na ordem em que os clipes terminam)
+            progress = 70 + (done / len(jobs)) * 25
+            gui_instance.output_queue.put(("progress", progress))
 
-            except Exception as e:
-                gui_instance.output_queue.put(("log", f"⚠️ Erro no clipe {i+1}: {e}\n"))
-                continue
+        gui_instance.output_queue.put(("log", f"📝 Extraindo {len(jobs)} clipes...\n"))
+        keyframe_times = None
+        try:
+            source_info = stream_info(gui_instance.video_path)
+            if source_info["codec"] in EDGE_ENCODERS:
+                keyframe_times = KeyframeIndex().get(gui_instance.video_path)
+        except (OSError, RuntimeError, subprocess.SubprocessError, ValueError) as e:
+            gui_instance.output_queue.put(("log", f"⚠️ Índice de keyframes indisponível, extraindo em lotes: {e}\n"))
+        if keyframe_times is not None:
+            # Smart render: só as bordas até os keyframes são reencodadas, o meio é copiado
+            run_ordered(jobs, lambda job, threads: smart_cut(gui_instance.video_path, job[2], job[3], job[4],
+                                                             keyframe_times, source_info, threads),
+                        on_done=on_done)
+        else:
+            # Clipes próximos saem de um único FFmpeg (uma decodificação por lote, busca antes do -i);
+            # os lotes rodam em paralelo com threads limitadas
+            extract_ranges(gui_instance.video_path, [(job[2], job[3]) for job in jobs], [job[4] for job in jobs],
+                           DEFAULT_ENCODE_ARGS, on_done=on_done)
 
         gui_instance.output_queue.put(("progress", 95))
 
@@ -2,8 +2,11 @@
 
 mkdir -p shorts_prontos
 
+# Sondagem com cache (uma leitura por arquivo, compartilhada com o resto do AutoCutter)
+MEDIA_PROBE="$(dirname "$0")/../utils/media_probe.py"
+PYTHON=$(which python3 || which python)
 FFPROBE=$(which ffprobe)
-if [ ! -x "$FFPROBE" ]; then
+if { [ ! -x "$PYTHON" ] || [ ! -f "$MEDIA_PROBE" ]; } && [ ! -x "$FFPROBE" ]; then
   echo "Erro: ffprobe não encontrado. Instale com: sudo apt install ffmpeg"
   exit 1
 fi
@@ -12,9 +15,12 @@ for f in output_folder/*.mp4; do
   filename=$(basename "$f")
   name="${filename%_temp.mp4}"
 
-  # Pega dimensões
-  width=$($FFPROBE -v error -select_streams v:0 -show_entries stream=width -of default=noprint_wrappers=1:nokey=1 "$f")
-  height=$($FFPROBE -v error -select_streams v:0 -show_entries stream=height -of default=noprint_wrappers=1:nokey=1 "$f")
+  # Pega dimensões (largura e altura em uma única sondagem)
+  if [ -x "$PYTHON" ] && [ -f "$MEDIA_PROBE" ]; then
+    read -r width height < <("$PYTHON" "$MEDIA_PROBE" "$f" width height)
+  else
+    IFS=x read -r width height < <($FFPROBE -v error -select_streams v:0 -show_entries stream=width,height -of csv=s=x:p=0 "$f")
+  fi
 
   echo "Processando: $filename (${width}x${height})"
 
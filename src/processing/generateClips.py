@@ -1,89 +1,296 @@
 import os
+import sys
 import subprocess
 import numpy as np
 import cv2
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 import json
-import whisper
 import requests
 import argparse
 import textwrap
-import google.generativeai as genai
-from prompt_corte_youtube import get_clip_detection_prompt, get_summary_prompt
+import time
+
+# Adicionar src/utils ao path para os módulos auxiliares compartilhados
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils'))
+from prompt_corte_youtube import (get_clip_detection_prompt, get_summary_prompt, get_reduce_prompt,
+                                  get_ranked_candidates_prompt)
+import whisper_models
+from transcription_cache import TranscriptionCache
+from chunked_transcription import transcribe_chunked
+from audio_decode import SAMPLE_RATE, decode_audio
+import media_probe
+from ffmpeg_runner import print_progress, run_ffmpeg
+from vad import transcribe_speech_only
+from two_pass_transcription import merge_ranges, refine_ranges, splice_segments
+from transcription_engines import DEFAULT_ENGINE, ENGINES, cache_model_name, get_engine
+from caption_layout import CaptionLayout
+import clip_selection
+from llm_cache import LLMResponseCache
+from llm_client import API_KEY_ENV, DEFAULT_MODELS, PROVIDERS, LLMError, get_client
+from transcript_encoder import encode_transcript
+from json_stream import ClipStreamParser
+import local_highlights
+import ranked_candidates
+import clip_validation
+import clip_extraction
+import keyframes
 
 # Importa o módulo json no nível do módulo para evitar problemas de escopo
 import json as json_module
 
 
-# Opç  es de API LLM gratuitas - usaremos a API Google Gemini com limite de uso para o plano gratuito
-# Alternativas incluem a HuggingFace Inference API ou outros serviços gratuitos
-# Você pode trocar esta implementação por qualquer outra API LLM gratuita
+# Opç  es de API LLM: por padrão a API Google Gemini com limite de uso para o plano gratuito;
+# também a OpenAI ou um modelo local em um servidor compatível com a OpenAI (llama.cpp, vLLM, Ollama)
 class LLMClipFinder:
     """Classe para lidar com chamadas à API LLM para identificar trechos interessantes"""
 
-    def __init__(self, api_key=None, model="gemini-2.0-flash"):
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.model_name = model
-
-        if not self.api_key:
-            print("Nenhuma chave de API do Google Gemini encontrada. Alternando para método alternativo.")
-            self.use_gemini = False
+    def __init__(self, api_key=None, model=None, cache=None, prompt_format="compact",
+                 token_budget=None, job_id=None, audio=None, local_clip_seconds=45, base_url=None,
+                 provider="gemini", timeout=None, min_gap_seconds=2.0):
+        self.provider = provider
+        key_env = API_KEY_ENV.get(provider)
+        self.api_key = api_key or (os.getenv(key_env) if key_env else None)
+        self.model_name = model or DEFAULT_MODELS[provider]
+        # Tempo limite das chamadas (None = proporcional ao prompt nos modelos locais)
+        self.timeout = timeout
+        # "compact": unidades do tamanho de frases com tempos em segundos; "full": uma linha por segmento
+        self.prompt_format = prompt_format
+        self.token_budget = token_budget
+        self.encoding_stats = []
+        # Parâmetros de geração enviados à API (fazem parte da chave do cache)
+        self.generation_params = {}
+        self.cache = cache
+        # Cliente HTTP compartilhado (conexões reaproveitadas, novas tentativas e limite de cota);
+        # o job_id faz vídeos diferentes serem atendidos em rodízio
+        self.client = get_client()
+        self.job_id = job_id
+        # Endereço alternativo da API (ex.: servidor local de testes em llm_standin_server.py);
+        # entra no nome do modelo no cache para não misturar com as respostas reais
+        self.base_url = base_url
+        self.cache_model = self.model_name if provider == "gemini" else f"{provider}/{self.model_name}"
+        if base_url:
+            self.cache_model += f"@{base_url}"
+        # Áudio (16 kHz) e duração dos trechos usados pela seleção local (sem LLM)
+        self.audio = audio
+        self.local_clip_seconds = local_clip_seconds
+        # Intervalo mínimo entre trechos consecutivos do resumo (evita frases repetidas nas emendas)
+        self.min_gap_seconds = min_gap_seconds
+
+        if not self.api_key and not self.base_url and key_env:
+            print(f"Nenhuma chave de API encontrada para {provider} ({key_env}). Alternando para método alternativo.")
+            self.use_llm = False
             return
 
-        try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
-            self.use_gemini = True
-        except Exception as e:
-            print(f"Falha ao inicializar a API Gemini: {e}")
-            self.use_gemini = False
+        self.use_llm = True
 
     def find_interesting_moments(self, transcription_segments, min_clips=3, max_clips=10, mode="clips",
-                                 target_duration=30):
-        """Use LLM para identificar momentos interessantes a partir de segmentos de transcrição"""
+                                 target_duration=30, map_reduce=False, window_seconds=600, overlap_seconds=60,
+                                 max_concurrency=4, reduce="local", engine="llm", on_clip=None,
+                                 candidates_path=None, candidate_pool=ranked_candidates.DEFAULT_POOL_SIZE):
+        """Use LLM para identificar momentos interessantes a partir de segmentos de transcrição
+
+        Com `map_reduce` a transcrição é dividida em janelas analisadas em
+        paralelo e os candidatos são reduzidos localmente ou pelo LLM (`reduce`).
+        Com `engine="local"` (ou sem chave de API) os trechos são escolhidos
+        pela pontuação local, sem rede. Fora do map-reduce, `on_clip` recebe
+        cada clipe assim que o LLM termina de escrevê-lo. Com `candidates_path`
+        o LLM é chamado uma vez por uma lista ranqueada, salva nesse arquivo, e
+        as contagens/durações desta execução são recortadas localmente.
+        """
+        if engine == "local" or not self.use_llm:
+            return self._local_extraction(transcription_segments, max_clips, mode, target_duration)
+
+        if candidates_path:
+            return self._find_from_candidates(transcription_segments, candidates_path, candidate_pool,
+                                              min_clips, max_clips, mode, target_duration)
+
+        if map_reduce:
+            windows = clip_selection.split_windows(transcription_segments, window_seconds, overlap_seconds)
+            if len(windows) > 1:
+                return self._find_map_reduce(windows, transcription_segments, min_clips, max_clips, mode,
+                                             target_duration, max_concurrency, reduce)
+
+        prompt = self._build_prompt(transcription_segments, min_clips, max_clips, mode, target_duration)
+        result = self._call_llm_api(prompt, on_clip)
+        if result is None:
+            return self._local_extraction(transcription_segments, max_clips, mode, target_duration)
+        if mode == "summary":
+            result = dict(result)
+            result["clips"], result["duration_selection"] = self._select_for_duration(result["clips"],
+                                                                                     target_duration)
+        return result
+
+    def _select_for_duration(self, clips, target_duration):
+        """Resumo: escolhe localmente os trechos de maior importância que cabem na duração alvo"""
+        selected, stats = clip_selection.select_for_duration(clips, target_duration * 60, self.min_gap_seconds)
+        print(f"🎒 Resumo: {stats['selected']} de {stats['candidates']} trechos, "
+              f"{stats['selected_s'] / 60:.1f} de {target_duration} min ({stats['elapsed_ms']:.1f} ms)")
+        return selected, stats
+
+    def _format_transcript(self, transcription_segments, token_budget=None):
+        """Formata os dados da transcrição para o LLM"""
+        if self.prompt_format == "compact":
+            transcript_text, stats = encode_transcript(transcription_segments, token_budget)
+            self.encoding_stats.append(stats)
+            print(f"🗜️ Transcrição compacta: {stats['segments']} segmentos -> {stats['units']} trechos, "
+                  f"~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens"
+                  + (f" ({stats['dropped_units']} trechos cortados pelo orçamento)" if stats["dropped_units"] else ""))
+            return transcript_text
 
-        # Formata os dados da transcrição para o LLM
         transcript_text = ""
         for i, segment in enumerate(transcription_segments):
             start_time = self._format_time(segment["start"])
             end_time = self._format_time(segment["end"])
             transcript_text += f"[{start_time} - {end_time}] {segment['text']}\n"
+        return transcript_text
 
-        # Usa o prompt apropriado baseado no modo
+    def _build_prompt(self, transcription_segments, min_clips, max_clips, mode, target_duration, token_budget=None):
+        """Usa o prompt apropriado baseado no modo"""
+        transcript_text = self._format_transcript(transcription_segments, token_budget or self.token_budget)
         if mode == "summary":
-            prompt = get_summary_prompt(transcript_text, target_duration)
+            return get_summary_prompt(transcript_text, target_duration)
+        return get_clip_detection_prompt(transcript_text, min_clips, max_clips)
+
+    def _find_from_candidates(self, transcription_segments, candidates_path, candidate_pool, min_clips,
+                              max_clips, mode, target_duration):
+        """Recorta os clipes da lista ranqueada salva; só chama o LLM se ela não existir"""
+        fingerprint = ranked_candidates.transcript_fingerprint(transcription_segments)
+        candidates = ranked_candidates.load_candidates(candidates_path, fingerprint)
+        source = "file"
+        if candidates is not None and len(candidates) < min_clips:
+            print(f"Lista salva tem só {len(candidates)} candidatos. Pedindo uma nova ao LLM.")
+            candidates = None
+
+        if candidates is None:
+            source = "llm"
+            print(f"🏅 Pedindo ao LLM até {candidate_pool} candidatos ranqueados...")
+            transcript_text = self._format_transcript(transcription_segments, self.token_budget)
+            result = self._call_llm_api(get_ranked_candidates_prompt(transcript_text, candidate_pool))
+            candidates = ranked_candidates.rank_candidates((result or {}).get("clips", []))
+            if not candidates:
+                return self._local_extraction(transcription_segments, max_clips, mode, target_duration)
+            ranked_candidates.save_candidates(candidates_path, candidates, fingerprint, self.cache_model)
+            print(f"Candidatos ranqueados salvos em {candidates_path}")
         else:
-            prompt = get_clip_detection_prompt(transcript_text, min_clips, max_clips)
-
-        if self.use_gemini:
-            return self._call_gemini_api(prompt)
+            print(f"⚡ {len(candidates)} candidatos ranqueados lidos de {candidates_path}, sem chamar o LLM")
+
+        started = time.perf_counter()
+        clips = ranked_candidates.slice_candidates(candidates, min_clips, max_clips, mode, target_duration,
+                                                   min_gap_seconds=self.min_gap_seconds)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🧮 {len(clips)} clipes recortados de {len(candidates)} candidatos em {elapsed_ms:.1f} ms")
+        return {
+            "clips": clips,
+            "ranked_candidates": {"source": source, "candidates": len(candidates), "path": candidates_path,
+                                  "slice_ms": round(elapsed_ms, 3)},
+        }
+
+    def _find_map_reduce(self, windows, transcription_segments, min_clips, max_clips, mode, target_duration,
+                         max_concurrency, reduce):
+        """Map: um prompt por janela, em paralelo. Reduce: junta, remove duplicatas e ranqueia"""
+        total_seconds = windows[-1][1] - windows[0][0]
+        per_window = clip_selection.clips_per_window(max_clips, len(windows))
+        print(f"🗺️ Map-reduce: {len(windows)} janelas, até {max_concurrency} chamadas simultâneas")
+
+        def call(index, start, end, window_segments):
+            # No modo summary cada janela recebe uma fatia proporcional da duração alvo (e do orçamento de tokens)
+            share = (end - start) / total_seconds
+            window_target = max(1, round(target_duration * share))
+            budget = int(self.token_budget * share) if self.token_budget else None
+            prompt = self._build_prompt(window_segments, 1, per_window, mode, window_target, budget)
+            result = self._call_llm_api(prompt)
+            if result is None:
+                raise RuntimeError("falha na chamada ao LLM")
+            return result
+
+        started = time.perf_counter()
+        reports = clip_selection.map_windows(windows, call, max_concurrency)
+        candidates = [clip for report in reports for clip in report["clips"]]
+        latency = clip_selection.summarize_latency(reports)
+        latency["wall_time_s"] = round(time.perf_counter() - started, 3)
+        print(f"⏱️ Janelas: mediana {latency['median_latency_s']:.1f}s, máxima {latency['max_latency_s']:.1f}s, "
+              f"total {latency['wall_time_s']:.1f}s ({latency['failed']} falhas)")
+
+        if not candidates:
+            print("Nenhum candidato nas janelas. Usando seleção local.")
+            return self._local_extraction(transcription_segments, max_clips, mode, target_duration)
+
+        duration_selection = None
+        if mode == "summary":
+            clips, duration_selection = self._select_for_duration(candidates, target_duration)
         else:
-            return self._fallback_extraction(transcription_segments)
-
-    def _call_gemini_api(self, prompt):
-        """Chama a API Gemini com tratamento de erros adequado"""
+            clips = None
+            if reduce == "llm":
+                reduced = self._call_llm_api(get_reduce_prompt(json.dumps(candidates, ensure_ascii=False,
+                                                                             indent=2), max_clips))
+                clips = (reduced or {}).get("clips")
+            if not clips:
+                clips = clip_selection.reduce_candidates(candidates, max_clips=max_clips)
+
+        print(f"🧮 Reduce: {len(candidates)} candidatos -> {len(clips)} clipes")
+
+        window_reports = []
+        for report in reports:
+            window_report = {k: v for k, v in report.items() if k != "clips"}
+            window_report["candidates"] = len(report["clips"])
+            window_reports.append(window_report)
+
+        result = {
+            "clips": clips,
+            "map_reduce": {"reduce": reduce, "latency": latency, "windows": window_reports},
+        }
+        if duration_selection:
+            result["duration_selection"] = duration_selection
+        return result
+
+    def _call_llm_api(self, prompt, on_clip=None):
+        """Chama o LLM em streaming com tratamento de erros adequado
+
+        Cada clipe é entregue a `on_clip` assim que o objeto JSON fecha.
+        Retorna None se a chamada falhar, para o chamador decidir o fallback.
+        """
+        if self.cache:
+            cached = self.cache.get(self.cache_model, prompt, self.generation_params)
+            if cached is not None:
+                print("⚡ Resposta do LLM encontrada em cache")
+                if on_clip:
+                    for clip in cached["parsed"].get("clips", []):
+                        on_clip(clip)
+                return cached["parsed"]
+
+        parser = ClipStreamParser()
         try:
-            response = self.model.generate_content(prompt)
-            content = response.text
-
-            # Tenta analisar o JSON da resposta
-            try:
-                # Encontra o JSON na resposta se não for um JSON puro
-                import re
-                json_match = re.search(r'\{[\s\S]*\}', content)
-                if json_match:
-                    content = json_match.group(0)
-
-                import json
-                clip_data = json.loads(content)
-                return clip_data
-            except json.JSONDecodeError:
-                print("Falha ao analisar o JSON da resposta do LLM. Usando extração manual.")
-                return self._manually_extract_clips(content)
-
-        except Exception as e:
-            print(f"Erro ao chamar a API Gemini: {str(e)}")
-            return self._fallback_extraction([])  # Passa uma lista vazia como fallback
+            for chunk in self.client.stream(self.provider, self.model_name, prompt, api_key=self.api_key,
+                                            params=self.generation_params, job_id=self.job_id,
+                                            timeout=self.timeout, base_url=self.base_url):
+                for clip in parser.feed(chunk):
+                    if on_clip:
+                        on_clip(clip)
+        except LLMError as e:
+            print(f"Erro ao chamar o LLM ({self.provider}/{self.model_name}): {str(e)}")
+            if not parser.clips:
+                return None
+            # Não vai para o cache: a resposta ficou incompleta
+            print(f"Aproveitando os {len(parser.clips)} clipes recebidos antes da falha")
+            return {"clips": list(parser.clips)}
+
+        content = parser.text
+        clip_data = parser.close()
+        if not clip_data or not clip_data.get("clips"):
+            print("Falha ao analisar o JSON da resposta do LLM. Usando extração manual.")
+            clip_data = self._manually_extract_clips(content)
+            if on_clip:
+                for clip in clip_data["clips"]:
+                    on_clip(clip)
+
+        if self.cache and clip_data.get("clips"):
+            self.cache.put(self.cache_model, prompt, content, clip_data, self.generation_params)
+        return clip_data
+
+    def repair_clips(self, failures, duration, transcription_segments, attempts=1):
+        """Pede ao LLM a correção só dos clipes com tempos sem conserto (no máximo `attempts` chamadas)"""
+        return clip_validation.repair_clips(failures, self._call_llm_api, duration, transcription_segments,
+                                            attempts=attempts)
 
     def _manually_extract_clips(self, content):
         """Extrai informações do clipe manualmente se a análise do JSON falhar"""
@@ -92,60 +299,49 @@ class LLMClipFinder:
         # Tenta encontrar e extrair informações do clipe usando regex
         import re
 
-        # Procura por padrões como "Start: 01:23" ou "Start time: 01:23"
-        start_times = re.findall(r'start(?:\s+time)?:\s*(\d+:\d+)', content, re.IGNORECASE)
-        end_times = re.findall(r'end(?:\s+time)?:\s*(\d+:\d+)', content, re.IGNORECASE)
+        # Procura por padrões como "Start: 01:23", "Start time: 01:23" ou o JSON pedido no prompt ("start": "01:23")
+        start_times = re.findall(r'["\']?\bstart(?:[\s_]+time)?["\']?\s*:\s*["\']?(\d+(?::\d+){1,2})',
+                                 content, re.IGNORECASE)
+        end_times = re.findall(r'["\']?\bend(?:[\s_]+time)?["\']?\s*:\s*["\']?(\d+(?::\d+){1,2})',
+                               content, re.IGNORECASE)
+
+        def extract_field(name, others):
+            # Valor entre aspas (JSON) ou tudo até a próxima seção (texto livre)
+            pattern = (r'["\']?\b' + name + r'["\']?\s*:\s*(?:"((?:[^"\\]|\\.)*)"|(.*?)(?=\n\s*["\']?(?:'
+                       + others + r'|clip|importance|\d+\.)|\Z))')
+            return [(quoted.replace('\\"', '"') if quoted else plain).strip() for quoted, plain in
+                    re.findall(pattern, content, re.IGNORECASE | re.DOTALL)]
 
         # Extrai tudo entre "Reason:" e a próxima seção como o motivo
-        reasons = re.findall(r'reason:\s*(.*?)(?=\n\s*(?:caption|start|end|clip|\d+\.)|\Z)',
-                             content, re.IGNORECASE | re.DOTALL)
+        reasons = extract_field("reason", "caption|start|end")
 
         # Extrai legendas
-        captions = re.findall(r'caption:\s*(.*?)(?=\n\s*(?:reason|start|end|clip|\d+\.)|\Z)',
-                              content, re.IGNORECASE | re.DOTALL)
+        captions = extract_field("caption", "reason|start|end")
 
         # Combina as informações extra  das
         for i in range(min(len(start_times), len(end_times))):
             clip = {
                 "start": start_times[i],
                 "end": end_times[i],
-                "reason": reasons[i].strip() if i < len(reasons) else "Momento interessante",
-                "caption": captions[i].strip() if i < len(captions) else "Confira este momento!"
+                "reason": reasons[i] if i < len(reasons) and reasons[i] else "Momento interessante",
+                "caption": captions[i] if i < len(captions) and captions[i] else "Confira este momento!"
             }
             clips.append(clip)
 
         return {"clips": clips}
 
-    def _fallback_extraction(self, transcription_segments):
-        """Método de fallback simples se todas as chamadas da API falharem"""
-        clips = []
-
-        # Agrupa segmentos em clipes potenciais (abordagem simples)
-        # Este é um fallback muito básico que apenas seleciona segmentos espaçados uniformemente
-        total_segments = len(transcription_segments)
-        num_clips = min(5, total_segments // 3)  # Cria até 5 clipes
-
-        if num_clips == 0 and total_segments > 0:
-            num_clips = 1
-
-        for i in range(num_clips):
-            idx = (i * total_segments) // num_clips
-            segment = transcription_segments[idx]
-
-            # Calcula o início/fim do clipe (visando clipes de 45-60 segundos)
-            clip_mid = (segment["start"] + segment["end"]) / 2
-            clip_start = max(0, clip_mid - 25)
-            clip_end = min(clip_mid + 25, segment["end"] + 30)
-
-            clip = {
-                "start": self._format_time(clip_start),
-                "end": self._format_time(clip_end),
-                "reason": "Segmento potencialmente interessante",
-                "caption": segment["text"][:100] + "..." if len(segment["text"]) > 100 else segment["text"]
-            }
-            clips.append(clip)
-
-        return {"clips": clips}
+    def _local_extraction(self, transcription_segments, max_clips, mode, target_duration):
+        """Seleção local (sem rede) pelas características de fala, áudio e texto"""
+        print("🧭 Selecionando trechos com a pontuação local...")
+        result = local_highlights.find_highlights(transcription_segments, audio=self.audio,
+                                                  clip_seconds=self.local_clip_seconds, max_clips=max_clips,
+                                                  mode=mode, target_duration=target_duration,
+                                                  min_gap_seconds=self.min_gap_seconds)
+        stats = result.get("local_engine")
+        if stats:
+            print(f"⚡ {len(result['clips'])} trechos em {stats['elapsed_s']:.2f}s "
+                  f"({', '.join(stats['features'])})")
+        return result
 
     def _format_time(self, seconds):
         """Formata os segundos no formato mm:ss"""
@@ -154,29 +350,54 @@ class LLMClipFinder:
         return f"{minutes:02d}:{seconds:02d}"
 
 
-def extract_audio(video_path, output_path="temp_audio.wav"):
-    """Extrai o áudio do arquivo de vídeo"""
-    command = f"ffmpeg -i {video_path} -ab 160k -ac 2 -ar 44100 -vn {output_path} -y"
-    subprocess.call(command, shell=True)
-    return output_path
-
-
-def transcribe_audio(audio_path, whisper_model_size="base"):
-    """Transcreve o áudio usando o Whisper e retorna os segmentos"""
-    import sys
-
-    print("🔄 Carregando o modelo Whisper...", end="", flush=True)
-    model = whisper.load_model(whisper_model_size)
+def whisper_transcribe(audio, whisper_model_size="base", workers=1, threads_per_worker=None,
+                       chunk_seconds=300, vad_options=None, word_timestamps=True, engine=None):
+    """Executa o Whisper no áudio decodificado (float32, 16 kHz) e retorna o resultado
+
+    `engine` escolhe o motor de transcrição (ver transcription_engines).
+    Com `workers` > 1 o áudio é dividido em janelas transcritas em paralelo.
+    Com `vad_options` (dicionário, pode ser vazio) só as regiões de fala são
+    transcritas e os tempos são remapeados para o áudio original.
+    """
+    if vad_options is not None:
+        result, _ = transcribe_speech_only(
+            audio,
+            lambda speech: whisper_transcribe(speech, whisper_model_size, workers, threads_per_worker, chunk_seconds,
+                                              word_timestamps=word_timestamps, engine=engine),
+            **vad_options
+        )
+        return result
+
+    duration = len(audio) / SAMPLE_RATE
+
+    if workers and workers > 1:
+        print(f"🎵 Iniciando transcrição em paralelo de {duration:.0f}s de áudio")
+        return transcribe_chunked(
+            audio,
+            whisper_model_size,
+            language="pt",
+            word_timestamps=word_timestamps,
+            workers=workers,
+            threads_per_worker=threads_per_worker,
+            window_seconds=chunk_seconds,
+            engine=engine,
+            condition_on_previous_text=False,
+        )
+
+    asr_engine = get_engine(engine)
+    print(f"🔄 Carregando o modelo Whisper ({asr_engine.name})...", end="", flush=True)
+    asr_engine.load(whisper_model_size)
     print(" ✅ Modelo carregado!")
+    print(f"   {whisper_models.get_registry().format_stats()}")
 
-    print(f"🎵 Iniciando transcrição do arquivo: {audio_path}")
+    print(f"🎵 Iniciando transcrição de {duration:.0f}s de áudio")
     print("⏳ Analisando áudio... (isso pode demorar alguns minutos)")
 
-    # Usa o transcribe com verbose=True para mostrar algum progresso
-    result = model.transcribe(
-        audio_path,
+    result = asr_engine.transcribe(
+        audio,
+        whisper_model_size,
         language="pt",  # Força português brasileiro
-        word_timestamps=True,
+        word_timestamps=word_timestamps,
         verbose=False,
         condition_on_previous_text=False,
     )
@@ -184,6 +405,21 @@ def transcribe_audio(audio_path, whisper_model_size="base"):
     for segment in result["segments"]:
         print(f"[{segment['start']:.2f}s] {segment['text']}")
 
+    return result
+
+
+def transcribe_audio(audio, whisper_model_size="base", engine=None):
+    """Transcreve o áudio usando o Whisper e retorna os segmentos
+
+    `audio` pode ser o array decodificado ou o caminho de um arquivo de mídia.
+    """
+    if isinstance(audio, str):
+        audio = decode_audio(audio)
+    return process_transcription(whisper_transcribe(audio, whisper_model_size, engine=engine))
+
+
+def process_transcription(result):
+    """Converte o resultado do Whisper em segmentos com linhas de legenda"""
     print("\n📝 Processando segmentos de transcrição...")
 
     # Extrai os segmentos do resultado
@@ -204,101 +440,28 @@ def transcribe_audio(audio_path, whisper_model_size="base"):
 
     print(f"\n🔧 Processando legendas para {len(segments)} segmentos...")
 
-    # Processa os segmentos para criar linhas de texto para as legendas, semelhante ao instaClips.py
-    for seg_idx, segment in enumerate(segments):
-        # Mostra progresso do processamento de legendas
-        progress = (seg_idx + 1) / len(segments) * 100
-        print(f"\r📋 Processando legendas: {progress:.1f}% ({seg_idx + 1}/{len(segments)})", end="", flush=True)
-
-        clip_words = []
-        for word in segment.get("words", []):
-            clip_words.append({
-                "text": word["word"],
-                "start": word["start"],
-                "end": word["end"]
-            })
-
-        # Cria linhas de texto para as legendas
-        width = 1080  # Largura do Instagram
-        sample_text = "Sample Text for Calculation"
-        font_size = 60  # Tamanho da fonte padrão
-
-        font_path = "ARIAL.TTF"
-
-        # Cria uma imagem temporária para medir o tamanho do texto
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except:
-            font = ImageFont.load_default()
-
-        temp_img = Image.new('RGB', (1, 1))
-        draw = ImageDraw.Draw(temp_img)
-
-        # Calcula a largura média do caractere
-        bbox = draw.textbbox((0, 0), sample_text, font=font)
-        sample_width = bbox[2] - bbox[0]
-        char_width = sample_width / len(sample_text)
-
-        # Calcula a largura utilizável (80% da largura da tela)
-        usable_width = int(width * 0.8)
-        chars_per_line = int(usable_width / char_width)
-
-        # Cria linhas de texto com base nas palavras
-        text_lines = []
-        current_line = ""
-        line_start_time = None
-
-        for word in clip_words:
-            word_text = word["text"].strip()
-            if not word_text:
-                continue
-
-            # Inicia uma nova linha, se necessário
-            if line_start_time is None:
-                line_start_time = word["start"]
-
-            # Verifica se adicionar esta palavra excede o comprimento da linha
-            test_line = current_line + " " + word_text if current_line else word_text
-            if len(test_line) > chars_per_line:
-                # Adiciona a linha atual a text_lines
-                if current_line:
-                    text_lines.append({
-                        "text": current_line,
-                        "start": line_start_time,
-                        "end": word["start"]
-                    })
-
-                # Inicia uma nova linha com a palavra atual
-                current_line = word_text
-                line_start_time = word["start"]
-            else:
-                # Adiciona a palavra à linha atual
-                current_line = test_line
-
-        # Adiciona a última linha, se houver
-        if current_line:
-            text_lines.append({
-                "text": current_line,
-                "start": line_start_time,
-                "end": clip_words[-1]["end"] if clip_words else segment["end"]
-            })
-
-        # Adiciona text_lines ao segmento
+    # Cria as linhas de texto das legendas (quebra por largura em pixels, fonte medida uma vez)
+    layout = CaptionLayout()
+    for segment, text_lines in zip(segments, layout.layout_segments(segments)):
         segment["text_lines"] = text_lines
 
-    print(f"\n✅ Transcrição concluída! {len(segments)} segmentos processados.")
+    print(f"✅ Transcrição concluída! {len(segments)} segmentos processados.")
     return segments
 
 
 def parse_timestamp(timestamp):
-    """Converte o timestamp 'mm:ss' para segundos"""
-    parts = timestamp.split(":")
-    if len(parts) == 2:
+    """Converte o timestamp 'mm:ss', 'hh:mm:ss' ou em segundos ('754', 754) para segundos"""
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp)
+    parts = str(timestamp).strip().split(":")
+    if len(parts) == 1:
+        return int(float(parts[0]))
+    elif len(parts) == 2:
         minutes, seconds = parts
-        return int(minutes) * 60 + int(seconds)
+        return int(minutes) * 60 + int(float(seconds))
     elif len(parts) == 3:
         hours, minutes, seconds = parts
-        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        return int(hours) * 3600 + int(minutes) * 60 + int(float(seconds))
     else:
         raise ValueError(f"Formato de timestamp inválido: {timestamp}")
 
@@ -518,30 +681,41 @@ def draw_rounded_rectangle(draw, bbox, radius, fill):
 
 
 def create_clip(video_path, clip, output_path, bg_color=(255, 255, 255, 230),
-                highlight_color=(255, 226, 165, 220), text_color=(0, 0, 0)):
-    """Cria um clipe de vídeo (sem legendas) preservando o áudio"""
+                highlight_color=(255, 226, 165, 220), text_color=(0, 0, 0), threads=None,
+                keyframe_times=None, stream_info=None):
+    """Cria um clipe de vídeo (sem legendas) preservando o áudio
+
+    O nome do arquivo vem de `clip_output_path` (legenda ou número do clipe);
+    `threads` limita as threads do ffmpeg quando vários clipes são extraídos
+    ao mesmo tempo. Com `keyframe_times` (índice de `keyframes.KeyframeIndex`)
+    o corte é exato: só as bordas até os keyframes são reencodadas.
+    """
     # Converte timestamps para segundos
     start_time = parse_timestamp(clip["start"])
     end_time = parse_timestamp(clip["end"])
     duration = end_time - start_time
 
-    # Gera nome do arquivo com base na legenda
-    if "caption" in clip and clip["caption"]:
-        sanitized_caption = sanitize_filename(clip["caption"])
-        base_name = sanitized_caption
-    else:
-        base_name = os.path.splitext(os.path.basename(output_path))[0]
-
-    output_dir = os.path.dirname(output_path)
-    output_path = os.path.join(output_dir, f"{base_name}.mp4")
+    if keyframe_times is not None:
+        parts = keyframes.plan_smart_cut(keyframe_times, start_time, end_time)
+        print(f"Extraindo clipe (smart render): {' + '.join(f'{mode} {a:.2f}-{b:.2f}' for mode, a, b in parts)}")
+        try:
+            keyframes.smart_cut(video_path, start_time, end_time, output_path, keyframe_times,
+                                info=stream_info, threads=threads)
+        except RuntimeError as e:
+            print(f"Erro ao extrair clipe: {e}")
+            return None
+        print(f"Clipe salvo em {output_path}")
+        return output_path
 
     # Extrai o clipe do vídeo original com FFmpeg preservando áudio e vídeo
-    # Usando -c copy para manter qualidade original e áudio
+    # Usando -c copy para manter qualidade original e áudio (o início cai no keyframe anterior)
     extract_cmd = [
         "ffmpeg", "-ss", str(start_time), "-i", video_path,
         "-t", str(duration), "-c", "copy", "-avoid_negative_ts", "make_zero",
         output_path, "-y"
     ]
+    if threads:
+        extract_cmd[1:1] = ["-threads", str(threads)]
 
     print(f"Extraindo clipe: {' '.join(extract_cmd)}")
     result = subprocess.run(extract_cmd, capture_output=True, text=True)
@@ -554,6 +728,21 @@ def create_clip(video_path, clip, output_path, bg_color=(255, 255, 255, 230),
     return output_path
 
 
+def segments_for_clip(clip, transcription_segments):
+    """Segmentos da transcrição que se sobrepõem ao clipe"""
+    clip_start = parse_timestamp(clip["start"])
+    clip_end = parse_timestamp(clip["end"])
+    return [segment for segment in transcription_segments
+            if segment["end"] >= clip_start and segment["start"] <= clip_end]
+
+
+def clip_output_path(output_dir, clip, index):
+    """Gera nome do arquivo com base na legenda ou recurso de formato numerado"""
+    if "caption" in clip and clip["caption"]:
+        return os.path.join(output_dir, f"{sanitize_filename(clip['caption'])}.mp4")
+    return os.path.join(output_dir, f"clip_{index + 1}.mp4")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Criar clipes de vídeo usando IA para encontrar momentos interessantes")
@@ -563,12 +752,98 @@ def main():
     parser.add_argument("--max-clips", type=int, default=8, help="Número máximo de clipes a sugerir")
     parser.add_argument("--whisper-model", default="base", choices=["tiny", "base", "small", "medium", "large"],
                         help="Tamanho do modelo Whisper a ser usado para transcrição")
+    parser.add_argument("--asr-engine", default=DEFAULT_ENGINE, choices=list(ENGINES),
+                        help="Motor de transcrição: 'whisper' (PyTorch) ou 'faster-whisper' (CTranslate2 int8)")
+    parser.add_argument("--model-cache-mb", type=int, default=None,
+                        help="Limite de memória (MB) para os modelos Whisper mantidos em cache")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para transcrição em janelas paralelas (1 = desativado)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Threads do torch por processo na transcrição paralela (padrão: núcleos/processos)")
+    parser.add_argument("--chunk-seconds", type=int, default=300,
+                        help="Duração aproximada (s) de cada janela na transcrição paralela")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignorar o cache de transcrições e rodar o Whisper novamente")
+    parser.add_argument("--two-pass", action="store_true",
+                        help="Transcrever o vídeo inteiro com o modelo rascunho e usar o --whisper-model "
+                             "apenas nos trechos dos clipes sugeridos")
+    parser.add_argument("--draft-model", default="tiny", choices=["tiny", "base", "small"],
+                        help="Modelo Whisper da primeira passada no modo --two-pass")
+    parser.add_argument("--two-pass-padding", type=float, default=2.0,
+                        help="Margem (s) adicionada a cada clipe na segunda passada")
+    parser.add_argument("--vad", action="store_true",
+                        help="Transcrever apenas as regiões com fala (pula introduções, música e silêncio)")
+    parser.add_argument("--vad-threshold-db", type=float, default=None,
+                        help="Limiar de energia (dBFS) para início de fala no VAD (padrão: adaptativo ao ruído)")
+    parser.add_argument("--vad-hysteresis-db", type=float, default=6.0,
+                        help="Queda (dB) abaixo do limiar necessária para encerrar uma região de fala")
+    parser.add_argument("--vad-zcr-max", type=float, default=0.5,
+                        help="Taxa máxima de cruzamentos por zero para um quadro contar como fala")
+    parser.add_argument("--vad-min-speech-ms", type=int, default=250,
+                        help="Duração mínima (ms) de uma região de fala")
+    parser.add_argument("--vad-min-silence-ms", type=int, default=500,
+                        help="Silêncio mínimo (ms) para separar duas regiões de fala")
+    parser.add_argument("--vad-padding-ms", type=int, default=200,
+                        help="Margem (ms) adicionada antes e depois de cada região de fala")
     parser.add_argument("--api-key", help="Chave de API para o serviço LLM (opcional)")
+    parser.add_argument("--llm-provider", default="gemini", choices=list(PROVIDERS),
+                        help="Provedor do LLM: 'gemini', 'openai' ou 'local' (servidor compatível com a OpenAI, "
+                             "como o llama.cpp, em AUTOCUTTER_LOCAL_LLM_BASE_URL ou --llm-base-url)")
+    parser.add_argument("--llm-model", default=None,
+                        help="Modelo do LLM (padrão: gemini-2.0-flash, gpt-4 ou AUTOCUTTER_LOCAL_LLM_MODEL)")
+    parser.add_argument("--llm-base-url", default=None,
+                        help="Endereço alternativo da API (ex.: http://127.0.0.1:8080 do llama.cpp ou "
+                             "http://127.0.0.1:8089 do src/utils/llm_standin_server.py, para testes sem rede)")
+    parser.add_argument("--llm-timeout", type=float, default=None,
+                        help="Tempo limite (s) de cada chamada ao LLM (padrão: 120 na nuvem, proporcional "
+                             "ao prompt no provedor local)")
+    parser.add_argument("--llm-slots", type=int, default=None,
+                        help="Máximo de requisições simultâneas ao provedor (padrão: 1 no provedor local)")
+    parser.add_argument("--engine", default="llm", choices=["llm", "local"],
+                        help="Seleção dos trechos: 'llm' (--llm-provider) ou 'local' (pontuação por fala, áudio e "
+                             "texto, sem rede); sem chave de API a seleção local é usada automaticamente")
+    parser.add_argument("--local-clip-seconds", type=int, default=45,
+                        help="Duração (s) de cada trecho escolhido pela seleção local")
     parser.add_argument("--no-review", action="store_true", help="Pular revisão do clipe")
     parser.add_argument("--mode", default="clips", choices=["clips", "summary"],
                         help="Modo de processamento: 'clips' para clipes individuais ou 'summary' para resumo condensado")
     parser.add_argument("--target-duration", type=int, default=8,
                         help="Duração alvo em minutos para o resumo condensado (apenas no modo summary)")
+    parser.add_argument("--summary-min-gap", type=float, default=2.0,
+                        help="Intervalo mínimo em segundos entre trechos consecutivos do resumo (padrão: 2)")
+    parser.add_argument("--prompt-format", default="compact", choices=["compact", "full"],
+                        help="Formato da transcrição no prompt: 'compact' (frases, tempos em segundos) "
+                             "ou 'full' (uma linha por segmento)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Máximo aproximado de tokens da transcrição no prompt (corta trechos menos informativos)")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Ignorar o cache de respostas do LLM e chamar a API novamente")
+    parser.add_argument("--llm-cache-ttl-hours", type=float, default=None,
+                        help="Validade (horas) das respostas do LLM em cache (padrão: 168; 0: sempre chamar a API)")
+    parser.add_argument("--map-reduce", action="store_true",
+                        help="Analisar transcrições longas em janelas paralelas e juntar os candidatos")
+    parser.add_argument("--window-minutes", type=float, default=10,
+                        help="Duração (min) de cada janela no modo --map-reduce")
+    parser.add_argument("--window-overlap", type=float, default=60,
+                        help="Sobreposição (s) entre janelas consecutivas no modo --map-reduce")
+    parser.add_argument("--llm-concurrency", type=int, default=4,
+                        help="Máximo de chamadas simultâneas ao LLM no modo --map-reduce")
+    parser.add_argument("--reduce", default="local", choices=["local", "llm"],
+                        help="Como juntar os candidatos das janelas: 'local' (sem custo) ou 'llm'")
+    parser.add_argument("--extract-workers", type=int, default=None,
+                        help="Processos ffmpeg simultâneos na extração dos clipes (padrão: min(núcleos, clipes))")
+    parser.add_argument("--cut-mode", default="copy", choices=["copy", "smart"],
+                        help="'copy': sem reencodar, começando no keyframe anterior; 'smart': corte exato "
+                             "reencodando só as bordas até os keyframes (padrão: copy)")
+    parser.add_argument("--repair-attempts", type=int, default=1,
+                        help="Chamadas ao LLM para corrigir clipes com tempos inválidos (0 desativa; padrão: 1)")
+    parser.add_argument("--ranked-candidates", action="store_true",
+                        help="Pedir ao LLM uma lista ranqueada uma única vez (salva em clip_candidates.json) e "
+                             "recortar localmente as contagens e durações de cada execução")
+    parser.add_argument("--candidate-pool", type=int, default=ranked_candidates.DEFAULT_POOL_SIZE,
+                        help="Quantos candidatos pedir ao LLM no modo --ranked-candidates (padrão: %(default)s)")
+    parser.add_argument("--refresh-candidates", action="store_true",
+                        help="Descartar clip_candidates.json e pedir uma nova lista ao LLM")
 
     # Adiciona novos argumentos de personalização de cor
     parser.add_argument("--bg-color", default="255,255,255,230",
@@ -584,17 +859,59 @@ def main():
     highlight_color = tuple(map(int, args.highlight_color.split(',')))
     text_color = tuple(map(int, args.text_color.split(',')))
 
+    if args.model_cache_mb is not None:
+        whisper_models.configure(max_memory_mb=args.model_cache_mb)
+
     # Cria o diretório de saída
     if not os.path.exists(args.output_dir):
         os.makedirs(args.output_dir)
 
-    # Etapa 1: Extrair áudio do vídeo
-    print("Extraindo áudio do vídeo...")
-    audio_path = extract_audio(args.video_path)
+    vad_options = None
+    cache_variant = None
+    if args.vad:
+        vad_options = {
+            "threshold_db": args.vad_threshold_db,
+            "hysteresis_db": args.vad_hysteresis_db,
+            "zcr_max": args.vad_zcr_max,
+            "min_speech_ms": args.vad_min_speech_ms,
+            "min_silence_ms": args.vad_min_silence_ms,
+            "padding_ms": args.vad_padding_ms,
+        }
+        cache_variant = "vad:" + json.dumps(vad_options, sort_keys=True)
+
+    # No modo em duas passadas a primeira usa o modelo rascunho, sem timestamps por palavra
+    first_pass_model = args.draft_model if args.two_pass else args.whisper_model
+    first_pass_words = not args.two_pass
+    cache_model = cache_model_name(args.asr_engine, first_pass_model)
+
+    # Procura a transcrição no cache (mesmo vídeo, modelo, idioma e pré-processamento)
+    transcription_cache = None if args.no_cache else TranscriptionCache()
+    whisper_result = None
+    audio = None
+    if transcription_cache:
+        whisper_result = transcription_cache.get(args.video_path, cache_model, language="pt",
+                                                 word_timestamps=first_pass_words, variant=cache_variant)
+
+    if whisper_result is not None:
+        print("⚡ Transcrição encontrada em cache, pulando extração de áudio e Whisper")
+    else:
+        # Etapa 1: Decodificar o áudio do vídeo direto para memória (16 kHz mono)
+        print("Extraindo áudio do vídeo...")
+        audio = decode_audio(args.video_path)
+
+        # Etapa 2: Transcrever áudio
+        print("Transcrevendo áudio...")
+        whisper_result = whisper_transcribe(audio, first_pass_model, workers=args.workers,
+                                            threads_per_worker=args.threads_per_worker,
+                                            chunk_seconds=args.chunk_seconds, vad_options=vad_options,
+                                            word_timestamps=first_pass_words, engine=args.asr_engine)
+
+        if transcription_cache:
+            whisper_result = transcription_cache.put(args.video_path, cache_model, whisper_result,
+                                                     language="pt", word_timestamps=first_pass_words,
+                                                     variant=cache_variant)
 
-    # Etapa 2: Transcrever áudio
-    print("Transcrevendo áudio...")
-    transcription_segments = transcribe_audio(audio_path, args.whisper_model)
+    transcription_segments = process_transcription(whisper_result)
 
     # Salva a transcrição em um arquivo
     transcription_path = os.path.join(args.output_dir, "transcription.json")
@@ -603,15 +920,98 @@ def main():
 
     print(f"Transcrição salva em {transcription_path}")
 
-    # Etapa 3: Encontrar clipes interessantes usando LLM
-    print("Encontrando momentos interessantes usando LLM...")
-    clip_finder = LLMClipFinder(api_key=args.api_key)
+    # Etapa 3: Encontrar clipes interessantes usando LLM (ou a seleção local)
+    if args.engine == "local":
+        print("Encontrando momentos interessantes com a seleção local...")
+        if audio is None:
+            # Transcrição veio do cache: o áudio ainda é necessário para volume e entonação
+            audio = decode_audio(args.video_path)
+    else:
+        print("Encontrando momentos interessantes usando LLM...")
+    llm_cache = None
+    if not args.no_llm_cache:
+        llm_cache = (LLMResponseCache(ttl_hours=args.llm_cache_ttl_hours)
+                     if args.llm_cache_ttl_hours is not None else LLMResponseCache())
+    # Sem revisão, cada clipe é cortado assim que o LLM termina de escrevê-lo (no resumo a seleção
+    # pela duração alvo precisa de todos os candidatos antes do primeiro corte)
+    stream_cut = (args.no_review and args.engine == "llm" and not args.map_reduce and not args.two_pass
+                  and not args.ranked_candidates and args.mode != "summary")
+    streamed = {}
+
+    def report_clip(label, clip_path, error, seconds):
+        # Chamado na ordem em que os clipes terminam
+        if error is not None:
+            print(f"❌ Clipe {label}: {error}")
+        elif clip_path:
+            print(f"✅ Clipe {label} pronto em {seconds:.1f}s: {os.path.basename(clip_path)}")
+        else:
+            print(f"❌ Clipe {label}: falha no ffmpeg")
+
+    # Pool limitado de processos ffmpeg (usado também pelos cortes durante a geração da resposta)
+    extractor = clip_extraction.ClipExtractor(
+        args.extract_workers or clip_extraction.default_workers(args.max_clips), on_done=report_clip)
+    streamed_spans = []
+
+    # Smart render: índice de keyframes lido uma vez por vídeo (e guardado em cache) para todos os clipes
+    cut_options = {}
+    if args.cut_mode == "smart":
+        try:
+            cut_options = {"keyframe_times": keyframes.KeyframeIndex().get(args.video_path),
+                           "stream_info": keyframes.stream_info(args.video_path)}
+            print(f"🔑 {len(cut_options['keyframe_times'])} keyframes no vídeo (corte exato nas bordas)")
+        except (OSError, RuntimeError, subprocess.SubprocessError, ValueError) as e:
+            print(f"Aviso: índice de keyframes indisponível, cortando com -c copy: {e}")
+
+    # Duração do vídeo para validar os tempos dos clipes (sem ffprobe, a do áudio já decodificado)
+    video_duration = media_probe.duration(args.video_path)
+    if video_duration is None and audio is not None:
+        video_duration = len(audio) / SAMPLE_RATE
+    stream_validator = clip_validation.ClipValidator(video_duration, transcription_segments)
+
+    def cut_streamed_clip(clip):
+        # Clipes inválidos ou sobrepostos a um já cortado ficam para a validação no fim da resposta
+        reason = stream_validator.fix(clip)
+        span = (parse_timestamp(clip["start"]), parse_timestamp(clip["end"])) if not reason else None
+        if reason or any(span[0] < end and start < span[1] for start, end in streamed_spans):
+            return
+        streamed_spans.append(span)
+        index = len(streamed)
+        clip["segments"] = segments_for_clip(clip, transcription_segments)
+        print(f"✂️ Clipe {index + 1} recebido ({clip['start']} - {clip['end']}), cortando durante a geração...")
+        output_path = extractor.reserve_path(clip_output_path(args.output_dir, clip, index))
+        streamed[id(clip)] = extractor.submit(f"{index + 1} (durante a geração)", create_clip, args.video_path,
+                                              clip, output_path, bg_color=bg_color,
+                                              highlight_color=highlight_color, text_color=text_color,
+                                              threads=extractor.threads, **cut_options)
+
+    clip_finder = LLMClipFinder(api_key=args.api_key, cache=llm_cache, prompt_format=args.prompt_format,
+                                token_budget=args.token_budget, job_id=args.video_path, audio=audio,
+                                local_clip_seconds=args.local_clip_seconds, base_url=args.llm_base_url,
+                                provider=args.llm_provider, model=args.llm_model, timeout=args.llm_timeout,
+                                min_gap_seconds=args.summary_min_gap)
+    if args.llm_slots:
+        clip_finder.client.set_concurrency(args.llm_provider, args.llm_slots)
+    candidates_path = None
+    if args.ranked_candidates:
+        # Lista ranqueada ao lado de clip_suggestions.json, reaproveitada enquanto a transcrição não mudar
+        candidates_path = os.path.join(args.output_dir, ranked_candidates.CANDIDATES_FILE)
+        if args.refresh_candidates and os.path.exists(candidates_path):
+            os.remove(candidates_path)
     clip_suggestions = clip_finder.find_interesting_moments(
         transcription_segments,
         min_clips=args.min_clips,
         max_clips=args.max_clips,
         mode=args.mode,
-        target_duration=args.target_duration
+        target_duration=args.target_duration,
+        map_reduce=args.map_reduce,
+        window_seconds=args.window_minutes * 60,
+        overlap_seconds=args.window_overlap,
+        max_concurrency=args.llm_concurrency,
+        reduce=args.reduce,
+        engine=args.engine,
+        on_clip=cut_streamed_clip if stream_cut else None,
+        candidates_path=candidates_path,
+        candidate_pool=args.candidate_pool
     )
 
     if not clip_suggestions or "clips" not in clip_suggestions or not clip_suggestions["clips"]:
@@ -621,6 +1021,42 @@ def main():
     clips = clip_suggestions["clips"]
     print(f"Encontrados {len(clips)} clipes potenciais")
 
+    # Valida os tempos antes de qualquer corte: duração do vídeo, bordas na transcrição e sobreposições
+    clips, failures, validation = clip_validation.validate_clips(clips, video_duration, transcription_segments,
+                                                                 locked=set(streamed))
+    if failures and args.repair_attempts > 0 and clip_finder.use_llm and args.engine == "llm":
+        repaired, failures = clip_finder.repair_clips(failures, video_duration, transcription_segments,
+                                                      attempts=args.repair_attempts)
+        if repaired:
+            clips, _, _ = clip_validation.validate_clips(clips + repaired, video_duration, transcription_segments,
+                                                         locked=set(streamed))
+        validation["repaired"] = len(repaired)
+    for clip, reason in failures:
+        print(f"⚠️ Clipe descartado ({clip.get('start')} - {clip.get('end')}): {reason}")
+    validation["dropped"] = len(failures)
+    print(f"🔎 Validação: {len(clips)} clipes válidos, {validation['clamped']} cortados na duração, "
+          f"{validation['snapped']} ajustados à transcrição, {validation['merged']} juntados, "
+          f"{len(failures)} descartados")
+    clip_suggestions["clips"] = clips
+    clip_suggestions["validation"] = validation
+
+    if not clips:
+        print("Nenhum clipe válido restou após a validação. Saindo.")
+        extractor.shutdown(wait=True)
+        return
+
+    if llm_cache:
+        print(llm_cache.format_stats())
+        clip_suggestions["llm_cache"] = llm_cache.stats()
+    if clip_finder.use_llm and args.engine == "llm":
+        print(clip_finder.client.format_stats())
+        clip_suggestions["llm_client"] = clip_finder.client.stats()
+    if clip_finder.encoding_stats:
+        clip_suggestions["prompt_tokens"] = {
+            "before": sum(s["tokens_before"] for s in clip_finder.encoding_stats),
+            "after": sum(s["tokens_after"] for s in clip_finder.encoding_stats),
+        }
+
     # Salva as sugestões de clipes em um arquivo
     suggestions_path = os.path.join(args.output_dir, "clip_suggestions.json")
     with open(suggestions_path, "w", encoding="utf-8") as f:
@@ -628,16 +1064,34 @@ def main():
 
     print(f"Sugestões de clipes salvas em {suggestions_path}")
 
+    # Segunda passada: modelo grande só nos trechos dos clipes sugeridos
+    if args.two_pass:
+        print(f"\nRefinando a transcrição dos clipes com o modelo {args.whisper_model}...")
+        if audio is None:
+            audio = decode_audio(args.video_path)
+
+        ranges = merge_ranges(
+            [(parse_timestamp(clip["start"]), parse_timestamp(clip["end"])) for clip in clips],
+            padding_seconds=args.two_pass_padding,
+            total_seconds=len(audio) / SAMPLE_RATE
+        )
+        refined, _ = refine_ranges(
+            audio, ranges,
+            lambda audio_slice: whisper_transcribe(audio_slice, args.whisper_model, word_timestamps=True,
+                                                   engine=args.asr_engine)
+        )
+        transcription_segments = process_transcription(
+            {"segments": splice_segments(transcription_segments, refined)}
+        )
+
+        with open(transcription_path, "w", encoding="utf-8") as f:
+            json.dump(transcription_segments, f, indent=2)
+        print(f"Transcrição refinada salva em {transcription_path}")
+
     # Melhora os clipes com segmentos para uma melhor legendagem
     for clip in clips:
-        clip_start = parse_timestamp(clip["start"])
-        clip_end = parse_timestamp(clip["end"])
-
-        # Encontra segmentos que se sobrepõem a este clipe
-        clip["segments"] = []
-        for segment in transcription_segments:
-            if segment["end"] >= clip_start and segment["start"] <= clip_end:
-                clip["segments"].append(segment)
+        if id(clip) not in streamed:
+            clip["segments"] = segments_for_clip(clip, transcription_segments)
 
     # Etapa 4: Revisar clipes se solicitado
     if not args.no_review:
@@ -655,46 +1109,45 @@ def main():
         print("Nenhum clipe aprovado. Saindo.")
         return
 
-    # Etapa 5: Criar clipes aprovados
-    created_clips = []
+    # Etapa 5: Criar clipes aprovados, em paralelo; nomes e metadados seguem a ordem dos clipes
+    pending = [clip for clip in approved_clips if id(clip) not in streamed]
+    if pending:
+        print(f"\nCriando {len(pending)} clipes com até {extractor.max_workers} processos ffmpeg "
+              f"({extractor.threads} threads cada)...")
+    futures = []
     for i, clip in enumerate(approved_clips):
-        print(f"\nCriando clipe {i + 1}/{len(approved_clips)}...")
-
-        # Gera nome do arquivo com base na legenda ou recurso de formato numerado
-        if "caption" in clip and clip["caption"]:
-            sanitized_caption = sanitize_filename(clip["caption"])
-            filename = f"{sanitized_caption}.mp4"
-        else:
-            filename = f"clip_{i + 1}.mp4"
-
-        output_path = os.path.join(args.output_dir, filename)
+        if id(clip) in streamed:
+            # Já cortado (ou sendo cortado) durante a geração da resposta
+            futures.append(streamed[id(clip)])
+            continue
+
+        # Certifica-se de atualizar os segmentos em cada clipe com a transcrição mais recente
+        if not args.no_review:
+            clip_start = parse_timestamp(clip["start"])
+            clip_end = parse_timestamp(clip["end"])
+            clip["segments"] = []
+            for segment in updated_transcription:  # Usa updated_transcription aqui
+                if segment["end"] >= clip_start and segment["start"] <= clip_end:
+                    # Adiciona uma cópia profunda do segmento para evitar problemas de referência
+                    import copy
+                    clip["segments"].append(copy.deepcopy(segment))
+
+        output_path = extractor.reserve_path(clip_output_path(args.output_dir, clip, i))
+        futures.append(extractor.submit(f"{i + 1}/{len(approved_clips)}", create_clip, args.video_path, clip,
+                                        output_path, bg_color=bg_color, highlight_color=highlight_color,
+                                        text_color=text_color, threads=extractor.threads, **cut_options))
+
+    # (caminho, clipe) na ordem dos clipes aprovados, independente da ordem de conclusão
+    created = []
+    for clip, future in zip(approved_clips, futures):
         try:
-            # Certifica-se de atualizar os segmentos em cada clipe com a transcrição mais recente
-            if not args.no_review:
-                clip_start = parse_timestamp(clip["start"])
-                clip_end = parse_timestamp(clip["end"])
-                clip["segments"] = []
-                for segment in updated_transcription:  # Usa updated_transcription aqui
-                    if segment["end"] >= clip_start and segment["start"] <= clip_end:
-                        # Adiciona uma cópia profunda do segmento para evitar problemas de referência
-                        import copy
-                        clip["segments"].append(copy.deepcopy(segment))
-
-            clip_path = create_clip(
-                args.video_path,
-                clip,
-                output_path,
-                bg_color=bg_color,
-                highlight_color=highlight_color,
-                text_color=text_color
-            )
-            if clip_path:
-                created_clips.append(clip_path)
-                print(f"Criado com sucesso o clipe em {clip_path}")
-            else:
-                print(f"Falha ao criar o clipe {i + 1}")
-        except Exception as e:
-            print(f"Erro ao criar o clipe {i + 1}: {str(e)}")
+            clip_path = future.result()
+        except Exception:
+            continue  # já informado por report_clip
+        if clip_path:
+            created.append((clip_path, clip))
+    extractor.shutdown(wait=True)
+    created_clips = [clip_path for clip_path, _ in created]
 
     # Etapa 6: Se modo summary, criar vídeo condensado
     if args.mode == "summary" and created_clips:
@@ -713,11 +1166,11 @@ def main():
 
             # Atualiza a lista de clipes criados
             created_clips = [condensed_video_path]
+            created = [(condensed_video_path, created[0][1])]
         else:
             print("❌ Falha ao criar vídeo condensado")
 
-    # Etapa 6: Limpar e relatar resultados
-    os.remove(audio_path)
+    # Etapa 6: Relatar resultados
     print(f"\nProcesso concluído! Criados {len(created_clips)} clipes em {args.output_dir}")
 
     # Salva metadados sobre os clipes criados
@@ -725,8 +1178,8 @@ def main():
         "created_clips": [
             {
                 "path": clip_path,
-                "details": approved_clips[i]
-            } for i, clip_path in enumerate(created_clips)
+                "details": clip
+            } for clip_path, clip in created
         ]
     }
 
@@ -766,10 +1219,11 @@ def create_condensed_video(clips_paths, output_dir, output_name="condensed_video
 
     print(f"🔧 Executando concatenação com FFmpeg: {' '.join(command)}")
 
-    result = subprocess.run(command, capture_output=True, text=True)
+    total_duration = sum(media_probe.duration(clip_path) or 0 for clip_path in clips_paths)
+    returncode, stderr_tail = run_ffmpeg(command, duration=total_duration or None, on_progress=print_progress)
 
-    if result.returncode != 0:
-        print(f"Erro ao criar vídeo condensado: {result.stderr}")
+    if returncode != 0:
+        print(f"Erro ao criar vídeo condensado: {stderr_tail}")
         return None
 
     print(f"✅ Vídeo condensado salvo em: {output_path}")
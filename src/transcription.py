@@ -14,6 +14,24 @@ import tempfile
 import shutil
 from datetime import timedelta
 
+# Adicionar src/utils ao path para os módulos auxiliares compartilhados
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+from transcription_cache import TranscriptionCache
+from chunked_transcription import transcribe_chunked
+from audio_decode import decode_audio
+from transcription_engines import DEFAULT_ENGINE, cache_model_name, get_engine
+from caption_layout import CaptionLayout
+import media_probe
+from ffmpeg_runner import run_ffmpeg
+from keyframes import KeyframeIndex
+from chunked_render import default_chunks, render_chunked
+
+# O filtro `subtitles` do ffmpeg (libass) desenha o SRT em uma tela virtual de
+# 384x288 com FontSize=24; a quebra de linha é calculada nessas mesmas unidades
+SRT_FONT = "Arial"
+SRT_FONT_SIZE = 24
+SRT_MAX_WIDTH = int(384 * 0.9)
+
 def check_ffmpeg():
     """Verificar se ffmpeg está instalado e disponível"""
     try:
@@ -34,15 +52,22 @@ def format_timestamp(seconds):
     hours, remainder = divmod(td.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     milliseconds = td.microseconds // 1000
-    return "02d"
+    hours += td.days * 24
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def generate_srt(segments, layout=None):
+    """Gerar conteúdo SRT a partir de segmentos do Whisper
 
-def generate_srt(segments):
-    """Gerar conteúdo SRT a partir de segmentos do Whisper"""
+    Com `layout` (CaptionLayout) o texto de cada legenda é quebrado por
+    largura em pixels.
+    """
     srt_content = []
     for i, segment in enumerate(segments, 1):
         start_time = format_timestamp(segment['start'])
         end_time = format_timestamp(segment['end'])
         text = segment['text'].strip()
+        if layout:
+            text = "\n".join(layout.wrap_text(text))
 
         srt_content.append(f"{i}")
         srt_content.append(f"{start_time} --> {end_time}")
@@ -78,50 +103,61 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
     return ass_header + "\n".join(ass_events)
 
-def extract_audio(video_path, output_audio_path):
-    """Extrair áudio do vídeo usando ffmpeg"""
-    try:
-        cmd = [
-            'ffmpeg', '-i', video_path,
-            '-vn',  # Sem vídeo
-            '-acodec', 'pcm_s16le',  # PCM 16-bit
-            '-ar', '16000',  # 16kHz sample rate (ideal para Whisper)
-            '-ac', '1',  # Mono
-            '-y',  # Sobrescrever
-            output_audio_path
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0, result.stderr if result.returncode != 0 else None
-
-    except Exception as e:
-        return False, str(e)
-
-def run_whisper_transcription(audio_path, model="base", device="cpu", language=None):
-    """Executar transcrição usando Whisper"""
+def run_whisper_transcription(audio, model="base", device="cpu", language=None,
+                              cache_source=None, use_cache=True, workers=1, threads_per_worker=None,
+                              engine=DEFAULT_ENGINE):
+    """Executar transcrição usando Whisper
+
+    `audio` pode ser o array decodificado (float32, 16 kHz) ou o caminho de um
+    arquivo de mídia. Se `cache_source` (normalmente o vídeo original) for
+    informado, o resultado é procurado/armazenado no cache de transcrições.
+    Com `workers` > 1 o áudio é transcrito em janelas paralelas.
+    `engine` escolhe o motor ("whisper" ou "faster-whisper").
+    """
     try:
-        import whisper
-
-        # Carregar modelo
-        model_obj = whisper.load_model(model, device=device)
-
-        # Configurar opções
-        options = {}
-        if language:
-            options['language'] = language
+        cache_model = cache_model_name(engine, model)
+        cache = TranscriptionCache() if use_cache and cache_source else None
+        if cache:
+            cached = cache.get(cache_source, cache_model, language=language, word_timestamps=False)
+            if cached is not None:
+                return True, cached
+
+        # Falha cedo (com a mensagem de instalação) se o motor não estiver disponível
+        asr_engine = get_engine(engine, device=device)
+
+        if isinstance(audio, str):
+            audio = decode_audio(audio)
+
+        if workers and workers > 1:
+            result = transcribe_chunked(audio, model, language=language, word_timestamps=False,
+                                        workers=workers, threads_per_worker=threads_per_worker, device=device,
+                                        engine=engine)
+        else:
+            # O modelo vem do registro compartilhado (carrega apenas na primeira vez)
+            result = asr_engine.transcribe(audio, model, language=language, word_timestamps=False)
 
-        # Transcrever
-        result = model_obj.transcribe(audio_path, **options)
+        if cache:
+            result = cache.put(cache_source, cache_model, result, language=language, word_timestamps=False)
 
         return True, result
 
-    except ImportError:
-        return False, "Whisper não instalado. Instale com: pip install openai-whisper"
+    except ImportError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Erro na transcrição: {str(e)}"
 
-def render_video_with_subtitles(video_path, subtitle_path, output_path, quality="1080p 30fps"):
-    """Renderizar vídeo com legendas usando ffmpeg"""
+def render_video_with_subtitles(video_path, subtitle_path, output_path, quality="1080p 30fps", on_progress=None,
+                                chunks=None):
+    """Renderizar vídeo com legendas usando ffmpeg
+
+    `on_progress(evento)` recebe porcentagem, fps, velocidade e ETA (ver
+    `ffmpeg_runner.progress_event`) durante a renderização. `chunks` é o
+    número de partes renderizadas em paralelo (None: uma por núcleo, com
+    partes de pelo menos um minuto; 1: um único ffmpeg). As partes são
+    divididas em keyframes: a primeira renderização de cada arquivo lê todos
+    os pacotes de vídeo uma vez antes de codificar; depois o índice vem do
+    cache de `KeyframeIndex` (o mesmo do corte dos clipes).
+    """
     try:
         # Mapear qualidade para configurações ffmpeg
         quality_map = {
@@ -139,27 +175,52 @@ def render_video_with_subtitles(video_path, subtitle_path, output_path, quality=
         subtitle_ext = os.path.splitext(subtitle_path)[1].lower()
 
         if subtitle_ext == '.srt':
-            subtitle_filter = f"subtitles='{subtitle_path}':force_style='FontSize=24,PrimaryColour=&HFFFFFF&,OutlineColour=&H000000&,BorderStyle=1,Outline=2'"
+            subtitle_filter = f"subtitles='{subtitle_path}':force_style='FontName={SRT_FONT},FontSize={SRT_FONT_SIZE},PrimaryColour=&HFFFFFF&,OutlineColour=&H000000&,BorderStyle=1,Outline=2'"
         elif subtitle_ext == '.ass':
             subtitle_filter = f"ass='{subtitle_path}'"
         else:
             return False, "Formato de legenda não suportado. Use .srt ou .ass"
 
+        # Sem reescalar nem converter a taxa de quadros quando o vídeo já está na qualidade pedida
+        filters, rate_args = [f"scale={scale}", subtitle_filter], ['-r', fps]
+        try:
+            info = media_probe.probe(video_path)
+        except (OSError, RuntimeError, subprocess.SubprocessError, ValueError):
+            info = {"duration": None, "streams": []}
+        video = media_probe.first_stream(info, "video") or {}
+        if f"{video.get('width')}:{video.get('height')}" == scale:
+            filters.pop(0)
+        if video.get("fps") and abs(video["fps"] - float(fps)) < 0.01:
+            rate_args = []
+
+        video_args = ['-c:v', 'libx264', '-preset', 'slow', '-crf', '18']
+        audio_args = ['-c:a', 'aac', '-b:a', '192k']
+
+        # Vídeos longos: partes divididas em keyframes, renderizadas em paralelo e unidas sem reencodar
+        n_chunks = chunks or default_chunks(info["duration"])
+        if n_chunks > 1 and info["duration"]:
+            try:
+                keyframe_times = KeyframeIndex().get(video_path)
+            except (OSError, RuntimeError):
+                keyframe_times = []
+            if len(keyframe_times) > 1:
+                return render_chunked(video_path, output_path, filters, fps if rate_args else None,
+                                      video_args, audio_args, info["duration"], keyframe_times,
+                                      audio=media_probe.first_stream(info, "audio") is not None,
+                                      n_chunks=n_chunks, on_progress=on_progress)
+
         cmd = [
             'ffmpeg', '-i', video_path,
-            '-vf', f"scale={scale},{subtitle_filter}",
-            '-r', fps,
-            '-c:v', 'libx264',
-            '-preset', 'slow',
-            '-crf', '18',
-            '-c:a', 'aac',
-            '-b:a', '192k',
+            '-vf', ",".join(filters),
+            *rate_args,
+            *video_args,
+            *audio_args,
             '-y',
             output_path
         ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0, result.stderr if result.returncode != 0 else None
+        returncode, stderr_tail = run_ffmpeg(cmd, duration=info["duration"], on_progress=on_progress)
+        return returncode == 0, stderr_tail if returncode != 0 else None
 
     except Exception as e:
         return False, str(e)
@@ -195,31 +256,37 @@ def transcription_thread(gui_instance):
         gui_instance.output_queue.put(("transcription_status", "🔄 Iniciando transcrição..."))
         gui_instance.output_queue.put(("transcription_progress", 5))
 
-        # Extrair áudio
-        gui_instance.output_queue.put(("transcription_status", "🎵 Extraindo áudio do vídeo..."))
-        gui_instance.output_queue.put(("transcription_progress", 20))
-
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio:
-            temp_audio_path = temp_audio.name
+        model = gui_instance.transcription_model_combo.currentText()
+        device = "cuda" if gui_instance.transcription_gpu_check.isChecked() else "cpu"
+        engine = gui_instance.transcription_engine_combo.currentText()
+        video_path = gui_instance.transcription_video_path
 
-        success, error = extract_audio(gui_instance.transcription_video_path, temp_audio_path)
-        if not success:
-            gui_instance.output_queue.put(("transcription_error", f"Erro ao extrair áudio: {error}"))
-            return
+        # Transcrição já feita para este vídeo, motor e modelo: não extrai o áudio de novo
+        result = TranscriptionCache().get(video_path, cache_model_name(engine, model), word_timestamps=False)
+        if result is not None:
+            gui_instance.output_queue.put(("transcription_status", "⚡ Transcrição encontrada em cache"))
+        else:
+            # Decodificar áudio direto para memória
+            gui_instance.output_queue.put(("transcription_status", "🎵 Extraindo áudio do vídeo..."))
+            gui_instance.output_queue.put(("transcription_progress", 20))
 
-        gui_instance.output_queue.put(("transcription_progress", 40))
+            try:
+                audio = decode_audio(video_path)
+            except Exception as e:
+                gui_instance.output_queue.put(("transcription_error", f"Erro ao extrair áudio: {e}"))
+                return
 
-        # Executar Whisper
-        model = gui_instance.transcription_model_combo.currentText()
-        device = "cuda" if gui_instance.transcription_gpu_check.isChecked() else "cpu"
+            gui_instance.output_queue.put(("transcription_progress", 40))
 
-        gui_instance.output_queue.put(("transcription_status", f"🎤 Transcrevendo com Whisper ({model})..."))
-        gui_instance.output_queue.put(("transcription_progress", 60))
+            # Executar Whisper
+            gui_instance.output_queue.put(("transcription_status", f"🎤 Transcrevendo com Whisper ({engine}, {model})..."))
+            gui_instance.output_queue.put(("transcription_progress", 60))
 
-        success, result = run_whisper_transcription(temp_audio_path, model=model, device=device)
-        if not success:
-            gui_instance.output_queue.put(("transcription_error", result))
-            return
+            success, result = run_whisper_transcription(audio, model=model, device=device,
+                                                        cache_source=video_path, engine=engine)
+            if not success:
+                gui_instance.output_queue.put(("transcription_error", result))
+                return
 
         gui_instance.output_queue.put(("transcription_progress", 80))
 
@@ -236,12 +303,6 @@ def transcription_thread(gui_instance):
         gui_instance.output_queue.put(("transcription_status", "✅ Transcrição concluída!"))
         gui_instance.output_queue.put(("transcription_result", segments))
 
-        # Limpar arquivo temporário
-        try:
-            os.unlink(temp_audio_path)
-        except:
-            pass
-
     except Exception as e:
         gui_instance.output_queue.put(("transcription_error", f"Erro na transcrição: {str(e)}"))
 
@@ -277,7 +338,8 @@ def render_thread(gui_instance):
         # Criar arquivo de legenda temporário
         with tempfile.NamedTemporaryFile(mode='w', suffix='.srt', delete=False, encoding='utf-8') as temp_sub:
             temp_sub_path = temp_sub.name
-            srt_content = generate_srt(gui_instance.transcription_segments)
+            layout = CaptionLayout(f"{SRT_FONT.lower()}.ttf", SRT_FONT_SIZE, SRT_MAX_WIDTH)
+            srt_content = generate_srt(gui_instance.transcription_segments, layout)
             temp_sub.write(srt_content)
 
         # Definir caminho de saída
@@ -292,7 +354,8 @@ def render_thread(gui_instance):
             gui_instance.transcription_video_path,
             temp_sub_path,
             output_path,
-            gui_instance.render_quality_combo.currentText()
+            gui_instance.render_quality_combo.currentText(),
+            on_progress=lambda event: gui_instance.output_queue.put(("render_progress", event))
         )
 
         # Limpar arquivo temporário
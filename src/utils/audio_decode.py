@@ -0,0 +1,94 @@
+"""
+Decodificação de áudio direto para NumPy
+
+Roda o ffmpeg uma única vez, lê PCM `s16le` mono de 16 kHz pelo pipe e
+converte para float32 em um buffer pré-alocado (ou em um arquivo mapeado em
+memória para entradas muito longas). O array resultante vai direto para o
+Whisper, sem WAV temporário e sem um segundo ffmpeg para reamostrar.
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+from media_probe import duration as probe_duration
+
+SAMPLE_RATE = 16000
+
+# Acima desta duração o buffer é um arquivo temporário mapeado em memória
+MMAP_THRESHOLD_SECONDS = float(os.getenv("AUTOCUTTER_AUDIO_MMAP_SECONDS", str(2 * 3600)))
+
+_READ_BYTES = 1024 * 1024
+
+
+def _allocate(samples, use_mmap, tmp_dir=None):
+    if use_mmap:
+        # O arquivo é removido ao ser fechado; o mapeamento mantém os dados acessíveis
+        backing = tempfile.TemporaryFile(dir=tmp_dir, prefix="autocutter_pcm_")
+        backing.truncate(samples * 4)
+        return np.memmap(backing, dtype=np.float32, mode="w+", shape=(samples,))
+    return np.empty(samples, dtype=np.float32)
+
+
+def decode_audio(path, sample_rate=SAMPLE_RATE, mmap_threshold_seconds=MMAP_THRESHOLD_SECONDS, tmp_dir=None):
+    """Decodifica o áudio de `path` como float32 mono em `sample_rate` Hz
+
+    Levanta RuntimeError se o ffmpeg falhar.
+    """
+    duration = probe_duration(path)
+    # Folga de 1 s para arredondamentos do container
+    expected = int(((duration or 600) + 1) * sample_rate)
+    use_mmap = duration is not None and duration > mmap_threshold_seconds
+    buffer = _allocate(expected, use_mmap, tmp_dir)
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-i", path,
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "pipe:1"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # Lê o stderr em paralelo para o ffmpeg não travar com o pipe cheio
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    scratch = bytearray(_READ_BYTES)
+    pending = b""
+    position = 0
+    scale = np.float32(1.0 / 32768.0)
+
+    try:
+        while True:
+            n = process.stdout.readinto(scratch)
+            if not n:
+                break
+
+            data = pending + bytes(scratch[:n]) if pending else memoryview(scratch)[:n]
+            usable = len(data) - (len(data) % 2)
+            pending = bytes(data[usable:])
+            samples = np.frombuffer(data[:usable], dtype=np.int16)
+
+            if position + len(samples) > len(buffer):
+                # Duração subestimada: aumenta o buffer em 50%
+                grown = _allocate(int((position + len(samples)) * 1.5), use_mmap, tmp_dir)
+                grown[:position] = buffer[:position]
+                buffer = grown
+
+            np.multiply(samples, scale, out=buffer[position:position + len(samples)], casting="unsafe")
+            position += len(samples)
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr_thread.join()
+
+    if process.returncode != 0:
+        error = b"".join(c for c in stderr_chunks if c).decode("utf-8", errors="replace")
+        raise RuntimeError(f"Falha ao decodificar áudio de {path}: {error.strip()}")
+
+    return buffer[:position]
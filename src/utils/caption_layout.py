@@ -0,0 +1,117 @@
+"""
+Quebra de linhas de legenda por largura em pixels
+
+As fontes e as larguras de cada glifo ficam em cache, cada palavra é medida
+uma única vez e as linhas de todos os segmentos são calculadas de uma vez
+com somas acumuladas (NumPy), em vez de carregar a fonte e estimar uma
+largura média de caractere a cada segmento.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import ImageFont
+
+DEFAULT_FONT_PATH = "ARIAL.TTF"
+DEFAULT_FONT_SIZE = 60
+DEFAULT_FRAME_WIDTH = 1080  # Largura do Instagram
+USABLE_WIDTH_RATIO = 0.8    # 80% da largura da tela
+
+
+@lru_cache(maxsize=32)
+def load_font(font_path=DEFAULT_FONT_PATH, font_size=DEFAULT_FONT_SIZE):
+    """Carrega a fonte uma única vez por (arquivo, tamanho)"""
+    try:
+        return ImageFont.truetype(font_path, font_size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # Pillow antigo: fonte bitmap sem tamanho configurável
+            return ImageFont.load_default()
+
+
+class CaptionLayout:
+    """Mede palavras com larguras de glifo em cache e quebra o texto por largura em pixels"""
+
+    def __init__(self, font_path=DEFAULT_FONT_PATH, font_size=DEFAULT_FONT_SIZE, max_width=None):
+        self.font = load_font(font_path, font_size)
+        self.max_width = max_width or int(DEFAULT_FRAME_WIDTH * USABLE_WIDTH_RATIO)
+        self._advances = {}
+        self._word_widths = {}
+        self.space_width = self.glyph_advance(" ")
+
+    def glyph_advance(self, char):
+        """Avanço horizontal de um caractere (em cache)"""
+        advance = self._advances.get(char)
+        if advance is None:
+            advance = self._advances[char] = self.font.getlength(char)
+        return advance
+
+    def word_width(self, word):
+        """Largura de uma palavra, somando os avanços dos glifos (medida uma vez por palavra)"""
+        width = self._word_widths.get(word)
+        if width is None:
+            width = self._word_widths[word] = sum(self.glyph_advance(c) for c in word)
+        return width
+
+    def _break_lines(self, widths, group_ends):
+        """Índices (primeira, última) de cada linha
+
+        `group_ends[i]` é o índice da última palavra do grupo (segmento) da
+        palavra i; uma linha nunca atravessa grupos. Cada linha tem ao menos
+        uma palavra, mesmo que ela sozinha não caiba na largura.
+        """
+        word_ends = np.cumsum(widths + self.space_width)
+        word_starts = word_ends - widths
+        limits = np.searchsorted(word_ends, word_starts + self.max_width, side="right") - 1
+
+        lines = []
+        first = 0
+        while first < len(widths):
+            last = min(max(int(limits[first]), first), int(group_ends[first]))
+            lines.append((first, last))
+            first = last + 1
+        return lines
+
+    def wrap_text(self, text):
+        """Quebra um texto em linhas que cabem em `max_width`"""
+        words = text.split()
+        if not words:
+            return []
+        widths = np.array([self.word_width(w) for w in words])
+        group_ends = np.full(len(words), len(words) - 1)
+        return [" ".join(words[first:last + 1]) for first, last in self._break_lines(widths, group_ends)]
+
+    def layout_segments(self, segments):
+        """Calcula as `text_lines` (texto, início, fim) de todos os segmentos em uma passada
+
+        Uma linha termina no início da palavra que a quebrou; a última linha do
+        segmento termina no fim da sua última palavra.
+        """
+        texts, starts, ends, seg_ids = [], [], [], []
+        for index, segment in enumerate(segments):
+            for word in segment.get("words", []):
+                word_text = word["word"].strip()
+                if word_text:
+                    texts.append(word_text)
+                    starts.append(word["start"])
+                    ends.append(word["end"])
+                    seg_ids.append(index)
+
+        text_lines = [[] for _ in segments]
+        if not texts:
+            return text_lines
+
+        seg_ids = np.array(seg_ids)
+        widths = np.array([self.word_width(w) for w in texts])
+        group_ends = np.searchsorted(seg_ids, seg_ids, side="right") - 1
+
+        for first, last in self._break_lines(widths, group_ends):
+            closes_segment = last == group_ends[first]
+            text_lines[seg_ids[first]].append({
+                "text": " ".join(texts[first:last + 1]),
+                "start": starts[first],
+                "end": ends[last] if closes_segment else starts[last + 1],
+            })
+        return text_lines
@@ -0,0 +1,126 @@
+"""
+Renderização em partes paralelas de vídeos inteiros com legendas
+
+Um único libx264 `-preset slow` com `scale` + `subtitles` não ocupa todos os
+núcleos de uma máquina grande. Aqui a linha do tempo é dividida em N partes
+em keyframes, cada parte é renderizada por um ffmpeg próprio no pool
+limitado de `clip_extraction.run_ordered` e as partes são unidas pelo
+demuxer `concat` sem reencodar.
+
+Para as emendas não aparecerem:
+
+- cada parte volta os tempos para a linha do tempo original
+  (`setpts=PTS+início/TB`) antes do `subtitles`, do `fps` e do `trim`, assim
+  as legendas saem no tempo certo e cada quadro da grade de saída cai
+  exatamente em uma parte (início <= t < fim);
+- o áudio é codificado uma vez só, inteiro, em paralelo com o vídeo, e
+  copiado na junção (sem os silêncios de priming do AAC em cada emenda).
+"""
+
+import os
+import time
+import threading
+import tempfile
+
+from clip_extraction import default_workers, run_ordered
+from ffmpeg_runner import progress_event, run_ffmpeg
+
+# Partes mais curtas que isso não compensam o custo de abrir outro codificador
+MIN_CHUNK_SECONDS = 60.0
+
+
+def default_chunks(duration, cores=None, min_chunk_seconds=MIN_CHUNK_SECONDS):
+    """Número de partes: uma por núcleo, sem partes menores que `min_chunk_seconds`"""
+    cores = cores or os.cpu_count() or 1
+    if not duration:
+        return 1
+    return max(1, min(cores, int(duration // min_chunk_seconds)))
+
+
+def plan_chunks(keyframes, duration, n_chunks):
+    """Intervalos [(início, fim)] cobrindo [0, duration], com as divisões no keyframe mais próximo de
+    cada fração igual; o fim da última parte é None (até o fim do vídeo)"""
+    bounds = [0.0]
+    for i in range(1, n_chunks):
+        target = duration * i / n_chunks
+        nearest = min(keyframes, key=lambda k: abs(k - target), default=None)
+        if nearest is not None and bounds[-1] < nearest < duration:
+            bounds.append(nearest)
+    return [(start, end) for start, end in zip(bounds, bounds[1:] + [None])]
+
+
+def chunk_filter(start, end, filters, fps):
+    """Filtro de vídeo de uma parte: tempos originais, os `filters`, grade de quadros e corte exato
+
+    A conversão de taxa vem depois dos filtros, como o `-r` de um ffmpeg só;
+    com `fps` None os quadros da origem são mantidos.
+    """
+    chain = [f"setpts=PTS+{start:.6f}/TB"] + list(filters) + ([f"fps={fps}"] if fps else [])
+    chain.append(f"trim=start={start:.6f}" + (f":end={end:.6f}" if end is not None else ""))
+    chain.append("setpts=PTS-STARTPTS")
+    return ",".join(chain)
+
+
+def render_chunked(source, output_path, filters, fps, video_args, audio_args, duration, keyframes, audio=True,
+                   n_chunks=None, cores=None, on_progress=None, tmp_dir=None):
+    """Renderiza `source` em partes paralelas e une sem reencodar
+
+    `filters` são os filtros de vídeo aplicados em cada parte (ex.: scale e
+    subtitles, com os tempos originais); `fps` é a taxa de saída (None: a
+    da origem); `video_args`/`audio_args` são os codificadores. O
+    progresso somado das partes vai para `on_progress(evento)`. Retorna
+    (sucesso, final do stderr em caso de erro).
+
+    `keyframes` vem de `keyframes.KeyframeIndex.get`; `audio` diz se a
+    origem tem faixa de áudio.
+    """
+    cores = cores or os.cpu_count() or 1
+    chunks = plan_chunks(keyframes, duration, n_chunks or default_chunks(duration, cores))
+    positions = [0.0] * len(chunks)
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def report(index, event):
+        with lock:
+            positions[index] = event["out_seconds"]
+            total = sum(positions)
+        on_progress(progress_event({"out_time_us": str(int(total * 1_000_000)), "progress": "continue"},
+                                   duration, time.perf_counter() - started))
+
+    with tempfile.TemporaryDirectory(prefix="autocutter_render_", dir=tmp_dir) as temp_dir:
+        audio_path = os.path.join(temp_dir, "audio.m4a")
+        # Job -1: o áudio inteiro; os demais, uma parte de vídeo cada
+        jobs = ([(-1, None, None)] if audio else []) + [(i, start, end) for i, (start, end) in enumerate(chunks)]
+
+        def run(job, threads):
+            index, start, end = job
+            thread_args = ["-threads", str(threads)]
+            if index < 0:
+                cmd = (["ffmpeg", "-y", "-v", "error", "-i", source, "-vn", "-map", "0:a:0"] + list(audio_args)
+                       + [audio_path])
+                return run_ffmpeg(cmd)
+            span = ["-t", f"{end - start + 1:.6f}"] if end is not None else []
+            cmd = (["ffmpeg", "-y", "-v", "error", "-ss", f"{start:.6f}"] + span + ["-i", source, "-an",
+                   "-vf", chunk_filter(start, end, filters, fps)] + (["-r", str(fps)] if fps else [])
+                   + list(video_args) + thread_args
+                   + [os.path.join(temp_dir, f"parte_{index:03d}.mp4")])
+            return run_ffmpeg(cmd, on_progress=(lambda event: report(index, event)) if on_progress else None)
+
+        results = run_ordered(jobs, run, max_workers=default_workers(len(jobs), cores), cores=cores)
+        for result, error in results:
+            if error is not None:
+                return False, str(error)
+            if result[0] != 0:
+                return False, result[1]
+
+        playlist = os.path.join(temp_dir, "partes.txt")
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.writelines(f"file 'parte_{i:03d}.mp4'\n" for i in range(len(chunks)))
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", playlist]
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"] if audio else ["-map", "0:v:0"]
+        returncode, stderr_tail = run_ffmpeg(cmd + ["-c", "copy", "-movflags", "+faststart", output_path])
+
+    if on_progress and returncode == 0:
+        on_progress(progress_event({"out_time_us": str(int(duration * 1_000_000)), "progress": "end"},
+                                   duration, time.perf_counter() - started))
+    return returncode == 0, stderr_tail if returncode != 0 else None
@@ -0,0 +1,229 @@
+"""
+Transcrição em janelas paralelas
+
+Divide o áudio de 16 kHz em janelas cortadas em pontos de silêncio, transcreve
+as janelas em um pool de processos (cada um com seu próprio número de threads
+do torch) e costura os segmentos de volta com os tempos globais corretos,
+removendo as palavras duplicadas nas sobreposições entre janelas.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Configuração do processo trabalhador (preenchida por _init_worker)
+_worker_config = {}
+
+
+def frame_rms(audio, sample_rate=SAMPLE_RATE, frame_ms=50):
+    """Energia RMS por quadro, calculada de forma vetorizada"""
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1)), frame
+
+
+def find_split_points(audio, sample_rate=SAMPLE_RATE, window_seconds=300, search_seconds=15, frame_ms=50):
+    """Escolhe os pontos de corte (em amostras) no quadro mais silencioso perto de cada múltiplo da janela"""
+    rms, frame = frame_rms(audio, sample_rate, frame_ms)
+    total = len(audio)
+    window = int(window_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+
+    splits = []
+    target = window
+    while target < total - window // 4:
+        lo = max(0, (target - search) // frame)
+        hi = min(len(rms), (target + search) // frame + 1)
+        if hi > lo:
+            quietest = lo + int(np.argmin(rms[lo:hi]))
+            split = quietest * frame + frame // 2
+        else:
+            split = target
+        if not splits or split > splits[-1]:
+            splits.append(split)
+        target = split + window
+
+    return splits
+
+
+def plan_windows(audio, sample_rate=SAMPLE_RATE, window_seconds=300, overlap_seconds=1.0, search_seconds=15):
+    """Retorna as janelas como (início_núcleo, fim_núcleo, início_com_sobreposição, fim_com_sobreposição) em amostras"""
+    total = len(audio)
+    bounds = [0] + find_split_points(audio, sample_rate, window_seconds, search_seconds) + [total]
+    overlap = int(overlap_seconds * sample_rate)
+
+    windows = []
+    for core_start, core_end in zip(bounds[:-1], bounds[1:]):
+        windows.append((core_start, core_end, max(0, core_start - overlap), min(total, core_end + overlap)))
+    return windows
+
+
+def _init_worker(model_size, device, threads, transcribe_options, engine=None):
+    """Inicializa o processo trabalhador limitando as threads do torch"""
+    if threads:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    _worker_config.update({
+        "model_size": model_size,
+        "device": device,
+        "engine": engine,
+        "transcribe_options": transcribe_options,
+    })
+
+
+def _transcribe_window(index, offset_seconds, audio_slice):
+    """Transcreve uma janela e devolve segmentos já deslocados para o tempo global"""
+    from transcription_engines import get_engine
+
+    engine = get_engine(_worker_config["engine"], device=_worker_config["device"])
+    result = engine.transcribe(audio_slice, _worker_config["model_size"], **_worker_config["transcribe_options"])
+    return index, shift_segments(result.get("segments", []), offset_seconds), result.get("language")
+
+
+def shift_segments(segments, offset_seconds):
+    """Copia os segmentos (e palavras) somando um deslocamento de tempo"""
+    shifted = []
+    for segment in segments:
+        shifted.append({
+            "start": float(segment["start"]) + offset_seconds,
+            "end": float(segment["end"]) + offset_seconds,
+            "text": segment["text"],
+            "words": [
+                {
+                    "word": word["word"],
+                    "start": float(word["start"]) + offset_seconds,
+                    "end": float(word["end"]) + offset_seconds,
+                    "probability": float(word.get("probability", 1.0)),
+                }
+                for word in segment.get("words", [])
+            ],
+        })
+    return shifted
+
+
+def _normalize_word(text):
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+def stitch_windows(window_results):
+    """Junta os segmentos das janelas, mantendo cada palavra apenas na janela dona do seu tempo
+
+    `window_results` é uma lista ordenada de (início_núcleo_s, fim_núcleo_s, segmentos).
+    """
+    stitched = []
+    last_word = None
+
+    for core_start, core_end, segments in window_results:
+        for segment in segments:
+            words = segment.get("words") or []
+
+            if not words:
+                midpoint = (segment["start"] + segment["end"]) / 2
+                if core_start <= midpoint < core_end:
+                    stitched.append(segment)
+                continue
+
+            kept = [w for w in words if core_start <= (w["start"] + w["end"]) / 2 < core_end]
+
+            # Remove repetição da última palavra da janela anterior logo na fronteira
+            if kept and last_word is not None:
+                first = kept[0]
+                if (_normalize_word(first["word"]) == _normalize_word(last_word["word"])
+                        and first["start"] - last_word["end"] < 0.3):
+                    kept = kept[1:]
+
+            if not kept:
+                continue
+
+            if len(kept) != len(words):
+                segment = {
+                    "start": kept[0]["start"],
+                    "end": kept[-1]["end"],
+                    "text": "".join(w["word"] for w in kept),
+                    "words": kept,
+                }
+            stitched.append(segment)
+            last_word = kept[-1]
+
+    stitched.sort(key=lambda s: s["start"])
+    return stitched
+
+
+def transcribe_chunked(audio, model_size="base", language=None, word_timestamps=True, workers=None,
+                       threads_per_worker=None, window_seconds=300, overlap_seconds=1.0, device="cpu",
+                       engine=None, **transcribe_options):
+    """Transcreve o áudio (array float32 de 16 kHz) em janelas paralelas
+
+    Retorna um dicionário no formato do Whisper: {"text", "segments", "language"}.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = workers or cpu_count
+    windows = plan_windows(audio, SAMPLE_RATE, window_seconds, overlap_seconds)
+    workers = max(1, min(workers, len(windows)))
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+
+    options = dict(transcribe_options)
+    options.setdefault("verbose", None)
+    options["word_timestamps"] = word_timestamps
+    if language:
+        options["language"] = language
+
+    print(f"🧩 Transcrição em {len(windows)} janelas com {workers} processos "
+          f"({threads_per_worker} threads cada)")
+
+    started = time.perf_counter()
+    results = {}
+    languages = []
+
+    if workers == 1:
+        _init_worker(model_size, device, None, options, engine)
+        for i, (core_start, core_end, start, end) in enumerate(windows):
+            index, segments, lang = _transcribe_window(i, start / SAMPLE_RATE, audio[start:end])
+            results[index] = segments
+            languages.append(lang)
+            print(f"   ✅ Janela {index + 1}/{len(windows)} concluída")
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(model_size, device, threads_per_worker, options, engine)) as pool:
+            futures = [
+                pool.submit(_transcribe_window, i, start / SAMPLE_RATE, np.ascontiguousarray(audio[start:end]))
+                for i, (core_start, core_end, start, end) in enumerate(windows)
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                index, segments, lang = future.result()
+                results[index] = segments
+                languages.append(lang)
+                print(f"   ✅ Janela {index + 1}/{len(windows)} concluída ({done}/{len(windows)})")
+
+    window_results = [
+        (core_start / SAMPLE_RATE, core_end / SAMPLE_RATE, results[i])
+        for i, (core_start, core_end, _, _) in enumerate(windows)
+    ]
+    segments = stitch_windows(window_results)
+
+    elapsed = time.perf_counter() - started
+    duration = len(audio) / SAMPLE_RATE
+    print(f"⏱️ {duration:.0f}s de áudio transcritos em {elapsed:.1f}s "
+          f"({duration / elapsed if elapsed else 0:.1f}x tempo real)")
+
+    detected = language or next((lang for lang in languages if lang), None)
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": detected,
+    }
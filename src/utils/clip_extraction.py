@@ -0,0 +1,248 @@
+"""
+Extração dos clipes em paralelo com um pool limitado de processos ffmpeg
+
+Cada clipe é um processo ffmpeg independente; o pool roda até
+min(núcleos, clipes) ao mesmo tempo e cada processo recebe `-threads`
+núcleos/processos, para a soma não passar do número de núcleos. O progresso
+é informado na ordem em que os clipes terminam, mas os nomes dos arquivos e
+a lista de resultados seguem sempre a ordem dos clipes.
+
+Para clipes reencodados, `extract_ranges` agrupa trechos próximos em um
+único ffmpeg (grafo `split`/`trim`), assim cada lote lê e decodifica o
+vídeo uma vez só em vez de uma vez por clipe.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import media_probe
+from ffmpeg_runner import run_ffmpeg
+
+
+def default_workers(n_jobs=None, cores=None):
+    """Processos ffmpeg simultâneos: min(núcleos, clipes)"""
+    cores = cores or os.cpu_count() or 1
+    return max(1, min(cores, n_jobs)) if n_jobs else cores
+
+
+def threads_per_job(workers, cores=None):
+    """Valor de `-threads` de cada ffmpeg para não haver mais threads que núcleos"""
+    cores = cores or os.cpu_count() or 1
+    return max(1, cores // max(1, workers))
+
+
+def unique_path(path, used):
+    """Reserva `path` em `used`; se já estiver em uso, acrescenta _2, _3... antes da extensão"""
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{base}_{n}{ext}"
+    used.add(candidate)
+    return candidate
+
+
+class ClipExtractor:
+    """Pool de extração: `submit` devolve um Future e `on_done` é chamado a cada clipe concluído
+
+    `on_done(chave, resultado, erro, segundos)` roda na thread do pool, na
+    ordem de conclusão; use a chave (ex.: o índice do clipe) para ordenar.
+    """
+
+    def __init__(self, max_workers=None, cores=None, on_done=None):
+        self.cores = cores or os.cpu_count() or 1
+        self.max_workers = max_workers or self.cores
+        self.threads = threads_per_job(self.max_workers, self.cores)
+        self.on_done = on_done
+        self.used_paths = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ffmpeg")
+
+    def reserve_path(self, path):
+        """Nome de saída único (clipes com a mesma legenda não se sobrescrevem)"""
+        with self._lock:
+            return unique_path(path, self.used_paths)
+
+    def submit(self, key, func, *args, **kwargs):
+        def run():
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                error = e
+            if self.on_done:
+                self.on_done(key, result, error, time.perf_counter() - started)
+            if error is not None:
+                raise error
+            return result
+
+        return self._pool.submit(run)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def run_ordered(jobs, func, max_workers=None, cores=None, on_done=None):
+    """Executa `func(job, threads)` para cada job no pool e retorna [(resultado, erro)] na ordem dos jobs
+
+    `on_done(índice, resultado, erro, concluídos)` é chamado na ordem de
+    conclusão, na thread de quem chamou.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    cores = cores or os.cpu_count() or 1
+    workers = max_workers or default_workers(len(jobs), cores)
+    threads = threads_per_job(workers, cores)
+
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg") as pool:
+        futures = {pool.submit(func, job, threads): index for index, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                results[index] = (future.result(), None)
+            except Exception as e:
+                results[index] = (None, e)
+            if on_done:
+                on_done(index, results[index][0], results[index][1], done)
+    return results
+
+
+# Extração em lote (reencodando): uma só leitura/decodificação do vídeo para vários clipes
+
+DEFAULT_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23", "-c:a", "aac"]
+# Saídas por processo: cada uma tem seu próprio codificador aberto ao mesmo tempo
+MAX_BATCH_OUTPUTS = 8
+# Trechos mais distantes que isso viram lotes separados (decodificar o intervalo custaria mais
+# que abrir outro processo com busca rápida)
+MAX_BATCH_GAP_SECONDS = 90
+
+
+def plan_batches(ranges, max_outputs=MAX_BATCH_OUTPUTS, max_gap_seconds=MAX_BATCH_GAP_SECONDS):
+    """Agrupa os trechos [(início, fim)] em lotes de índices, em ordem de início
+
+    Um lote fecha quando atinge `max_outputs` saídas ou quando o próximo
+    trecho começa mais de `max_gap_seconds` depois do fim do lote. Lotes de
+    um trecho só são extraídos por um processo próprio.
+    """
+    batches = []
+    current, current_end = [], None
+    for index in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+        start, end = ranges[index]
+        if current and (len(current) >= max_outputs or start - current_end > max_gap_seconds):
+            batches.append(current)
+            current, current_end = [], None
+        current.append(index)
+        current_end = end if current_end is None else max(current_end, end)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_command(source, ranges, outputs, encode_args=DEFAULT_ENCODE_ARGS, threads=None, audio=True):
+    """Comando ffmpeg que gera todas as `outputs` a partir de uma leitura do intervalo coberto
+
+    A busca (`-ss`) vem antes de `-i`, então só o intervalo entre o primeiro
+    início e o último fim é lido; com mais de um trecho o grafo usa
+    `split`/`asplit` + `trim`/`atrim` para alimentar um codificador por saída.
+    """
+    offset = min(start for start, _ in ranges)
+    span = max(end for _, end in ranges) - offset
+    cmd = ["ffmpeg", "-y", "-v", "error", "-ss", f"{offset:.3f}", "-t", f"{span:.3f}", "-i", source]
+    thread_args = ["-threads", str(threads)] if threads else []
+
+    if len(ranges) == 1:
+        maps = ["-map", "0:v:0"] + (["-map", "0:a:0"] if audio else [])
+        return cmd + maps + list(encode_args) + thread_args + [outputs[0]]
+
+    n = len(ranges)
+    graph = ["[0:v:0]split=%d%s" % (n, "".join(f"[v{i}]" for i in range(n)))]
+    graph += [f"[v{i}]trim=start={start - offset:.3f}:end={end - offset:.3f},setpts=PTS-STARTPTS[ov{i}]"
+              for i, (start, end) in enumerate(ranges)]
+    if audio:
+        graph.append("[0:a:0]asplit=%d%s" % (n, "".join(f"[a{i}]" for i in range(n))))
+        graph += [f"[a{i}]atrim=start={start - offset:.3f}:end={end - offset:.3f},asetpts=PTS-STARTPTS[oa{i}]"
+                  for i, (start, end) in enumerate(ranges)]
+    cmd += ["-filter_complex", ";".join(graph)]
+    for i, output in enumerate(outputs):
+        cmd += ["-map", f"[ov{i}]"] + (["-map", f"[oa{i}]"] if audio else []) + list(encode_args) + thread_args
+        cmd.append(output)
+    return cmd
+
+
+def extract_ranges(source, ranges, outputs, encode_args=DEFAULT_ENCODE_ARGS, max_workers=None, cores=None,
+                   on_done=None, max_outputs=MAX_BATCH_OUTPUTS, max_gap_seconds=MAX_BATCH_GAP_SECONDS,
+                   audio=None):
+    """Extrai (reencodando) `ranges[i]` em `outputs[i]`, em lotes de uma decodificação cada
+
+    Os lotes rodam no pool limitado de `run_ordered`. `on_done(índice,
+    saída, erro, concluídos)` é chamado para cada clipe quando o lote dele
+    termina. Retorna [(saída, erro)] na ordem dos trechos.
+
+    Trechos vazios, invertidos ou que começam depois do fim do vídeo falham
+    sozinhos (ValueError) sem entrar em lote, e o fim é limitado à duração;
+    se um lote ainda assim falhar, os trechos dele são extraídos de novo um
+    processo por clipe, para um clipe ruim não derrubar os outros.
+    """
+    if audio is None:
+        audio = media_probe.has_audio(source)
+    duration = media_probe.duration(source)
+
+    results = [None] * len(ranges)
+    finished = [0]
+
+    def report(i, output, error):
+        results[i] = (output, error)
+        finished[0] += 1
+        if on_done:
+            on_done(i, output, error, finished[0])
+
+    valid, clamped = [], []
+    for i, (start, end) in enumerate(ranges):
+        if duration:
+            end = min(end, duration)
+        if end <= start:
+            report(i, None, ValueError(f"trecho vazio ou invertido: {start:.3f}-{ranges[i][1]:.3f}s"))
+        elif duration and start >= duration:
+            report(i, None, ValueError(f"trecho começa em {start:.3f}s, depois do fim do vídeo ({duration:.3f}s)"))
+        else:
+            valid.append(i)
+            clamped.append((start, end))
+    batches = [[valid[j] for j in batch] for batch in plan_batches(clamped, max_outputs, max_gap_seconds)]
+    spans = dict(zip(valid, clamped))
+
+    def extract(indices, threads):
+        cmd = batch_command(source, [spans[i] for i in indices], [outputs[i] for i in indices], encode_args,
+                            threads, audio)
+        returncode, stderr_tail = run_ffmpeg(cmd)
+        if returncode != 0:
+            raise RuntimeError(stderr_tail.strip() or f"ffmpeg saiu com código {returncode}")
+
+    def run(batch, threads):
+        try:
+            extract(batch, threads)
+            return [(outputs[i], None) for i in batch]
+        except RuntimeError:
+            if len(batch) == 1:
+                raise
+        # Lote falhou: um processo por clipe, cada um com o próprio erro
+        clip_results = []
+        for i in batch:
+            try:
+                extract([i], threads)
+                clip_results.append((outputs[i], None))
+            except RuntimeError as e:
+                clip_results.append((None, e))
+        return clip_results
+
+    def batch_done(batch_index, clip_results, error, _):
+        batch = batches[batch_index]
+        for i, (output, clip_error) in zip(batch, clip_results or [(None, error)] * len(batch)):
+            report(i, output, clip_error)
+
+    run_ordered(batches, run, max_workers, cores, batch_done)
+    return results
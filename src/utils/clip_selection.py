@@ -0,0 +1,255 @@
+"""
+Detecção de clipes em map-reduce para transcrições longas
+
+A transcrição é dividida em janelas de tempo sobrepostas, cada janela vira
+um prompt enviado ao LLM em paralelo (com limite de concorrência) e os
+candidatos de todas as janelas são juntados, sem duplicatas, e ranqueados
+até o número de clipes pedido.
+
+No modo resumo, `select_for_duration` escolhe localmente o subconjunto de
+candidatos com maior importância somada que cabe na duração alvo.
+"""
+
+import math
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+IMPORTANCE_WEIGHTS = {"alta": 3, "média": 2, "media": 2, "baixa": 1}
+
+
+def parse_time(value):
+    """Converte 'mm:ss', 'hh:mm:ss' ou segundos (número/texto) para segundos"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = str(value).strip().split(":")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_time(seconds):
+    """Formata os segundos no formato mm:ss (o mesmo usado nos prompts)"""
+    minutes = int(seconds // 60)
+    seconds = int(seconds % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def split_windows(segments, window_seconds=600, overlap_seconds=60):
+    """Divide os segmentos em janelas de tempo sobrepostas
+
+    Retorna uma lista de (início_s, fim_s, segmentos); cada segmento entra em
+    todas as janelas que o tocam.
+    """
+    if not segments:
+        return []
+
+    total_start = segments[0]["start"]
+    total_end = max(segment["end"] for segment in segments)
+    step = max(1.0, window_seconds - overlap_seconds)
+
+    windows = []
+    start = total_start
+    while True:
+        end = min(start + window_seconds, total_end)
+        window_segments = [s for s in segments if s["end"] > start and s["start"] < end]
+        if window_segments:
+            windows.append((start, end, window_segments))
+        if end >= total_end:
+            break
+        start += step
+    return windows
+
+
+def clips_per_window(max_clips, n_windows):
+    """Quantos candidatos pedir por janela (o dobro da cota, para o reduce ter o que escolher)"""
+    return max(2, min(max_clips, math.ceil(2 * max_clips / max(1, n_windows))))
+
+
+def map_windows(windows, call, max_concurrency=4):
+    """Executa `call(índice, início, fim, segmentos)` para cada janela em paralelo
+
+    Retorna a lista de relatórios por janela, na ordem das janelas:
+    {"index", "start", "end", "latency_s", "clips", "error"}.
+    """
+    def run(index, window):
+        start, end, window_segments = window
+        started = time.perf_counter()
+        clips, error = [], None
+        try:
+            result = call(index, start, end, window_segments)
+            clips = (result or {}).get("clips", [])
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - started
+
+        status = f"❌ {error}" if error else f"{len(clips)} candidatos"
+        print(f"   🪟 Janela {index + 1}/{len(windows)} [{format_time(start)} - {format_time(end)}]: "
+              f"{latency:.1f}s, {status}")
+        return {"index": index, "start": start, "end": end, "latency_s": round(latency, 3),
+                "clips": clips, "error": error}
+
+    workers = max(1, min(max_concurrency, len(windows)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        reports = list(pool.map(lambda item: run(*item), enumerate(windows)))
+    return reports
+
+
+def _overlap_ratio(a, b):
+    """Sobreposição entre dois intervalos, relativa ao menor deles"""
+    inter = min(a[1], b[1]) - max(a[0], b[0])
+    shortest = min(a[1] - a[0], b[1] - b[0])
+    return inter / shortest if shortest > 0 else 0.0
+
+
+def merge_candidates(candidates, overlap_threshold=0.5):
+    """Junta candidatos que se sobrepõem (vindos de janelas vizinhas)
+
+    Cada grupo mantém o candidato mais longo e conta quantas janelas o
+    sugeriram (`votes`).
+    """
+    parsed = []
+    for clip in candidates:
+        try:
+            start, end = parse_time(clip["start"]), parse_time(clip["end"])
+        except (KeyError, ValueError):
+            continue
+        if end > start:
+            parsed.append((start, end, clip))
+    parsed.sort(key=lambda item: item[0])
+
+    groups = []
+    for start, end, clip in parsed:
+        for group in groups:
+            if _overlap_ratio((start, end), (group["start"], group["end"])) >= overlap_threshold:
+                group["votes"] += 1
+                if end - start > group["end"] - group["start"]:
+                    group.update(start=start, end=end, clip=clip)
+                break
+        else:
+            groups.append({"start": start, "end": end, "clip": clip, "votes": 1})
+    return groups
+
+
+def _rank_key(group):
+    importance = IMPORTANCE_WEIGHTS.get(str(group["clip"].get("importance", "")).lower(), 0)
+    return (group["votes"], importance, group["end"] - group["start"])
+
+
+def reduce_candidates(candidates, max_clips=None, max_total_seconds=None):
+    """Reduce local: junta, remove duplicatas e ranqueia os candidatos
+
+    Mantém no máximo `max_clips` clipes e/ou `max_total_seconds` de duração
+    somada; o resultado volta em ordem cronológica.
+    """
+    groups = sorted(merge_candidates(candidates), key=_rank_key, reverse=True)
+
+    selected = []
+    total = 0.0
+    for group in groups:
+        if max_clips is not None and len(selected) >= max_clips:
+            break
+        duration = group["end"] - group["start"]
+        if max_total_seconds is not None and selected and total + duration > max_total_seconds:
+            continue
+        selected.append(group)
+        total += duration
+
+    selected.sort(key=lambda group: group["start"])
+    return [dict(group["clip"], start=format_time(group["start"]), end=format_time(group["end"]))
+            for group in selected]
+
+
+def clip_value(clip):
+    """Valor de um candidato: a nota numérica (`score`) ou o peso da importância do LLM"""
+    try:
+        return float(clip["score"])
+    except (KeyError, TypeError, ValueError):
+        return float(IMPORTANCE_WEIGHTS.get(str(clip.get("importance", "")).lower(), 1))
+
+
+def select_for_duration(candidates, max_total_seconds, min_gap_seconds=0.0, resolution=1.0,
+                        max_cells=4_000_000):
+    """Escolhe os candidatos de maior valor somado que cabem em `max_total_seconds`
+
+    Mochila 0/1 com programação dinâmica sobre a duração (em passos de
+    `resolution` segundos, arredondados para cima): os trechos escolhidos
+    ficam em ordem cronológica, sem sobreposição e com pelo menos
+    `min_gap_seconds` entre o fim de um e o início do próximo. Valores
+    negativos (pontuações locais) são deslocados para começar em 1. O
+    resultado é determinístico: em caso de empate fica o trecho que vem antes.
+
+    Retorna (clipes em ordem cronológica, estatísticas).
+    """
+    started = time.perf_counter()
+    items = []
+    for clip in candidates:
+        try:
+            start, end = parse_time(clip["start"]), parse_time(clip["end"])
+        except (KeyError, ValueError):
+            continue
+        if end > start:
+            items.append((start, end, clip))
+    items.sort(key=lambda item: (item[1], item[0]))
+
+    values = [clip_value(clip) for _, _, clip in items]
+    if values and min(values) <= 0:
+        shift = 1 - min(values)
+        values = [value + shift for value in values]
+
+    # Resolução mais grossa em resumos muito longos, para a tabela caber na memória
+    while (len(items) + 1) * (max_total_seconds / resolution + 1) > max_cells:
+        resolution *= 2
+    capacity = int(max_total_seconds // resolution)
+    weights = [math.ceil((end - start) / resolution - 1e-9) for start, end, _ in items]
+
+    # previous[i]: quantos trechos (ordenados pelo fim) terminam a tempo de o trecho i vir depois deles
+    ends = [end for _, end, _ in items]
+    previous = [bisect_right(ends, start - min_gap_seconds + 1e-9) for start, _, _ in items]
+
+    # best[k, w]: maior valor usando os k primeiros trechos com duração total <= w
+    best = np.zeros((len(items) + 1, capacity + 1))
+    for k, (weight, value) in enumerate(zip(weights, values), 1):
+        best[k] = best[k - 1]
+        if weight <= capacity:
+            take = best[previous[k - 1], :capacity + 1 - weight] + value
+            np.maximum(best[k, weight:], take, out=best[k, weight:])
+
+    chosen = []
+    k, w = len(items), capacity
+    while k > 0:
+        if best[k, w] == best[k - 1, w]:
+            k -= 1
+        else:
+            chosen.append(k - 1)
+            w -= weights[k - 1]
+            k = previous[k - 1]
+    chosen.reverse()
+
+    clips = [dict(items[i][2], start=format_time(items[i][0]), end=format_time(items[i][1])) for i in chosen]
+    stats = {
+        "candidates": len(items),
+        "selected": len(clips),
+        "budget_s": max_total_seconds,
+        "selected_s": round(sum(items[i][1] - items[i][0] for i in chosen), 3),
+        "value": round(sum(clip_value(items[i][2]) for i in chosen), 3),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    return clips, stats
+
+
+def summarize_latency(reports):
+    """Estatísticas de latência das janelas, para o log e o JSON de sugestões"""
+    latencies = sorted(report["latency_s"] for report in reports)
+    if not latencies:
+        return {}
+    return {
+        "windows": len(latencies),
+        "failed": sum(1 for report in reports if report["error"]),
+        "max_latency_s": latencies[-1],
+        "median_latency_s": latencies[len(latencies) // 2],
+        "total_latency_s": round(sum(latencies), 3),
+    }
@@ -0,0 +1,204 @@
+"""
+Validação dos clipes sugeridos pelo LLM antes do corte
+
+Entre `find_interesting_moments` e `create_clip`, cada clipe passa por:
+
+- leitura estrita dos tempos (`mm:ss` com minutos acima de 59, `hh:mm:ss`,
+  segundos fracionários; segundos >= 60 ou texto livre são rejeitados)
+- limites do vídeo: começa antes do fim, termina até a duração (cortado se passar)
+- fim depois do início e duração mínima
+- bordas ajustadas aos segmentos da transcrição mais próximos
+- clipes sobrepostos juntados em um só
+
+Os que não têm conserto vão, sozinhos, para um prompt de correção com um
+número limitado de tentativas (`repair_clips`); o que ainda falhar é descartado.
+"""
+
+import json
+import math
+from bisect import bisect_left
+
+from clip_selection import format_time
+from prompt_corte_youtube import get_repair_prompt
+
+DEFAULT_MIN_SECONDS = 3.0
+DEFAULT_SNAP_TOLERANCE = 2.0
+
+
+def parse_clip_time(value):
+    """Converte o tempo de um clipe para segundos; levanta ValueError se for inválido
+
+    Ao contrário de `parse_timestamp`, não aceita segundos >= 60 ("12:75"),
+    minutos >= 60 em "hh:mm:ss" nem valores negativos.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"tempo inválido: {value!r}")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(":")
+        if not 1 <= len(parts) <= 3 or any(not part.strip() or "-" in part for part in parts):
+            raise ValueError(f"tempo inválido: {value!r}")
+        numbers = [float(part) for part in parts]
+        if len(numbers) > 1 and not 0 <= numbers[-1] < 60:
+            raise ValueError(f"segundos fora de 00-59: {value!r}")
+        if len(numbers) == 3 and not 0 <= numbers[1] < 60:
+            raise ValueError(f"minutos fora de 00-59: {value!r}")
+        seconds = 0.0
+        for number in numbers:
+            seconds = seconds * 60 + number
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f"tempo inválido: {value!r}")
+    return seconds
+
+
+class ClipValidator:
+    """Corrige um clipe de cada vez (no próprio dicionário) ou diz por que ele não tem conserto"""
+
+    def __init__(self, duration=None, segments=None, min_seconds=DEFAULT_MIN_SECONDS,
+                 snap_tolerance=DEFAULT_SNAP_TOLERANCE):
+        self.duration = duration
+        self.min_seconds = min_seconds
+        self.snap_tolerance = snap_tolerance
+        segments = [s for s in (segments or []) if s["end"] > s["start"]]
+        self.starts = sorted(s["start"] for s in segments)
+        self.ends = sorted(s["end"] for s in segments)
+        self.counts = {"checked": 0, "clamped": 0, "snapped": 0, "invalid": 0}
+
+    def _nearest(self, values, target):
+        i = bisect_left(values, target)
+        near = [values[j] for j in (i - 1, i) if 0 <= j < len(values)]
+        best = min(near, key=lambda value: abs(value - target), default=None)
+        return best if best is not None and abs(best - target) <= self.snap_tolerance else None
+
+    def fix(self, clip):
+        """Valida e corrige `clip`; retorna None se ficou válido ou o motivo da rejeição"""
+        self.counts["checked"] += 1
+        reason = self._fix(clip)
+        if reason:
+            self.counts["invalid"] += 1
+        return reason
+
+    def _fix(self, clip):
+        try:
+            start, end = parse_clip_time(clip["start"]), parse_clip_time(clip["end"])
+        except KeyError as e:
+            return f"sem o campo {e}"
+        except ValueError as e:
+            return str(e)
+
+        if self.duration:
+            if start >= self.duration - self.min_seconds:
+                return f"começa em {format_time(start)}, no fim ou depois do fim do vídeo ({format_time(self.duration)})"
+            if end > self.duration:
+                end = self.duration
+                self.counts["clamped"] += 1
+        if end <= start:
+            return f"termina ({format_time(end)}) antes de começar ({format_time(start)})"
+
+        # Bordas nos segmentos da transcrição, sem deixar o clipe curto demais
+        snapped_start = self._nearest(self.starts, start)
+        snapped_end = self._nearest(self.ends, end)
+        snapped = (start if snapped_start is None else snapped_start, end if snapped_end is None else snapped_end)
+        if snapped != (start, end) and snapped[1] - snapped[0] >= self.min_seconds:
+            start, end = snapped
+            self.counts["snapped"] += 1
+        if self.duration:
+            end = min(end, self.duration)
+
+        if end - start < self.min_seconds:
+            return f"curto demais ({end - start:.1f}s)"
+
+        clip["start"] = format_time(start)
+        # Arredonda o fim para cima (sem passar da duração) para não cortar a última palavra
+        end_seconds = math.ceil(end)
+        if self.duration:
+            end_seconds = min(end_seconds, math.floor(self.duration))
+        clip["end"] = format_time(end_seconds)
+        return None
+
+
+def merge_overlaps(clips, locked=(), min_seconds=DEFAULT_MIN_SECONDS):
+    """Junta clipes sobrepostos (já validados), em ordem cronológica
+
+    O primeiro clipe de cada grupo absorve os seguintes. Clipes em `locked`
+    (ids de clipes já cortados) não mudam: quem começa dentro deles é
+    descartado e quem termina dentro deles é encurtado (e descartado se
+    ficar com menos de `min_seconds`).
+    Retorna (clipes, quantos foram juntados).
+    """
+    # Em empate no início, o clipe já cortado vem primeiro
+    spans = sorted(((parse_clip_time(c["start"]), parse_clip_time(c["end"]), c) for c in clips),
+                   key=lambda item: (item[0], id(item[2]) not in locked))
+    merged = []
+    absorbed = 0
+    for start, end, clip in spans:
+        if not merged or start >= merged[-1][1]:
+            merged.append((start, end, clip))
+            continue
+        last_start, last_end, last = merged[-1]
+        if id(last) in locked:
+            absorbed += 1
+        elif id(clip) in locked:
+            # O clipe já cortado fica inteiro; o anterior perde a parte sobreposta
+            if start - last_start < min_seconds:
+                merged.pop()
+                absorbed += 1
+            else:
+                last["end"] = format_time(start)
+                merged[-1] = (last_start, start, last)
+            merged.append((start, end, clip))
+        else:
+            absorbed += 1
+            if end > last_end:
+                last["end"] = clip["end"]
+                merged[-1] = (last_start, end, last)
+    return [clip for _, _, clip in merged], absorbed
+
+
+def validate_clips(clips, duration=None, segments=None, locked=(), **options):
+    """Valida, corrige e junta os clipes
+
+    Clipes em `locked` (ids de clipes já cortados) passam sem correção: o
+    ajuste às bordas não é idempotente e mudaria os tempos de um arquivo que
+    já existe. Retorna (clipes válidos em ordem cronológica, [(clipe,
+    motivo)] sem conserto, relatório com as contagens).
+    """
+    validator = ClipValidator(duration, segments, **options)
+    valid, failures = [], []
+    for clip in clips:
+        if id(clip) in locked:
+            valid.append(clip)
+            continue
+        reason = validator.fix(clip)
+        if reason:
+            failures.append((clip, reason))
+        else:
+            valid.append(clip)
+    valid, merged = merge_overlaps(valid, locked, validator.min_seconds)
+    report = dict(validator.counts, merged=merged)
+    return valid, failures, report
+
+
+def repair_clips(failures, call, duration=None, segments=None, attempts=1, **options):
+    """Pede ao LLM a correção apenas dos clipes sem conserto, com no máximo `attempts` chamadas
+
+    `call(prompt)` devolve {"clips": [...]} ou None. Retorna (clipes
+    corrigidos e validados, falhas que restaram).
+    """
+    repaired = []
+    for attempt in range(attempts):
+        if not failures:
+            break
+        payload = [dict({k: v for k, v in clip.items() if k not in ("segments", "text_lines")},
+                        problema=reason) for clip, reason in failures]
+        prompt = get_repair_prompt(json.dumps(payload, ensure_ascii=False, indent=2),
+                                   format_time(duration) if duration else None)
+        print(f"🩹 Pedindo a correção de {len(failures)} clipes (tentativa {attempt + 1}/{attempts})...")
+        result = call(prompt)
+        returned = (result or {}).get("clips") or []
+        fixed, still_failing, _ = validate_clips(returned, duration, segments, **options)
+        repaired.extend(fixed)
+        # Só os que voltaram ainda inválidos vão para a próxima tentativa
+        failures = still_failing if returned else failures
+    return repaired, failures
@@ -0,0 +1,154 @@
+"""
+Cache em disco genérico baseado em arquivos JSON
+
+Cada entrada é um arquivo `<chave>.json` gravado de forma atômica. O tempo de
+modificação do arquivo marca o último uso, o que permite despejar as entradas
+menos usadas quando o diretório passa do tamanho máximo.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import tempfile
+
+
+def default_cache_root():
+    """Diretório base dos caches do AutoCutter-AI"""
+    return os.getenv("AUTOCUTTER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "autocutter")
+
+
+def hash_key(*parts):
+    """Gera uma chave estável (hex) a partir de partes serializáveis em JSON"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class DiskCache:
+    """Cache chave/valor em disco com limite de tamanho (LRU) e expiração opcional"""
+
+    def __init__(self, cache_dir, max_size_mb=1024, ttl_seconds=None):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else 0
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Retorna o valor armazenado ou None se ausente, expirado ou corrompido"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) >= self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+                self.evictions += 1
+            return None
+
+        # Atualiza o tempo de acesso para a política LRU
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return entry.get("value")
+
+    def put(self, key, value):
+        """Grava um valor (serializável em JSON) e aplica o limite de tamanho"""
+        entry = {"created": time.time(), "value": value}
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        self.prune()
+
+    def delete(self, key):
+        """Remove uma entrada do cache"""
+        self._remove(self._path(key))
+
+    def prune(self):
+        """Remove entradas expiradas e as menos usadas até respeitar o tamanho máximo"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            now = time.time()
+            if self.ttl_seconds is not None:
+                # A data de criação fica dentro do arquivo, mas um arquivo não
+                # acessado há mais que o TTL certamente já expirou
+                expired = [e for e in entries if now - e[0] >= self.ttl_seconds]
+                for _, _, path in expired:
+                    self._remove(path)
+                    self.evictions += 1
+                entries = [e for e in entries if now - e[0] < self.ttl_seconds]
+
+            if not self.max_size_bytes:
+                return
+
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_size_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self.evictions += 1
+
+    def size_bytes(self):
+        """Tamanho total ocupado pelas entradas"""
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                try:
+                    total += os.path.getsize(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        return total
+
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_mb": round(self.size_bytes() / (1024 * 1024), 2),
+            }
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
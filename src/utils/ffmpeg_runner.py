@@ -0,0 +1,122 @@
+"""
+Execução do ffmpeg com progresso real e ETA
+
+`run_ffmpeg` acrescenta `-progress pipe:1` ao comando e lê, durante a
+execução, os blocos chave=valor que o ffmpeg escreve no stdout (um a cada
+~0,5 s). Cada bloco vira um evento com porcentagem, fps, velocidade e ETA
+(calculados a partir da duração sondada da saída) entregue a `on_progress`,
+que a GUI coloca na fila e a CLI imprime. Do stderr fica só um final
+limitado (as últimas linhas) para mensagens de erro, em vez do log inteiro
+em memória.
+"""
+
+import time
+import threading
+import subprocess
+from collections import deque
+
+DEFAULT_TAIL_LINES = 50
+
+
+def _float(value):
+    try:
+        return float(str(value).rstrip("x"))
+    except (TypeError, ValueError):
+        return None
+
+
+def out_seconds(fields):
+    """Posição da saída (s) em um bloco de progresso (`out_time_us`, ou `out_time` hh:mm:ss.micro)"""
+    micros = _float(fields.get("out_time_us")) or _float(fields.get("out_time_ms"))
+    if micros is not None and micros >= 0:
+        return micros / 1_000_000
+    parts = str(fields.get("out_time", "")).split(":")
+    if len(parts) == 3 and all(_float(part) is not None for part in parts):
+        h, m, s = (_float(part) for part in parts)
+        return max(0.0, h * 3600 + m * 60 + s)
+    return 0.0
+
+
+def progress_event(fields, duration=None, elapsed=0.0):
+    """Evento de progresso a partir de um bloco chave=valor do `-progress`
+
+    Retorna {"percent", "out_seconds", "fps", "speed", "eta", "elapsed",
+    "frame", "done"}; percent e eta são None sem a duração.
+    """
+    position = out_seconds(fields)
+    done = fields.get("progress") == "end"
+    speed = _float(fields.get("speed"))
+    if not speed and elapsed > 0 and position > 0:
+        speed = position / elapsed
+    percent, eta = None, None
+    if duration:
+        percent = 100.0 if done else min(100.0, 100.0 * position / duration)
+        remaining = max(0.0, duration - position)
+        eta = 0.0 if done else (remaining / speed if speed else None)
+    return {
+        "percent": percent,
+        "out_seconds": position,
+        "fps": _float(fields.get("fps")),
+        "speed": speed,
+        "eta": eta,
+        "elapsed": elapsed,
+        "frame": int(_float(fields.get("frame")) or 0),
+        "done": done,
+    }
+
+
+def _clock(seconds):
+    seconds = int(round(seconds))
+    h, rest = divmod(seconds, 3600)
+    return f"{h}:{rest // 60:02d}:{rest % 60:02d}" if h else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+def format_progress(event):
+    """Linha curta para a GUI e a CLI: "42% · 31 fps · 1.8x · ETA 03:12\""""
+    parts = [f"{event['percent']:.0f}%" if event["percent"] is not None else _clock(event["out_seconds"])]
+    if event["fps"]:
+        parts.append(f"{event['fps']:.0f} fps")
+    if event["speed"]:
+        parts.append(f"{event['speed']:.2f}x")
+    if event["done"]:
+        parts.append(f"concluído em {_clock(event['elapsed'])}")
+    elif event["eta"] is not None:
+        parts.append(f"ETA {_clock(event['eta'])}")
+    return " · ".join(parts)
+
+
+def print_progress(event):
+    """Callback para a CLI: uma linha atualizada no lugar"""
+    print(f"\r⏳ {format_progress(event):<60}", end="\n" if event["done"] else "", flush=True)
+
+
+def run_ffmpeg(cmd, duration=None, on_progress=None, tail_lines=DEFAULT_TAIL_LINES):
+    """Executa `cmd` (começando por "ffmpeg") informando o progresso
+
+    `duration` é a duração esperada da saída em segundos (para porcentagem e
+    ETA); `on_progress(evento)` é chamado na thread de quem chamou. Retorna
+    (código de saída, últimas `tail_lines` linhas do stderr).
+    """
+    cmd = [cmd[0], "-nostdin", "-nostats", "-progress", "pipe:1"] + list(cmd[1:])
+    started = time.perf_counter()
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, errors="replace")
+
+    tail = deque(maxlen=tail_lines)
+    reader = threading.Thread(target=lambda: tail.extend(line.rstrip() for line in process.stderr), daemon=True)
+    reader.start()
+
+    fields = {}
+    for line in process.stdout:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        fields[key] = value
+        if key == "progress":
+            if on_progress:
+                on_progress(progress_event(fields, duration, time.perf_counter() - started))
+            fields = {}
+
+    returncode = process.wait()
+    reader.join()
+    return returncode, "\n".join(tail)
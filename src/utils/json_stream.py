@@ -0,0 +1,199 @@
+"""
+Análise incremental e tolerante do JSON de clipes gerado pelo LLM
+
+`ClipStreamParser` recebe a resposta em pedaços (geração em streaming) e
+devolve cada objeto de `"clips"` assim que ele fecha, para o corte do
+clipe 1 começar enquanto o modelo ainda escreve o clipe 8.
+
+`loads_tolerant` recupera respostas truncadas (fecha objetos e listas
+abertos, descartando o objeto interno incompleto), vírgulas
+sobrando antes de `}`/`]` e texto ou cercas de código em volta do JSON.
+"""
+
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text):
+    """Devolve o texto JSON reparado ou None se não houver objeto/lista
+
+    Um `{`/`[` no texto antes do JSON ("Resposta [formato JSON]: {...}") não
+    vira a raiz: se o trecho reparado a partir dele não for JSON válido,
+    tenta de novo a partir do próximo.
+    """
+    start = -1
+    while True:
+        starts = [i for i in (text.find("{", start + 1), text.find("[", start + 1)) if i != -1]
+        if not starts:
+            return None
+        start = min(starts)
+        repaired = _repair_from(text, start)
+        if repaired is None:
+            continue
+        try:
+            json.loads(repaired)
+        except json.JSONDecodeError:
+            continue
+        return repaired
+
+
+def _repair_from(text, start):
+    out = []
+    stack = []
+    in_string = escape = False
+    # (tamanho da saída, pilha) nos pontos onde o último elemento está completo e nenhum
+    # objeto interno está aberto: um clipe truncado é descartado inteiro
+    safe = None
+
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                break
+            # Remove a vírgula sobrando antes do fechamento
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out)
+            if "{" not in stack[1:]:
+                safe = (len(out), list(stack))
+            continue
+        elif ch == "," and "{" not in stack[1:]:
+            safe = (len(out), list(stack))
+        out.append(ch)
+
+    # Resposta truncada: volta ao último elemento completo e fecha o que ficou aberto
+    if safe is None:
+        return None
+    length, stack = safe
+    repaired = "".join(out[:length]).rstrip().rstrip(",")
+    return repaired + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def loads_tolerant(text):
+    """json.loads que aceita texto em volta, vírgulas sobrando e respostas truncadas"""
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    repaired = repair_json(text or "")
+    if repaired is None:
+        return None
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        return None
+
+
+def is_complete_clip(clip):
+    return isinstance(clip, dict) and "start" in clip and "end" in clip
+
+
+def parse_clip_response(text):
+    """Analisa a resposta completa; retorna {"clips": [...], ...} só com clipes completos, ou None"""
+    document = loads_tolerant(text)
+    if isinstance(document, list):
+        document = {"clips": document}
+    if not isinstance(document, dict) or not isinstance(document.get("clips"), list):
+        return None
+    document["clips"] = [clip for clip in document["clips"] if is_complete_clip(clip)]
+    return document
+
+
+class ClipStreamParser:
+    """Parser incremental: feed(pedaço) retorna os clipes que fecharam naquele pedaço"""
+
+    def __init__(self):
+        self.text = ""
+        self.clips = []
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._last_key = None
+        self._clips_depth = None
+        self._clip_start = None
+        self._root_found = 0
+
+    def feed(self, chunk):
+        self.text += chunk
+        found = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if not self._stack and ch not in "{[":
+                # Texto antes do JSON (explicações, cerca de código)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                self._last_key = self._last_string
+            elif ch in "{[":
+                if not self._stack:
+                    self._root_found = len(self.clips) + len(found)
+                if ch == "[" and self._clips_depth is None and (
+                    not self._stack or (self._stack == ["{"] and self._last_key == "clips")
+                ):
+                    self._clips_depth = len(self._stack) + 1
+                elif ch == "{" and self._clips_depth is not None and len(self._stack) == self._clips_depth:
+                    self._clip_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._clip_start is not None and len(self._stack) == self._clips_depth:
+                    clip = loads_tolerant(text[self._clip_start:i + 1])
+                    self._clip_start = None
+                    if is_complete_clip(clip):
+                        found.append(clip)
+                elif ch == "]" and self._clips_depth is not None and len(self._stack) == self._clips_depth - 1:
+                    self._clips_depth = -1  # lista de clipes encerrada
+                if not self._stack and len(self.clips) + len(found) == self._root_found:
+                    # Raiz fechou sem nenhum clipe ("Resposta [formato JSON]: {...}"): era texto, não o JSON
+                    self._clips_depth = None
+                    self._clip_start = None
+
+        self._pos = len(text)
+        self.clips.extend(found)
+        return found
+
+    def close(self):
+        """Analisa o texto completo (tolerante); os clipes são os mesmos objetos já entregues"""
+        document = parse_clip_response(self.text)
+        if document is None:
+            return {"clips": list(self.clips)} if self.clips else None
+        document["clips"] = list(self.clips) if len(self.clips) >= len(document["clips"]) else document["clips"]
+        return document
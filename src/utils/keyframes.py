@@ -0,0 +1,175 @@
+"""
+Índice de keyframes por vídeo e corte "smart render"
+
+Com `-c copy` o corte cai no keyframe anterior ao início pedido: o clipe
+começa antes e muitas vezes com quadros congelados. Reencodar o clipe
+inteiro é preciso mas lento. O smart render reencoda só as bordas (do
+início até o primeiro keyframe e do último keyframe até o fim), copia os
+GOPs do meio sem reencodar e junta as partes sem perda com o demuxer
+`concat` (que converte o H.264 das partes para Annex B, com SPS/PPS em cada
+parte, então bordas e meio podem vir de codificadores diferentes).
+
+O índice de keyframes é lido uma vez por arquivo (ffprobe, flags dos
+pacotes; sem ffprobe, o ffmpeg decodificando só os keyframes) e fica no
+cache em disco, endereçado pela impressão digital do arquivo.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from bisect import bisect_right
+
+from disk_cache import DiskCache, default_cache_root, hash_key
+from transcription_cache import file_fingerprint
+import media_probe
+from ffmpeg_runner import run_ffmpeg
+
+DEFAULT_MAX_SIZE_MB = int(os.getenv("AUTOCUTTER_KEYFRAME_CACHE_MB", "64"))
+
+# Codec do vídeo de origem -> codificador usado nas bordas (as partes precisam ter o mesmo codec;
+# a conversão automática do demuxer concat só existe para H.264)
+EDGE_ENCODERS = {"h264": "libx264"}
+# Sem B-frames nas bordas: os DTS das partes emendam sem reordenação
+EDGE_ENCODE_ARGS = ["-preset", "veryfast", "-crf", "18", "-bf", "0"]
+# Trechos de cópia menores que isso não compensam três processos: o clipe é reencodado inteiro
+MIN_COPY_SECONDS = 1.0
+_EPSILON = 1e-3
+
+
+def stream_info(path):
+    """Codec, formato de pixel e início do vídeo e se há áudio (da sondagem em cache)"""
+    info = media_probe.probe(path)
+    video = media_probe.first_stream(info, "video") or {}
+    return {"codec": video.get("codec"), "pix_fmt": video.get("pix_fmt"), "start": info["start"],
+            "audio": media_probe.first_stream(info, "audio") is not None}
+
+
+def probe_keyframes(path):
+    """Tempos (s, a partir do início do arquivo) dos keyframes do primeiro stream de vídeo"""
+    start = stream_info(path)["start"]
+    if shutil.which("ffprobe"):
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+             "-of", "csv=print_section=0", path],
+            capture_output=True, text=True
+        )
+        times = []
+        for line in result.stdout.splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags and pts not in ("", "N/A"):
+                times.append(float(pts))
+    else:
+        # Sem ffprobe: o ffmpeg decodifica apenas os keyframes e o showinfo imprime os tempos
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-skip_frame", "nokey", "-i", path, "-map", "0:v:0",
+             "-vf", "showinfo", "-f", "null", "-"],
+            capture_output=True, text=True
+        )
+        times = [float(t) for t in re.findall(r"pts_time:(-?[\d.]+)", result.stderr)]
+    if result.returncode != 0:
+        raise RuntimeError(f"não foi possível ler os keyframes de {path}: {result.stderr.strip()[-500:]}")
+    return sorted({round(t - start, 6) for t in times})
+
+
+class KeyframeIndex:
+    """Cache em disco do índice de keyframes de cada arquivo de vídeo"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache = DiskCache(cache_dir or os.path.join(default_cache_root(), "keyframes"),
+                               max_size_mb=max_size_mb)
+
+    def get(self, path):
+        """Keyframes do arquivo (lidos do cache ou do vídeo, uma vez por arquivo)"""
+        key = hash_key("keyframes", file_fingerprint(path))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached["keyframes"]
+        keyframes = probe_keyframes(path)
+        try:
+            self.cache.put(key, {"keyframes": keyframes})
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar o índice de keyframes em cache: {e}")
+        return keyframes
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def plan_smart_cut(keyframes, start, end, min_copy_seconds=MIN_COPY_SECONDS):
+    """Partes do corte [(modo, início, fim)], com modo "encode" ou "copy"
+
+    O meio, do primeiro ao último keyframe dentro do clipe, é copiado; as
+    bordas são reencodadas. Sem dois keyframes dentro do clipe (ou com um
+    meio curto demais), o clipe inteiro é reencodado.
+    """
+    inside = [k for k in keyframes if start - _EPSILON <= k <= end + _EPSILON]
+    if len(inside) < 2 or inside[-1] - inside[0] < min_copy_seconds:
+        return [("encode", start, end)]
+    first, last = inside[0], inside[-1]
+    parts = []
+    if first - start > _EPSILON:
+        parts.append(("encode", start, first))
+    parts.append(("copy", first, last))
+    if end - last > _EPSILON:
+        parts.append(("encode", last, end))
+    return parts
+
+
+def keyframe_before(keyframes, seconds):
+    """Último keyframe em ou antes de `seconds` (0 se não houver)"""
+    i = bisect_right(keyframes, seconds + _EPSILON)
+    return keyframes[i - 1] if i else 0.0
+
+
+def _run(cmd):
+    returncode, stderr_tail = run_ffmpeg(cmd)
+    if returncode != 0:
+        raise RuntimeError(stderr_tail.strip() or f"ffmpeg saiu com código {returncode}")
+
+
+def smart_cut(source, start, end, output_path, keyframes, info=None, threads=None, audio_args=("-c:a", "aac")):
+    """Corta [start, end] com precisão de quadro reencodando só as bordas
+
+    `keyframes` vem de `KeyframeIndex.get`; `info` de `stream_info` (lido
+    se omitido). Vídeos que não são H.264 são reencodados inteiros com
+    libx264. Retorna `output_path`; levanta RuntimeError se o
+    ffmpeg falhar.
+    """
+    info = info or stream_info(source)
+    encoder = EDGE_ENCODERS.get(info["codec"])
+    parts = plan_smart_cut(keyframes, start, end) if encoder else [("encode", start, end)]
+    encode_args = ["-c:v", encoder or "libx264"] + EDGE_ENCODE_ARGS
+    if info["pix_fmt"]:
+        encode_args += ["-pix_fmt", info["pix_fmt"]]
+    thread_args = ["-threads", str(threads)] if threads else []
+    audio_maps = ["-map", "1:a:0"] + list(audio_args) if info["audio"] else []
+
+    with tempfile.TemporaryDirectory(prefix="autocutter_smart_") as temp_dir:
+        names = []
+        for i, (mode, part_start, part_end) in enumerate(parts):
+            name = os.path.join(temp_dir, f"parte_{i}.mp4")
+            if mode == "copy":
+                cmd = ["ffmpeg", "-y", "-v", "error", "-ss", f"{part_start:.6f}", "-i", source,
+                       "-t", f"{part_end - part_start - _EPSILON:.6f}", "-map", "0:v:0", "-an", "-c:v", "copy"]
+            else:
+                # Busca rápida até o keyframe anterior e corte exato pelo filtro trim (pts >= início e < fim)
+                seek = keyframe_before(keyframes, part_start)
+                trim = (f"trim=start={part_start + info['start']:.6f}:end={part_end + info['start']:.6f},"
+                        "setpts=PTS-STARTPTS")
+                cmd = ["ffmpeg", "-y", "-v", "error", "-ss", f"{seek:.6f}", "-copyts", "-i", source,
+                       "-map", "0:v:0", "-an", "-vf", trim, "-fps_mode", "passthrough"] + encode_args
+            _run(cmd + thread_args + [name])
+            names.append(name)
+
+        playlist = os.path.join(temp_dir, "partes.txt")
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.writelines(f"file '{name}'\n" for name in names)
+
+        # Vídeo das partes sem reencodar + áudio do trecho inteiro (contínuo, sem emendas)
+        _run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", playlist,
+              "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", source,
+              "-map", "0:v:0", "-c:v", "copy"] + audio_maps + thread_args
+             + ["-movflags", "+faststart", output_path])
+    return output_path
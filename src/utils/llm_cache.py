@@ -0,0 +1,55 @@
+"""
+Cache em disco das respostas do LLM
+
+A chave é o hash de (modelo, prompt normalizado, parâmetros de geração). Cada
+entrada guarda o texto bruto da resposta e o JSON de clipes já analisado,
+assim uma nova execução do mesmo vídeo não gasta a cota da API de novo.
+"""
+
+import os
+
+from disk_cache import DiskCache, default_cache_root, hash_key
+
+DEFAULT_MAX_SIZE_MB = int(os.getenv("AUTOCUTTER_LLM_CACHE_MB", "256"))
+DEFAULT_TTL_HOURS = float(os.getenv("AUTOCUTTER_LLM_CACHE_TTL_HOURS", str(7 * 24)))
+
+
+def normalize_prompt(prompt):
+    """Remove diferenças de espaçamento que não mudam o conteúdo do prompt"""
+    return "\n".join(" ".join(line.split()) for line in prompt.strip().splitlines())
+
+
+class LLMResponseCache:
+    """Cache das respostas do LLM com expiração (TTL) e limite de tamanho
+
+    `ttl_hours` None: nunca expira; 0: toda entrada já está vencida.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB, ttl_hours=DEFAULT_TTL_HOURS):
+        self.cache = DiskCache(cache_dir or os.path.join(default_cache_root(), "llm"),
+                               max_size_mb=max_size_mb,
+                               ttl_seconds=ttl_hours * 3600 if ttl_hours is not None else None)
+
+    @staticmethod
+    def make_key(model, prompt, params=None):
+        return hash_key(model, normalize_prompt(prompt), params or {})
+
+    def get(self, model, prompt, params=None):
+        """Retorna {"text", "parsed"} da resposta em cache ou None"""
+        return self.cache.get(self.make_key(model, prompt, params))
+
+    def put(self, model, prompt, text, parsed, params=None):
+        """Armazena a resposta bruta e o JSON analisado"""
+        try:
+            self.cache.put(self.make_key(model, prompt, params), {"text": text, "parsed": parsed})
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar a resposta do LLM em cache: {e}")
+
+    def stats(self):
+        return self.cache.stats()
+
+    def format_stats(self):
+        """Resumo das estatísticas em uma linha, para logs"""
+        s = self.stats()
+        return (f"Cache do LLM: {s['hits']} acertos, {s['misses']} falhas, "
+                f"{s['evictions']} despejos, {s['size_mb']:.1f} MB")
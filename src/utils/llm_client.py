@@ -0,0 +1,486 @@
+"""
+Cliente LLM compartilhado (asyncio)
+
+Uma única camada para todas as chamadas de LLM do projeto (CLI e GUI):
+
+- sessão HTTP compartilhada (pool de conexões reaproveitadas)
+- novas tentativas com backoff exponencial e jitter em 429/5xx e erros de rede
+- limitador por (provedor, modelo) com baldes de requisições/min e tokens/min
+- fila justa: pedidos de vídeos diferentes (`job_id`) são atendidos em rodízio
+- provedores "gemini", "openai" e "local" (servidor compatível com a OpenAI,
+  como o llama.cpp), este com tempo limite proporcional ao prompt e poucas
+  requisições simultâneas
+
+O laço de eventos roda em uma thread de fundo; código síncrono usa
+`complete()` (ou `stream()` para receber o texto em pedaços) e código
+assíncrono usa `await complete_async()`.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+from collections import OrderedDict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from transcript_encoder import estimate_tokens
+
+DEFAULT_BASE_URLS = {
+    "gemini": os.getenv("AUTOCUTTER_GEMINI_BASE_URL", "https://generativelanguage.googleapis.com"),
+    "openai": os.getenv("AUTOCUTTER_OPENAI_BASE_URL", "https://api.openai.com"),
+    "local": os.getenv("AUTOCUTTER_LOCAL_LLM_BASE_URL", "http://127.0.0.1:8080"),
+}
+
+DEFAULT_MODELS = {
+    "gemini": "gemini-2.0-flash",
+    "openai": "gpt-4",
+    "local": os.getenv("AUTOCUTTER_LOCAL_LLM_MODEL", "local-model"),
+}
+
+# Variável de ambiente com a chave de cada provedor (servidores locais não exigem chave)
+API_KEY_ENV = {"gemini": "GEMINI_API_KEY", "openai": "OPENAI_API_KEY", "local": None}
+
+# Protocolo de cada provedor: servidores locais (llama.cpp, vLLM, Ollama) falam o da OpenAI
+WIRE_FORMATS = {"gemini": "gemini", "openai": "openai", "local": "openai"}
+PROVIDERS = tuple(WIRE_FORMATS)
+
+# (requisições/min, tokens/min) por provedor e modelo; o Gemini usa os limites do plano gratuito
+DEFAULT_LIMITS = {
+    ("gemini", "gemini-2.0-flash"): (15, 1_000_000),
+    ("gemini", "gemini-1.5-flash"): (15, 1_000_000),
+    ("gemini", "gemini-1.5-pro"): (2, 32_000),
+    ("openai", "gpt-4"): (500, 10_000),
+    ("openai", "gpt-4o-mini"): (500, 200_000),
+}
+PROVIDER_LIMITS = {
+    "gemini": (15, 1_000_000),
+    "openai": (500, 30_000),
+    "local": (None, None),
+}
+
+# Requisições simultâneas por provedor; um servidor local atende poucas de cada vez
+PROVIDER_CONCURRENCY = {"local": int(os.getenv("AUTOCUTTER_LOCAL_LLM_SLOTS", "1"))}
+
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_TIMEOUT = 120
+# Tempo limite proporcional ao tamanho do prompt em modelos locais na CPU:
+# (segundos fixos, tokens/s de leitura do prompt, tokens/s de geração)
+TIMEOUT_PROFILES = {
+    "local": (30, float(os.getenv("AUTOCUTTER_LOCAL_LLM_PREFILL_TPS", "40")),
+              float(os.getenv("AUTOCUTTER_LOCAL_LLM_DECODE_TPS", "6"))),
+}
+DEFAULT_OUTPUT_TOKENS = 1024
+DEFAULT_CONCURRENCY = int(os.getenv("AUTOCUTTER_LLM_CONCURRENCY", "8"))
+
+
+class LLMError(Exception):
+    """Falha em uma chamada ao LLM"""
+
+    def __init__(self, message, status=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Balde de fichas: `capacity` fichas, repostas continuamente a `rate` por segundo"""
+
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Segundos até haver `amount` fichas (0 se já houver)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Limite de requisições/min (RPM) e tokens/min (TPM) de um (provedor, modelo)"""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.request_bucket = TokenBucket(rpm, rpm / 60) if rpm else None
+        self.token_bucket = TokenBucket(tpm, tpm / 60) if tpm else None
+        self._lock = None
+
+    async def acquire(self, tokens):
+        """Espera até a requisição caber nos dois limites; retorna o tempo de espera"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self.request_bucket.wait_time(1, now) if self.request_bucket else 0.0,
+                    self.token_bucket.wait_time(tokens, now) if self.token_bucket else 0.0,
+                )
+                if wait <= 0:
+                    if self.request_bucket:
+                        self.request_bucket.consume(1)
+                    if self.token_bucket:
+                        self.token_bucket.consume(tokens)
+                    return waited
+                await asyncio.sleep(wait)
+                waited += wait
+
+
+class FairQueue:
+    """Fila com rodízio entre jobs: cada job tem sua fila e os jobs são atendidos em turnos"""
+
+    def __init__(self):
+        self._queues = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def put(self, job_id, item):
+        self._queues.setdefault(job_id, deque()).append(item)
+        self._ready.set()
+
+    async def get(self):
+        while not self._queues:
+            self._ready.clear()
+            await self._ready.wait()
+
+        job_id, items = self._queues.popitem(last=False)
+        item = items.popleft()
+        if items:
+            # O job volta para o fim da fila de turnos
+            self._queues[job_id] = items
+        return item
+
+    def pending(self):
+        return sum(len(items) for items in self._queues.values())
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Backoff exponencial com jitter: metade fixa, metade aleatória"""
+    cap = min(max_delay, base_delay * (2 ** attempt))
+    return cap / 2 + random.uniform(0, cap / 2)
+
+
+_STREAM_END = object()
+
+
+def estimate_timeout(provider, prompt, max_tokens=None):
+    """Tempo limite (s) da requisição: fixo na nuvem, proporcional ao prompt em servidores locais"""
+    profile = TIMEOUT_PROFILES.get(provider)
+    if not profile:
+        return DEFAULT_TIMEOUT
+    base, prefill_tps, decode_tps = profile
+    return base + estimate_tokens(prompt) / prefill_tps + (max_tokens or DEFAULT_OUTPUT_TOKENS) / decode_tps
+
+
+def _extract_text(wire, data, delta=False):
+    """Texto de uma resposta (ou de um evento de streaming) no protocolo `wire`"""
+    if wire == "gemini":
+        parts = data["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+    choice = data["choices"][0]
+    if delta:
+        return choice.get("delta", {}).get("content") or ""
+    return choice["message"]["content"]
+
+
+def _parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Cliente compartilhado; use get_client() para a instância do processo"""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limits = dict(DEFAULT_LIMITS)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._limiters = {}
+        self.concurrency = dict(PROVIDER_CONCURRENCY)
+        self._slots = {}
+        self._loop = None
+        self._queue = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "rate_limit_wait_s": 0.0}
+
+    # --- Configuração -------------------------------------------------------
+
+    def set_limits(self, provider, model, rpm=None, tpm=None):
+        """Define os limites de um (provedor, modelo); None desativa o limite correspondente"""
+        self.limits[(provider, model)] = (rpm, tpm)
+        self._limiters.pop((provider, model), None)
+
+    def set_concurrency(self, provider, slots=None):
+        """Limita as requisições simultâneas a um provedor (None = só o limite global)"""
+        self.concurrency[provider] = slots
+        self._slots.pop(provider, None)
+
+    def _provider_slots(self, provider):
+        slots = self.concurrency.get(provider)
+        if not slots:
+            return None
+        if provider not in self._slots:
+            self._slots[provider] = asyncio.Semaphore(slots)
+        return self._slots[provider]
+
+    def _limiter(self, provider, model):
+        key = (provider, model)
+        if key not in self._limiters:
+            rpm, tpm = self.limits.get(key) or PROVIDER_LIMITS.get(provider, (None, None))
+            self._limiters[key] = RateLimiter(rpm, tpm)
+        return self._limiters[key]
+
+    # --- Laço de eventos em segundo plano -----------------------------------
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._queue = FairQueue()
+                for _ in range(self.max_concurrency):
+                    loop.create_task(self._worker())
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="llm-client", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    async def _worker(self):
+        while True:
+            request = await self._queue.get()
+            if request["future"].cancelled():
+                continue
+            try:
+                result = await self._execute(request)
+            except Exception as e:
+                if not request["future"].cancelled():
+                    request["future"].set_exception(e)
+            else:
+                if not request["future"].cancelled():
+                    request["future"].set_result(result)
+
+    async def _submit(self, request):
+        request["future"] = asyncio.get_running_loop().create_future()
+        self._queue.put(request["job_id"], request)
+        return await request["future"]
+
+    # --- Execução ------------------------------------------------------------
+
+    async def _execute(self, request):
+        limiter = self._limiter(request["provider"], request["model"])
+        tokens = estimate_tokens(request["prompt"]) + int(request["params"].get("max_tokens", 0) or 0)
+
+        for attempt in range(self.max_retries + 1):
+            waited = await limiter.acquire(tokens)
+            with self._stats_lock:
+                self._stats["requests"] += 1
+                self._stats["rate_limit_wait_s"] += waited
+            try:
+                return await self._send(request)
+            except LLMError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    with self._stats_lock:
+                        self._stats["failures"] += 1
+                    raise
+                delay = e.retry_after if e.retry_after is not None else backoff_delay(
+                    attempt, self.base_delay, self.max_delay)
+                with self._stats_lock:
+                    self._stats["retries"] += 1
+                print(f"⏳ {request['provider']}/{request['model']}: {e} - nova tentativa em {delay:.1f}s "
+                      f"({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+    async def _send(self, request):
+        slots = self._provider_slots(request["provider"])
+        if slots is None:
+            return await asyncio.to_thread(self._post, request)
+        async with slots:
+            return await asyncio.to_thread(self._post, request)
+
+    def _post(self, request):
+        """Faz a requisição HTTP (em uma thread) e devolve o texto da resposta
+
+        Com `on_chunk` a geração é em streaming (SSE): cada pedaço de texto é
+        entregue assim que chega e o texto completo é devolvido no final.
+        """
+        provider = request["provider"]
+        wire = WIRE_FORMATS.get(provider)
+        base_url = (request["base_url"] or DEFAULT_BASE_URLS.get(provider, "")).rstrip("/")
+        streaming = request["on_chunk"] is not None
+
+        if wire == "gemini":
+            if streaming:
+                url = f"{base_url}/v1beta/models/{request['model']}:streamGenerateContent?alt=sse"
+            else:
+                url = f"{base_url}/v1beta/models/{request['model']}:generateContent"
+            headers = {"Content-Type": "application/json"}
+            if request["api_key"]:
+                headers["x-goog-api-key"] = request["api_key"]
+            payload = {"contents": [{"role": "user", "parts": [{"text": request["prompt"]}]}]}
+            if request["params"]:
+                payload["generationConfig"] = request["params"]
+        elif wire == "openai":
+            url = f"{base_url}/v1/chat/completions"
+            headers = {"Content-Type": "application/json"}
+            if request["api_key"]:
+                headers["Authorization"] = f"Bearer {request['api_key']}"
+            payload = {"model": request["model"], "messages": [{"role": "user", "content": request["prompt"]}]}
+            payload.update(request["params"])
+            if streaming:
+                payload["stream"] = True
+        else:
+            raise LLMError(f"Provedor de LLM desconhecido: {provider}")
+
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=request["timeout"],
+                                         stream=streaming)
+        except requests.RequestException as e:
+            raise LLMError(f"erro de conexão: {e}", retryable=True)
+
+        if response.status_code in RETRY_STATUS:
+            raise LLMError(f"HTTP {response.status_code}", status=response.status_code, retryable=True,
+                           retry_after=_parse_retry_after(response.headers.get("Retry-After")))
+        if response.status_code >= 400:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:300]}", status=response.status_code)
+
+        if streaming:
+            return self._read_stream(wire, response, request["on_chunk"])
+
+        try:
+            return _extract_text(wire, response.json())
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise LLMError(f"Resposta inesperada do {provider}: {response.text[:300]}")
+
+    def _read_stream(self, wire, response, on_chunk):
+        """Lê os eventos SSE (`data: {...}`) e entrega o texto de cada um"""
+        response.encoding = "utf-8"
+        pieces = []
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                    text = _extract_text(wire, event, delta=True)
+                except (ValueError, KeyError, IndexError, TypeError):
+                    continue
+                if text:
+                    pieces.append(text)
+                    on_chunk(text)
+        except requests.RequestException as e:
+            # Corpo truncado (ChunkedEncodingError), queda ou tempo esgotado; se parte do
+            # texto já foi entregue, repetir a requisição duplicaria a saída
+            raise LLMError(f"conexão interrompida durante o streaming: {e}", retryable=not pieces)
+        finally:
+            response.close()
+        return "".join(pieces)
+
+    # --- API pública --------------------------------------------------------
+
+    def _request(self, provider, model, prompt, api_key, params, job_id, timeout, base_url, on_chunk=None):
+        return {
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "api_key": api_key,
+            "params": dict(params or {}),
+            "job_id": job_id,
+            "timeout": timeout or estimate_timeout(provider, prompt, (params or {}).get("max_tokens")),
+            "base_url": base_url,
+            "on_chunk": on_chunk,
+        }
+
+    def complete(self, provider, model, prompt, api_key=None, params=None, job_id=None, timeout=None,
+                 base_url=None):
+        """Envia o prompt e bloqueia até a resposta (texto); levanta LLMError em caso de falha"""
+        self._ensure_loop()
+        request = self._request(provider, model, prompt, api_key, params, job_id, timeout, base_url)
+        return asyncio.run_coroutine_threadsafe(self._submit(request), self._loop).result()
+
+    async def complete_async(self, provider, model, prompt, api_key=None, params=None, job_id=None,
+                             timeout=None, base_url=None):
+        """Versão assíncrona de complete(), para uso a partir de outro laço de eventos"""
+        self._ensure_loop()
+        request = self._request(provider, model, prompt, api_key, params, job_id, timeout, base_url)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._submit(request), self._loop))
+
+    def stream(self, provider, model, prompt, api_key=None, params=None, job_id=None, timeout=None,
+               base_url=None):
+        """Geração em streaming: gera os pedaços de texto conforme chegam
+
+        Passa pela mesma fila, limite e novas tentativas de complete(); só
+        tenta de novo enquanto nenhum pedaço foi entregue.
+        """
+        self._ensure_loop()
+        chunks = queue.Queue()
+        request = self._request(provider, model, prompt, api_key, params, job_id, timeout, base_url,
+                                on_chunk=chunks.put)
+        future = asyncio.run_coroutine_threadsafe(self._submit(request), self._loop)
+        future.add_done_callback(lambda _: chunks.put(_STREAM_END))
+        while True:
+            chunk = chunks.get()
+            if chunk is _STREAM_END:
+                break
+            yield chunk
+        future.result()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["rate_limit_wait_s"] = round(stats["rate_limit_wait_s"], 2)
+        return stats
+
+    def format_stats(self):
+        """Resumo das estatísticas em uma linha, para logs"""
+        s = self.stats()
+        return (f"Cliente LLM: {s['requests']} requisições, {s['retries']} novas tentativas, "
+                f"{s['failures']} falhas, {s['rate_limit_wait_s']:.1f}s aguardando o limite")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Retorna o cliente global do processo, criando-o na primeira chamada"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
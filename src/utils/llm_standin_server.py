@@ -0,0 +1,276 @@
+"""
+Servidor local que imita as APIs do Gemini e da OpenAI (para testes e benchmarks offline)
+
+Atende `POST /v1beta/models/<modelo>:generateContent`,
+`:streamGenerateContent?alt=sse` e `POST /v1/chat/completions` (com ou sem
+`stream`), com latência configurável, injeção de erros (429, 500 e JSON
+truncado) e clipes determinísticos tirados dos carimbos de tempo do prompt.
+`GET /stats` devolve os contadores do servidor.
+
+Uso:
+    python src/utils/llm_standin_server.py --port 8089 --latency-ms 400 --rate-429 0.1
+    python src/processing/generateClips.py video.mp4 --llm-base-url http://127.0.0.1:8089
+
+Na GUI, informe o endereço em "URL da API" (ou use
+AUTOCUTTER_OPENAI_BASE_URL=http://127.0.0.1:8089).
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "rate_429": 0.0,
+    "rate_500": 0.0,
+    "rate_truncate": 0.0,
+    "retry_after": 1,
+    "chunk_chars": 40,
+    "seed": 0,
+}
+
+# "[754-781] texto" (transcrição compacta) ou "[12:34 - 13:01] texto" (formato antigo)
+_COMPACT_RE = re.compile(r"^\[(\d+)-(\d+)\]\s*(.*)$", re.MULTILINE)
+_LEGACY_RE = re.compile(r"^\[(\d+):(\d+)\s*-\s*(\d+):(\d+)\]\s*(.*)$", re.MULTILINE)
+# Candidatos do prompt de redução ("start": "mm:ss")
+_CANDIDATE_RE = re.compile(r'"start":\s*"(\d+):(\d+)",\s*"end":\s*"(\d+):(\d+)"')
+
+DEFAULT_CLIP_SECONDS = 45
+DEFAULT_CLIPS = 3
+WORDS_PER_SECOND = 2.5
+
+
+def _mmss(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def prompt_units(prompt):
+    """Trechos (início, fim, texto) encontrados no prompt"""
+    units = [(int(s), int(e), t) for s, e, t in _COMPACT_RE.findall(prompt)]
+    if not units:
+        units = [(int(sm) * 60 + int(ss), int(em) * 60 + int(es), t)
+                 for sm, ss, em, es, t in _LEGACY_RE.findall(prompt)]
+    if not units:
+        units = [(int(sm) * 60 + int(ss), int(em) * 60 + int(es), "")
+                 for sm, ss, em, es in _CANDIDATE_RE.findall(prompt)]
+    return units
+
+
+def requested_clips(prompt):
+    """Número de clipes pedido no prompt ("entre X e Y clipes", "no máximo N clips", "até N momentos")"""
+    match = re.search(r"entre\s+(\d+)\s+e\s+(\d+)\s+clip", prompt)
+    if match:
+        return int(match.group(2))
+    match = re.search(r"(?:no máximo|até)\s+(\d+)\s+(?:clips|momentos)", prompt)
+    if match:
+        return int(match.group(1))
+    return DEFAULT_CLIPS
+
+
+def deterministic_clips(prompt):
+    """Clipes derivados do prompt: sempre os mesmos para o mesmo prompt
+
+    Prompts com carimbos de tempo recebem o esquema do CLI (`start`/`end` em
+    mm:ss); prompts sem tempos (texto corrido) recebem `start_time`/`end_time`
+    em segundos, estimados pelo número de palavras.
+    """
+    match = re.search(r"no máximo\s+(\d+)\s+segundos", prompt)
+    clip_seconds = int(match.group(1)) if match else DEFAULT_CLIP_SECONDS
+    count = requested_clips(prompt)
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+
+    units = prompt_units(prompt)
+    if not units:
+        duration = max(clip_seconds, int(len(prompt.split()) / WORDS_PER_SECOND))
+        slots = range(0, duration - clip_seconds + 1, clip_seconds)
+        starts = sorted(rng.sample(slots, min(count, len(slots))))
+        return {"clips": [{"start_time": start, "end_time": start + clip_seconds, "title": f"Clipe {i + 1}"}
+                          for i, start in enumerate(starts)]}
+
+    last_end = max(end for _, end, _ in units)
+    picks = sorted(rng.sample(range(len(units)), min(count, len(units))))
+    clips = []
+    previous_end = -1
+    for index in picks:
+        start, _, text = units[index]
+        if start < previous_end:
+            continue
+        end = min(last_end, start + clip_seconds)
+        # Termina no fim do último trecho que cabe no clipe
+        fitting = [unit_end for unit_start, unit_end, _ in units[index:] if unit_end <= end]
+        end = max(fitting) if fitting else end
+        clips.append({"start": _mmss(start), "end": _mmss(end),
+                      "caption": (text or f"Momento em {_mmss(start)}")[:80]})
+        if '"score"' in prompt:
+            clips[-1]["score"] = rng.randint(0, 100)
+        previous_end = end
+    return {"clips": clips}
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Servidor HTTP com a configuração e os contadores compartilhados entre as requisições"""
+
+    daemon_threads = True
+
+    def __init__(self, address, **config):
+        super().__init__(address, _Handler)
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "ok": 0, "429": 0, "500": 0, "truncated": 0, "streamed": 0}
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def draw_fault(self):
+        """Sorteia a falha desta requisição (None, "429", "500" ou "truncated")"""
+        with self.lock:
+            self.counters["requests"] += 1
+            roll = self.rng.random()
+            jitter = self.rng.uniform(0, self.config["jitter_ms"])
+        delay = (self.config["latency_ms"] + jitter) / 1000
+        for fault in ("429", "500", "truncated"):
+            rate = self.config["rate_" + ("truncate" if fault == "truncated" else fault)]
+            if roll < rate:
+                return fault, delay
+            roll -= rate
+        return None, delay
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.lock:
+                self._send_json(200, dict(self.server.counters))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        if ":generateContent" in self.path or ":streamGenerateContent" in self.path:
+            provider = "gemini"
+            streaming = ":streamGenerateContent" in self.path
+            try:
+                prompt = "".join(part.get("text", "") for part in body["contents"][0]["parts"])
+            except (KeyError, IndexError, TypeError):
+                self._send_json(400, {"error": "missing contents"})
+                return
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            provider = "openai"
+            streaming = bool(body.get("stream"))
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        fault, delay = self.server.draw_fault()
+        time.sleep(delay)
+        if fault in ("429", "500"):
+            self.server.count(fault)
+            headers = {"Retry-After": str(self.server.config["retry_after"])} if fault == "429" else None
+            self._send_json(int(fault), {"error": {"code": int(fault), "message": "injected"}}, headers)
+            return
+
+        text = json.dumps(deterministic_clips(prompt), ensure_ascii=False, indent=2)
+        if fault == "truncated":
+            self.server.count("truncated")
+            text = text[:int(len(text) * 0.7)]
+        else:
+            self.server.count("ok")
+
+        if streaming:
+            self.server.count("streamed")
+            self._send_stream(provider, text)
+        elif provider == "gemini":
+            self._send_json(200, {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]})
+        else:
+            self._send_json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}}]})
+
+    def _send_stream(self, provider, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        size = self.server.config["chunk_chars"]
+        for i in range(0, len(text), size):
+            piece = text[i:i + size]
+            if provider == "gemini":
+                event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            else:
+                event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        if provider == "openai":
+            self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def start_server(host="127.0.0.1", port=0, **config):
+    """Inicia o servidor em uma thread de fundo; retorna o servidor (use .base_url e .shutdown())"""
+    server = StandinServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, name="llm-standin", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita as APIs do Gemini e da OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latência fixa de cada resposta (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Latência aleatória adicional (ms)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração das requisições respondidas com 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Fração das requisições respondidas com 500")
+    parser.add_argument("--rate-truncate", type=float, default=0.0,
+                        help="Fração das respostas com o JSON cortado no meio")
+    parser.add_argument("--retry-after", type=float, default=1, help="Valor do cabeçalho Retry-After nos 429 (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do sorteio de latência e falhas")
+    args = parser.parse_args()
+
+    server = StandinServer((args.host, args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           rate_429=args.rate_429, rate_500=args.rate_500, rate_truncate=args.rate_truncate,
+                           retry_after=args.retry_after, seed=args.seed)
+    print(f"🧪 Servidor LLM local em {server.base_url} (Ctrl+C para sair)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
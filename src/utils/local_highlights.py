@@ -0,0 +1,302 @@
+"""
+Seleção local de destaques (sem rede)
+
+Substitui o LLM quando não há chave de API, quando a chamada falha ou com
+`--engine local`. Calcula com NumPy uma pontuação por segundo do vídeo a
+partir de:
+
+- ritmo de fala (palavras por segundo, pelos tempos das palavras do Whisper)
+- volume (RMS) e variação do volume dentro de cada segundo
+- variação de entonação (desvio da altura da voz, por autocorrelação)
+- novidade (TF-IDF das palavras que não apareceram nos últimos minutos)
+- densidade de perguntas e exclamações
+
+e escolhe janelas sem sobreposição com a maior média (máximo da soma em
+janela deslizante). Retorna o mesmo esquema `{"clips": [...]}` do LLM.
+"""
+
+import math
+import re
+import time
+
+import numpy as np
+
+from transcript_encoder import STOPWORDS
+from clip_selection import format_time, select_for_duration
+
+SAMPLE_RATE = 16000
+
+FEATURES = ("speech_rate", "loudness", "loudness_var", "pitch_var", "novelty", "punctuation")
+
+DEFAULT_WEIGHTS = {
+    "speech_rate": 1.0,
+    "loudness": 0.75,
+    "loudness_var": 0.75,
+    "pitch_var": 1.0,
+    "novelty": 1.5,
+    "punctuation": 1.0,
+}
+
+FEATURE_LABELS = {
+    "speech_rate": "ritmo de fala acelerado",
+    "loudness": "volume alto",
+    "loudness_var": "variação de volume",
+    "pitch_var": "entonação expressiva",
+    "novelty": "assunto novo",
+    "punctuation": "perguntas e exclamações",
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+# Quadros de 50 ms: 20 por segundo
+FRAMES_PER_SECOND = 20
+# Altura da voz procurada entre 80 e 400 Hz (autocorrelação a 8 kHz)
+PITCH_RATE = 8000
+MIN_PITCH_HZ = 80
+MAX_PITCH_HZ = 400
+VOICED_THRESHOLD = 0.35
+
+
+def _spread(values, starts, ends, amounts):
+    """Distribui cada quantidade uniformemente entre os segundos [início, fim) (array de diferenças)"""
+    n = len(values)
+    diff = np.zeros(n + 1)
+    for start, end, amount in zip(starts, ends, amounts):
+        s = min(int(start), n - 1)
+        e = min(max(int(math.ceil(end)), s + 1), n)
+        diff[s] += amount / (e - s)
+        diff[e] -= amount / (e - s)
+    values += np.cumsum(diff[:-1])
+    return values
+
+
+def text_features(segments, n_seconds, novelty_window=120):
+    """Características por segundo vindas da transcrição"""
+    speech_rate = np.zeros(n_seconds)
+    punctuation = np.zeros(n_seconds)
+    novelty = np.zeros(n_seconds)
+    speech = np.zeros(n_seconds, dtype=bool)
+
+    word_starts = []
+    spread_starts, spread_ends, spread_counts = [], [], []
+    tokens_per_segment = []
+    for segment in segments:
+        start, end = segment["start"], max(segment["end"], segment["start"] + 0.01)
+        speech[min(int(start), n_seconds - 1):min(int(math.ceil(end)), n_seconds)] = True
+        words = segment.get("words") or []
+        if words:
+            word_starts.extend(word["start"] for word in words)
+        else:
+            spread_starts.append(start)
+            spread_ends.append(end)
+            spread_counts.append(len(segment["text"].split()))
+        tokens_per_segment.append([w for w in (w.lower() for w in _WORD_RE.findall(segment["text"]))
+                                   if len(w) > 3 and w not in STOPWORDS])
+
+    if word_starts:
+        np.add.at(speech_rate, np.clip(np.array(word_starts, dtype=int), 0, n_seconds - 1), 1)
+    if spread_counts:
+        _spread(speech_rate, spread_starts, spread_ends, spread_counts)
+
+    starts = [s["start"] for s in segments]
+    ends = [max(s["end"], s["start"] + 0.01) for s in segments]
+    _spread(punctuation, starts, ends, [s["text"].count("?") + s["text"].count("!") for s in segments])
+
+    # IDF pelos segmentos; a novidade soma o IDF das palavras ausentes na janela anterior
+    document_frequency = {}
+    for tokens in tokens_per_segment:
+        for word in set(tokens):
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    n_docs = len(segments)
+    last_seen = {}
+    scores = []
+    for segment, tokens in zip(segments, tokens_per_segment):
+        score = 0.0
+        for word in set(tokens):
+            seen = last_seen.get(word)
+            if seen is None or segment["start"] - seen > novelty_window:
+                score += math.log(n_docs / document_frequency[word])
+            last_seen[word] = segment["end"]
+        scores.append(score)
+    _spread(novelty, starts, ends, scores)
+
+    return {"speech_rate": speech_rate, "punctuation": punctuation, "novelty": novelty}, speech
+
+
+def audio_features(audio, n_seconds, sample_rate=SAMPLE_RATE, block_seconds=300):
+    """Volume, variação de volume e variação de entonação por segundo"""
+    frame = sample_rate // FRAMES_PER_SECOND
+    n = min(n_seconds, len(audio) // sample_rate)
+    loudness = np.zeros(n_seconds)
+    loudness_var = np.zeros(n_seconds)
+    pitch_var = np.zeros(n_seconds)
+    if n == 0:
+        return {"loudness": loudness, "loudness_var": loudness_var, "pitch_var": pitch_var}
+
+    decimate = max(1, sample_rate // PITCH_RATE)
+    pitch_rate = sample_rate / decimate
+    pitch_frame = frame // decimate
+    n_fft = 1 << (2 * pitch_frame - 1).bit_length()
+    min_lag = int(pitch_rate / MAX_PITCH_HZ)
+    max_lag = int(pitch_rate / MIN_PITCH_HZ)
+
+    for block_start in range(0, n, block_seconds):
+        block_end = min(n, block_start + block_seconds)
+        x = np.asarray(audio[block_start * sample_rate:block_end * sample_rate], dtype=np.float32)
+        frames = x.reshape(-1, frame)
+
+        rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+        frame_db = (20 * np.log10(rms)).reshape(-1, FRAMES_PER_SECOND)
+        loudness[block_start:block_end] = 20 * np.log10(rms.reshape(-1, FRAMES_PER_SECOND).mean(axis=1))
+        loudness_var[block_start:block_end] = frame_db.std(axis=1)
+
+        # Autocorrelação de cada quadro via FFT, no sinal reduzido para ~8 kHz
+        low = frames.reshape(len(frames), pitch_frame, decimate).mean(axis=2)
+        low = low - low.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(low, n=n_fft, axis=1)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n=n_fft, axis=1)
+        energy = autocorr[:, 0] + 1e-12
+        lags = autocorr[:, min_lag:max_lag + 1]
+        best = lags.argmax(axis=1)
+        strength = lags[np.arange(len(best)), best] / energy
+        voiced = (strength > VOICED_THRESHOLD) & (frame_db.ravel() > np.median(frame_db) - 10)
+        semitones = 12 * np.log2(pitch_rate / (best + min_lag))
+
+        # Desvio padrão da altura (em semitons) só entre os quadros com voz
+        voiced = voiced.reshape(-1, FRAMES_PER_SECOND)
+        semitones = np.where(voiced, semitones.reshape(-1, FRAMES_PER_SECOND), 0.0)
+        count = voiced.sum(axis=1)
+        mean = semitones.sum(axis=1) / np.maximum(count, 1)
+        variance = (semitones ** 2).sum(axis=1) / np.maximum(count, 1) - mean ** 2
+        pitch_var[block_start:block_end] = np.where(count >= 3, np.sqrt(np.maximum(variance, 0)), 0.0)
+
+    return {"loudness": loudness, "loudness_var": loudness_var, "pitch_var": pitch_var}
+
+
+def robust_zscore(values, mask=None):
+    """Padroniza pela mediana e pelo desvio absoluto mediano, limitado a ±3"""
+    reference = values[mask] if mask is not None and mask.any() else values
+    median = np.median(reference)
+    spread = 1.4826 * np.median(np.abs(reference - median))
+    if spread < 1e-9:
+        spread = reference.std()
+    if spread < 1e-9:
+        return np.zeros_like(values, dtype=float)
+    return np.clip((values - median) / spread, -3, 3)
+
+
+def score_seconds(features, speech, weights=None):
+    """Soma ponderada das características padronizadas; segundos sem fala recebem a menor nota"""
+    weights = weights or DEFAULT_WEIGHTS
+    normalized = {name: robust_zscore(values, speech) for name, values in features.items()}
+    score = np.zeros(len(speech))
+    for name, values in normalized.items():
+        score += weights.get(name, 0) * values
+    if speech.any():
+        score[~speech] = score.min() - 1
+    return score, normalized
+
+
+def select_windows(score, window_seconds, count):
+    """Escolhe até `count` janelas sem sobreposição com a maior soma de pontuação
+
+    Retorna [(início, fim, média)] em ordem cronológica.
+    """
+    n = len(score)
+    window = max(1, min(int(window_seconds), n))
+    cumulative = np.concatenate(([0.0], np.cumsum(score)))
+    sums = cumulative[window:] - cumulative[:-window]
+
+    picks = []
+    available = sums.copy()
+    for _ in range(count):
+        i = int(np.argmax(available))
+        if not np.isfinite(available[i]):
+            break
+        picks.append((i, i + window, float(sums[i] / window)))
+        # Nenhuma janela que cruze a escolhida pode ser escolhida depois
+        available[max(0, i - window + 1):i + window] = -np.inf
+    return sorted(picks)
+
+
+def snap_to_segments(windows, segments, tolerance=3.0):
+    """Ajusta início/fim para as bordas dos segmentos mais próximos, sem criar sobreposição"""
+    starts = np.array([s["start"] for s in segments])
+    ends = np.array([s["end"] for s in segments])
+    snapped = []
+    previous_end = 0.0
+    for start, end, score in windows:
+        i = int(np.argmin(np.abs(starts - start)))
+        if abs(starts[i] - start) <= tolerance:
+            start = starts[i]
+        j = int(np.argmin(np.abs(ends - end)))
+        if abs(ends[j] - end) <= tolerance:
+            end = ends[j]
+        start = max(start, previous_end)
+        if end > start:
+            snapped.append((float(start), float(end), score))
+            previous_end = end
+    return snapped
+
+
+def _weighted_mean(values, name, weights=None):
+    """Contribuição média de uma característica em um trecho"""
+    return (weights or DEFAULT_WEIGHTS).get(name, 0) * float(values.mean()) if len(values) else 0.0
+
+
+def find_highlights(segments, audio=None, sample_rate=SAMPLE_RATE, clip_seconds=45, max_clips=8, mode="clips",
+                    target_duration=None, weights=None, min_gap_seconds=0.0):
+    """Seleciona os trechos mais marcantes do vídeo sem chamar o LLM
+
+    No modo "summary" são pontuados o dobro dos trechos necessários e a
+    mochila de `select_for_duration` escolhe os que cabem em `target_duration`
+    minutos.
+    Retorna {"clips": [...], "local_engine": estatísticas}.
+    """
+    started = time.perf_counter()
+    segments = [s for s in segments if s["text"].strip()]
+    if not segments:
+        return {"clips": []}
+
+    n_seconds = int(math.ceil(max(s["end"] for s in segments))) + 1
+    features, speech = text_features(segments, n_seconds)
+    if audio is not None and len(audio) >= sample_rate:
+        features.update(audio_features(audio, n_seconds, sample_rate))
+
+    if mode == "summary" and target_duration:
+        count = 2 * max(1, round(target_duration * 60 / clip_seconds))
+    else:
+        count = max_clips
+    score, normalized = score_seconds(features, speech, weights)
+    windows = snap_to_segments(select_windows(score, clip_seconds, count), segments)
+
+    ranking = sorted(range(len(windows)), key=lambda k: -windows[k][2])
+    clips = []
+    for k, (start, end, window_score) in enumerate(windows):
+        s, e = int(start), max(int(start) + 1, int(math.ceil(end)))
+        contributions = {name: _weighted_mean(values[s:e], name, weights) for name, values in normalized.items()}
+        top = [name for name in sorted(contributions, key=lambda name: -contributions[name])[:2]
+               if contributions[name] > 0]
+        text = " ".join(seg["text"].strip() for seg in segments if seg["end"] > start and seg["start"] < end)
+        rank = ranking.index(k)
+        clips.append({
+            "start": format_time(start),
+            "end": format_time(end),
+            "caption": text[:100] + "..." if len(text) > 100 else text,
+            "importance": "alta" if rank < len(windows) / 3 else "média" if rank < 2 * len(windows) / 3 else "baixa",
+            "reason": ("Destaque local: " + " e ".join(FEATURE_LABELS[name] for name in top)
+                       if top else "Trecho representativo do vídeo"),
+            "score": round(window_score, 3),
+        })
+
+    if mode == "summary" and target_duration:
+        clips, _ = select_for_duration(clips, target_duration * 60, min_gap_seconds)
+
+    return {
+        "clips": clips,
+        "local_engine": {
+            "features": sorted(features),
+            "seconds": n_seconds,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        },
+    }
@@ -0,0 +1,238 @@
+"""
+Informações de mídia (duração, streams, codecs) com cache em memória e em disco
+
+Cada etapa precisava de um fato diferente sobre o mesmo arquivo (duração
+para validar os clipes, resolução para reenquadrar, codec para decidir entre
+copiar e reencodar) e cada um custava um processo. Aqui um único
+`ffprobe -show_streams -show_format` por arquivo responde tudo; sem ffprobe,
+a listagem de `ffmpeg -i` é lida no lugar. O resultado fica em memória e no
+cache em disco, com chave caminho + tamanho + mtime.
+
+Também pode ser usado pela linha de comando (scripts `converter-*.sh`):
+
+    python media_probe.py video.mp4 width height   # imprime "1920 1080"
+    python media_probe.py video.mp4                 # imprime o JSON completo
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import threading
+
+from disk_cache import DiskCache, default_cache_root, hash_key
+
+DEFAULT_MAX_SIZE_MB = int(os.getenv("AUTOCUTTER_PROBE_CACHE_MB", "16"))
+# Muda quando o formato do resultado muda (invalida as entradas antigas)
+FORMAT_VERSION = 1
+
+_CHANNELS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "4.0": 4, "5.0": 5, "5.1": 6, "6.1": 7, "7.1": 8}
+
+
+def _number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value):
+    """"30000/1001" -> 29.97 (None se não houver)"""
+    num, _, den = str(value or "").partition("/")
+    num, den = _number(num), _number(den or 1)
+    return round(num / den, 3) if num and den else None
+
+
+def _probe_ffprobe(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_streams", "-show_format", "-of", "json", path],
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ffprobe saiu com código {result.returncode}")
+    data = json.loads(result.stdout or "{}")
+    fmt = data.get("format", {})
+    streams = []
+    for s in data.get("streams", []):
+        streams.append({
+            "index": s.get("index"),
+            "type": s.get("codec_type"),
+            "codec": s.get("codec_name"),
+            "width": s.get("width"),
+            "height": s.get("height"),
+            "pix_fmt": s.get("pix_fmt"),
+            "fps": _rate(s.get("avg_frame_rate")) or _rate(s.get("r_frame_rate")),
+            "sample_rate": _number(s.get("sample_rate"), int),
+            "channels": s.get("channels"),
+        })
+    return {
+        "duration": _number(fmt.get("duration")),
+        "start": _number(fmt.get("start_time")) or 0.0,
+        "format": fmt.get("format_name"),
+        "bit_rate": _number(fmt.get("bit_rate"), int),
+        "streams": streams,
+    }
+
+
+def _split_top_level(text):
+    """Divide por vírgulas fora de parênteses ("yuv420p(tv, bt709), 1920x1080" -> 2 partes)"""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    return parts + [current.strip()]
+
+
+def parse_ffmpeg_listing(stderr):
+    """Mesmas informações lidas da listagem que o `ffmpeg -i` imprime (quando não há ffprobe)"""
+    header = re.search(r"Input #0, (\S+), from", stderr)
+    if not header:
+        raise RuntimeError(stderr.strip()[-500:] or "listagem do ffmpeg sem entrada")
+    info = {"duration": None, "start": 0.0, "format": header.group(1).rstrip(","), "bit_rate": None,
+            "streams": []}
+    match = re.search(r"Duration: (\d+):(\d+):([\d.]+)", stderr)
+    if match:
+        h, m, s = match.groups()
+        info["duration"] = int(h) * 3600 + int(m) * 60 + float(s)
+    match = re.search(r"start: (-?[\d.]+)", stderr)
+    if match:
+        info["start"] = float(match.group(1))
+    match = re.search(r"bitrate: (\d+) kb/s", stderr)
+    if match:
+        info["bit_rate"] = int(match.group(1)) * 1000
+
+    for index, kind, rest in re.findall(r"Stream #0:(\d+)[^:]*: (\w+): (.*)", stderr):
+        fields = _split_top_level(rest)
+        stream = {"index": int(index), "type": kind.lower(), "codec": fields[0].split()[0], "width": None,
+                  "height": None, "pix_fmt": None, "fps": None, "sample_rate": None, "channels": None}
+        if stream["type"] == "video":
+            stream["pix_fmt"] = fields[1].split("(")[0] if len(fields) > 1 else None
+            size = re.search(r"\b(\d{2,5})x(\d{2,5})\b", rest)
+            if size:
+                stream["width"], stream["height"] = int(size.group(1)), int(size.group(2))
+            fps = re.search(r"([\d.]+) fps", rest)
+            stream["fps"] = float(fps.group(1)) if fps else None
+        elif stream["type"] == "audio":
+            rate = re.search(r"(\d+) Hz", rest)
+            stream["sample_rate"] = int(rate.group(1)) if rate else None
+            layout = fields[2].split("(")[0] if len(fields) > 2 else ""
+            stream["channels"] = _CHANNELS.get(layout) or _number(layout.split()[0] if layout else None, int)
+        info["streams"].append(stream)
+    return info
+
+
+def run_probe(path):
+    """Executa a sondagem (sem cache); levanta RuntimeError se o arquivo não puder ser lido"""
+    if shutil.which("ffprobe"):
+        return _probe_ffprobe(path)
+    return parse_ffmpeg_listing(subprocess.run(["ffmpeg", "-hide_banner", "-i", path], capture_output=True,
+                                               text=True, timeout=60).stderr)
+
+
+class MediaProbe:
+    """Sondagem com cache: uma execução do ffprobe por arquivo (caminho + tamanho + mtime)"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache = DiskCache(cache_dir or os.path.join(default_cache_root(), "probe"), max_size_mb=max_size_mb)
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.probes = 0
+
+    def probe(self, path):
+        """Informações do arquivo: duration, start, format, bit_rate e streams"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = hash_key("probe", FORMAT_VERSION, path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        info = self.cache.get(key)
+        if info is None:
+            info = run_probe(path)
+            self.probes += 1
+            try:
+                self.cache.put(key, info)
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar a sondagem em cache: {e}")
+        with self._lock:
+            self._memory[key] = info
+        return info
+
+
+_default_probe = None
+_default_lock = threading.Lock()
+
+
+def default_probe():
+    """Instância compartilhada pelos módulos (um cache em memória por processo)"""
+    global _default_probe
+    with _default_lock:
+        if _default_probe is None:
+            _default_probe = MediaProbe()
+        return _default_probe
+
+
+def probe(path):
+    return default_probe().probe(path)
+
+
+def first_stream(info, kind):
+    """Primeiro stream do tipo ("video", "audio"...) ou None"""
+    return next((s for s in info["streams"] if s["type"] == kind), None)
+
+
+def duration(path):
+    """Duração do arquivo em segundos (None se não for possível obter)"""
+    try:
+        return probe(path)["duration"]
+    except (OSError, RuntimeError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def has_audio(path):
+    """Se o arquivo tem faixa de áudio (na dúvida, True)"""
+    try:
+        return first_stream(probe(path), "audio") is not None
+    except (OSError, RuntimeError, subprocess.SubprocessError, ValueError):
+        return True
+
+
+def _field(info, name):
+    if name in info and name != "streams":
+        return info[name]
+    kind = "audio" if name in ("sample_rate", "channels") else "video"
+    stream = first_stream(info, kind) or {}
+    if name == "codec" and not stream:
+        stream = first_stream(info, "audio") or {}
+    return stream.get(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Informações de mídia com cache (uma sondagem por arquivo)")
+    parser.add_argument("path", help="Arquivo de vídeo ou áudio")
+    parser.add_argument("fields", nargs="*",
+                        help="Campos a imprimir, separados por espaço (duration, start, format, bit_rate, codec, "
+                             "width, height, pix_fmt, fps, sample_rate, channels); sem campos, o JSON completo")
+    args = parser.parse_args(argv)
+    try:
+        info = probe(args.path)
+    except (OSError, RuntimeError, subprocess.SubprocessError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    if args.fields:
+        print(" ".join("" if _field(info, name) is None else str(_field(info, name)) for name in args.fields))
+    else:
+        print(json.dumps(info, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -102,6 +102,8 @@ TIPOS DE MOMENTOS PRIORITÁRIOS:
 INSTRUÇÕES:
 1. Priorize qualidade sobre quantidade
 2. Mantenha a essência e mensagem principal do vídeo original
+3. O resumo final terá cerca de {target_duration_minutes} minutos: liste momentos que somem de 1,5 a 2 vezes
+   esse tempo, com a importância de cada um (a seleção final pela duração é feita depois)
 
 Formate sua resposta como JSON com esta estrutura:
 {{
@@ -122,3 +124,142 @@ RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL.
 """
 
     return prompt
+
+def get_reduce_prompt(candidates_json, max_clips=10):
+    """
+    Gera o prompt para escolher os melhores clips entre candidatos de várias partes do vídeo
+
+    Args:
+        candidates_json: Lista de candidatos (JSON) vindos das janelas da transcrição
+        max_clips: Número máximo de clips a manter
+
+    Returns:
+        String com o prompt formatado
+    """
+
+    prompt = f"""
+Você é um editor de vídeo especialista em YOUTUBE. Partes diferentes de um vídeo longo
+foram analisadas separadamente e geraram estes clips candidatos:
+
+{candidates_json}
+
+OBJETIVO: Escolher no máximo {max_clips} clips finais.
+
+INSTRUÇÕES:
+- Junte candidatos que cobrem o mesmo momento (tempos sobrepostos) em um único clip
+- Remova clips repetidos ou com o mesmo assunto
+- Mantenha os clips mais envolventes e autocontidos
+- Use apenas tempos presentes nos candidatos
+- Ordene os clips em ordem cronológica
+
+Formate sua resposta como JSON com esta estrutura:
+{{
+  "clips": [
+    {{
+      "start": "mm:ss",
+      "end": "mm:ss",
+      "caption": "legenda sugerida para o clip"
+    }},
+    ...
+  ]
+}}
+
+RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL.
+"""
+
+    return prompt
+
+def get_ranked_candidates_prompt(transcript_text, max_candidates=20):
+    """
+    Gera o prompt que pede uma lista ranqueada de candidatos, sem quantidade final de clips
+
+    A escolha de quantos clips usar (ou quantos minutos de resumo) é feita
+    depois, localmente, a partir das notas.
+
+    Args:
+        transcript_text: Transcrição formatada com timestamps
+        max_candidates: Número máximo de candidatos a listar
+
+    Returns:
+        String com o prompt formatado
+    """
+
+    prompt = f"""
+Você é um editor de vídeo especialista em encontrar os momentos mais envolventes em vídeos para YOUTUBE.
+
+Aqui está uma transcrição com carimbos de tempo:
+
+{transcript_text}
+
+OBJETIVO: Listar até {max_candidates} momentos candidatos, do melhor para o pior, com uma nota para cada um.
+Depois escolheremos quantos usar (como clips separados ou juntos em um resumo).
+
+CRITÉRIOS DE QUALIDADE:
+- Cada candidato deve ter começo, meio e fim claros e ser compreensível sozinho
+- Prefira bordas limpas e naturais na fala (pausas, troca de assunto ou mudança de tom)
+- Candidatos NÃO devem se sobrepor
+- Varie a duração: de trechos curtos e marcantes a discussões mais longas
+- A nota (score) vai de 0 a 100 e reflete o quanto o momento prende o espectador
+
+Formate sua resposta como JSON com esta estrutura, ordenado da maior para a menor nota:
+{{
+  "clips": [
+    {{
+      "start": "mm:ss",
+      "end": "mm:ss",
+      "caption": "legenda sugerida para o clip",
+      "score": 0-100,
+      "reason": "por que este momento é envolvente"
+    }},
+    ...
+  ]
+}}
+
+RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL.
+"""
+
+    return prompt
+
+def get_repair_prompt(failures_json, video_duration):
+    """
+    Gera o prompt que pede a correção apenas dos clips com tempos inválidos
+
+    Args:
+        failures_json: Lista (JSON) dos clips rejeitados, cada um com o problema encontrado
+        video_duration: Duração do vídeo no formato mm:ss (ou None se desconhecida)
+
+    Returns:
+        String com o prompt formatado
+    """
+
+    duration_line = f"O vídeo tem {video_duration} de duração." if video_duration else ""
+
+    prompt = f"""
+Você sugeriu estes clips, mas os tempos deles são inválidos:
+
+{failures_json}
+
+{duration_line}
+
+INSTRUÇÕES:
+- Corrija apenas "start" e "end" de cada clip, mantendo a mesma legenda
+- Use o formato mm:ss (minutos podem passar de 59, ex: 75:30), com segundos entre 00 e 59
+- "end" deve ser maior que "start" e não pode passar da duração do vídeo
+- Se não for possível corrigir um clip, deixe-o de fora
+
+Formate sua resposta como JSON com esta estrutura:
+{{
+  "clips": [
+    {{
+      "start": "mm:ss",
+      "end": "mm:ss",
+      "caption": "legenda do clip"
+    }},
+    ...
+  ]
+}}
+
+RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL.
+"""
+
+    return prompt
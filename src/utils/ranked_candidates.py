@@ -0,0 +1,105 @@
+"""
+Candidatos ranqueados: uma chamada ao LLM, vários recortes locais
+
+O LLM recebe um único pedido por uma lista generosa de momentos com nota
+(0-100), sem quantidade nem duração fixas no prompt. A lista fica salva em
+`clip_candidates.json`, ao lado de `clip_suggestions.json`; execuções
+seguintes com outros `--min-clips`/`--max-clips`/`--target-duration`
+recortam essa lista localmente, em milissegundos e sem rede.
+"""
+
+import os
+import json
+
+from disk_cache import hash_key
+from clip_selection import IMPORTANCE_WEIGHTS, _overlap_ratio, format_time, parse_time, select_for_duration
+
+CANDIDATES_FILE = "clip_candidates.json"
+DEFAULT_POOL_SIZE = 20
+FORMAT_VERSION = 1
+
+
+def transcript_fingerprint(segments):
+    """Identifica a transcrição usada no pedido (outra transcrição invalida os candidatos)"""
+    return hash_key([(round(s["start"], 2), round(s["end"], 2), s["text"].strip()) for s in segments])
+
+
+def _score(clip):
+    """Nota do candidato (0-100); sem nota, usa a importância ("alta" = 75)"""
+    try:
+        return max(0.0, min(100.0, float(clip.get("score"))))
+    except (TypeError, ValueError):
+        return IMPORTANCE_WEIGHTS.get(str(clip.get("importance", "")).lower(), 1) * 25.0
+
+
+def rank_candidates(clips):
+    """Normaliza os candidatos do LLM: tempos válidos, nota numérica e `rank` (1 = melhor)"""
+    ranked = []
+    for clip in clips:
+        try:
+            start, end = parse_time(clip["start"]), parse_time(clip["end"])
+        except (KeyError, ValueError):
+            continue
+        if end > start:
+            ranked.append(dict(clip, start=format_time(start), end=format_time(end), score=_score(clip)))
+
+    # Empate na nota: mantém a ordem em que o LLM listou
+    ranked.sort(key=lambda clip: -clip["score"])
+    for rank, clip in enumerate(ranked, 1):
+        clip["rank"] = rank
+    return ranked
+
+
+def save_candidates(path, candidates, fingerprint, model=None):
+    document = {
+        "version": FORMAT_VERSION,
+        "transcript": fingerprint,
+        "model": model,
+        "candidates": candidates,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+
+
+def load_candidates(path, fingerprint):
+    """Candidatos salvos para esta transcrição, ou None (arquivo ausente, antigo ou de outro vídeo)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if document.get("version") != FORMAT_VERSION or document.get("transcript") != fingerprint:
+        return None
+    return document.get("candidates") or None
+
+
+def slice_candidates(candidates, min_clips=1, max_clips=None, mode="clips", target_duration=None,
+                     overlap_threshold=0.5, min_gap_seconds=0.0):
+    """Escolhe os clipes desta execução entre os candidatos ranqueados (sem LLM)
+
+    No modo "clips" pega os `max_clips` de maior nota sem sobreposição; no
+    modo "summary" escolhe as notas de maior soma que cabem em
+    `target_duration` minutos. O resultado volta em ordem cronológica.
+    """
+    if mode == "summary" and target_duration:
+        clips, _ = select_for_duration(candidates, target_duration * 60, min_gap_seconds)
+        if len(clips) < min_clips:
+            print(f"Aviso: só {len(clips)} candidatos cabem no resumo (mínimo pedido: {min_clips})")
+        return clips
+
+    selected = []
+    for clip in sorted(candidates, key=lambda c: c["rank"]):
+        if max_clips is not None and len(selected) >= max_clips:
+            break
+        span = (parse_time(clip["start"]), parse_time(clip["end"]))
+        if any(_overlap_ratio(span, other) >= overlap_threshold for other, _ in selected):
+            continue
+        selected.append((span, clip))
+
+    if len(selected) < min_clips:
+        print(f"Aviso: só {len(selected)} candidatos disponíveis (mínimo pedido: {min_clips})")
+
+    selected.sort(key=lambda item: item[0][0])
+    return [dict(clip) for _, clip in selected]
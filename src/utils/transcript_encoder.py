@@ -0,0 +1,142 @@
+"""
+Codificação compacta da transcrição para os prompts do LLM
+
+Junta segmentos vizinhos em unidades do tamanho de frases, usa tempos em
+segundos inteiros (`[754-781] texto`), remove vícios de linguagem e
+repetições e, se houver um orçamento de tokens, descarta os trechos com
+menos informação até caber. A saída vai direto para
+`get_clip_detection_prompt`/`get_summary_prompt`.
+"""
+
+import re
+
+# Vícios de linguagem removidos quando aparecem como palavra isolada
+FILLERS = {"ahn", "ah", "eh", "éh", "hum", "hmm", "hm", "uh", "hã", "éé", "ééé", "né", "uhum"}
+
+# Palavras muito comuns, ignoradas ao medir a informação de um trecho
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "de", "do", "da", "dos", "das", "e", "é", "que", "em", "no", "na",
+    "nos", "nas", "pra", "para", "por", "com", "se", "eu", "você", "ele", "ela", "isso", "isto", "aí",
+    "então", "mas", "mais", "muito", "não", "sim", "tipo", "assim", "aqui", "lá", "ser", "ter", "foi",
+}
+
+HEADER = "(tempos em segundos desde o início do vídeo: [início-fim])"
+
+_SENTENCE_END = re.compile(r"[.!?…]\s*$")
+_FILLER_RE = re.compile(r"(?<![\w])(?:" + "|".join(sorted((re.escape(f) for f in FILLERS), key=len, reverse=True))
+                        + r")(?![\w])[,.]?", re.IGNORECASE)
+# Uma a quatro palavras repetidas em seguida ("eu eu acho", "a gente a gente")
+_REPEAT_RE = re.compile(r"\b(\w+(?:\s+\w+){0,3})(?:[\s,]+\1\b)+", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    """Estimativa de tokens (~4 caracteres por token, como nos tokenizadores BPE para português)"""
+    return max(1, round(len(text) / 4)) if text else 0
+
+
+def clean_text(text):
+    """Remove vícios de linguagem e repetições imediatas"""
+    text = _FILLER_RE.sub("", text)
+    text = _REPEAT_RE.sub(r"\1", text)
+    text = re.sub(r"\s+([,.!?])", r"\1", text)
+    text = re.sub(r"^[\s,]+", "", text)
+    return re.sub(r"\s{2,}", " ", text).strip()
+
+
+def merge_units(segments, max_unit_seconds=30, max_gap_seconds=1.5):
+    """Junta segmentos vizinhos até o fim da frase, uma pausa longa ou a duração máxima"""
+    units = []
+    current = None
+
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+
+        if current is not None and (
+            segment["start"] - current["end"] > max_gap_seconds
+            or segment["end"] - current["start"] > max_unit_seconds
+        ):
+            units.append(current)
+            current = None
+
+        if current is None:
+            current = {"start": segment["start"], "end": segment["end"], "text": text}
+        else:
+            current["end"] = segment["end"]
+            current["text"] += " " + text
+
+        if _SENTENCE_END.search(text) and current["end"] - current["start"] >= 3:
+            units.append(current)
+            current = None
+
+    if current is not None:
+        units.append(current)
+    return units
+
+
+def information_score(text):
+    """Proporção de palavras distintas e não triviais (0 = só repetição/palavras vazias)"""
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    if not words:
+        return 0.0
+    content = {w for w in words if w not in STOPWORDS and len(w) > 2}
+    return len(content) / len(words)
+
+
+def format_unit(unit):
+    return f"[{int(unit['start'])}-{int(round(unit['end']))}] {unit['text']}"
+
+
+def format_legacy(segments):
+    """Formato antigo (uma linha `[mm:ss - mm:ss]` por segmento), usado para comparação"""
+    lines = []
+    for segment in segments:
+        start, end = int(segment["start"]), int(segment["end"])
+        lines.append(f"[{start // 60:02d}:{start % 60:02d} - {end // 60:02d}:{end % 60:02d}] {segment['text']}")
+    return "\n".join(lines) + "\n"
+
+
+def encode_transcript(segments, token_budget=None, max_unit_seconds=30, max_gap_seconds=1.5):
+    """Gera a transcrição compacta e as estatísticas de tokens
+
+    Retorna (texto, estatísticas).
+    """
+    units = []
+    previous = None
+    for unit in merge_units(segments, max_unit_seconds, max_gap_seconds):
+        text = clean_text(unit["text"])
+        # Descarta unidades vazias ou idênticas à anterior
+        if not text or (previous and text.lower() == previous.lower()):
+            continue
+        units.append(dict(unit, text=text))
+        previous = text
+
+    lines = [format_unit(unit) for unit in units]
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    header_cost = estimate_tokens(HEADER) + 1
+    total = header_cost + sum(costs)
+
+    dropped = 0
+    if token_budget and total > token_budget:
+        # Descarta primeiro os trechos com menos informação por token
+        order = sorted(range(len(units)), key=lambda i: (information_score(units[i]["text"]), -costs[i]))
+        keep = [True] * len(units)
+        for i in order:
+            if total <= token_budget:
+                break
+            keep[i] = False
+            total -= costs[i]
+            dropped += 1
+        lines = [line for line, kept in zip(lines, keep) if kept]
+
+    text = HEADER + "\n" + "\n".join(lines) + "\n"
+    stats = {
+        "segments": len(segments),
+        "units": len(lines),
+        "dropped_units": dropped,
+        "tokens_before": estimate_tokens(format_legacy(segments)),
+        "tokens_after": estimate_tokens(text),
+    }
+    return text, stats
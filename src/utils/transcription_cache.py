@@ -0,0 +1,127 @@
+"""
+Cache de transcrições endereçado por conteúdo
+
+A chave combina uma impressão digital rápida do arquivo de origem (tamanho,
+mtime e amostras do conteúdo) ou do áudio decodificado com o modelo Whisper,
+o idioma e o uso de timestamps por palavra. Assim, reprocessar o mesmo vídeo
+com outros parâmetros de clipes reaproveita a transcrição instantaneamente.
+"""
+
+import os
+import hashlib
+
+from disk_cache import DiskCache, default_cache_root, hash_key
+
+DEFAULT_MAX_SIZE_MB = int(os.getenv("AUTOCUTTER_TRANSCRIPTION_CACHE_MB", "2048"))
+
+# Quantidade de bytes lidos do início, do fim e de pontos intermediários do arquivo
+_EDGE_BYTES = 1024 * 1024
+_SAMPLE_BYTES = 64 * 1024
+_SAMPLES = 16
+
+
+def file_fingerprint(path):
+    """Impressão digital rápida de um arquivo: tamanho + mtime + amostras do conteúdo"""
+    st = os.stat(path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode("ascii"))
+
+    with open(path, "rb") as f:
+        if st.st_size <= 2 * _EDGE_BYTES + _SAMPLES * _SAMPLE_BYTES:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(_EDGE_BYTES))
+            step = (st.st_size - 2 * _EDGE_BYTES) // (_SAMPLES + 1)
+            for i in range(1, _SAMPLES + 1):
+                f.seek(_EDGE_BYTES + i * step)
+                digest.update(f.read(_SAMPLE_BYTES))
+            f.seek(st.st_size - _EDGE_BYTES)
+            digest.update(f.read(_EDGE_BYTES))
+
+    return digest.hexdigest()
+
+
+def audio_fingerprint(audio):
+    """Impressão digital do áudio decodificado (array NumPy)"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(audio.dtype).encode("ascii"))
+    digest.update(audio.data if audio.flags.c_contiguous else audio.copy().data)
+    return digest.hexdigest()
+
+
+def normalize_result(result):
+    """Converte o resultado do Whisper no formato armazenado (apenas campos usados)"""
+    segments = []
+    for segment in result.get("segments", []):
+        segments.append({
+            "start": float(segment["start"]),
+            "end": float(segment["end"]),
+            "text": segment["text"],
+            "words": [
+                {
+                    "word": word["word"],
+                    "start": float(word["start"]),
+                    "end": float(word["end"]),
+                    "probability": float(word.get("probability", 1.0)),
+                }
+                for word in segment.get("words", [])
+            ],
+        })
+
+    text = result.get("text")
+    if text is None:
+        text = "".join(segment["text"] for segment in segments)
+
+    return {"text": text, "language": result.get("language"), "segments": segments}
+
+
+class TranscriptionCache:
+    """Cache em disco de resultados de transcrição"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache = DiskCache(cache_dir or os.path.join(default_cache_root(), "transcriptions"),
+                               max_size_mb=max_size_mb)
+
+    @staticmethod
+    def fingerprint(source):
+        """Impressão digital de um caminho de arquivo ou de um array de áudio decodificado"""
+        if isinstance(source, str):
+            return "file:" + file_fingerprint(source)
+        return "audio:" + audio_fingerprint(source)
+
+    @staticmethod
+    def make_key(fingerprint, model, language=None, word_timestamps=True, variant=None):
+        # `variant` identifica pré-processamentos que mudam o resultado (ex.: VAD)
+        if variant is None:
+            return hash_key(fingerprint, model, language, bool(word_timestamps))
+        return hash_key(fingerprint, model, language, bool(word_timestamps), variant)
+
+    def get(self, source, model, language=None, word_timestamps=True, variant=None):
+        """Retorna o resultado normalizado em cache ou None
+
+        Uma transcrição com timestamps por palavra também atende pedidos sem eles.
+        """
+        try:
+            fingerprint = self.fingerprint(source)
+        except OSError:
+            return None
+
+        options = [True] if word_timestamps else [False, True]
+        for flag in options:
+            result = self.cache.get(self.make_key(fingerprint, model, language, flag, variant))
+            if result is not None:
+                return result
+        return None
+
+    def put(self, source, model, result, language=None, word_timestamps=True, variant=None):
+        """Armazena o resultado do Whisper (normalizado) e retorna a versão armazenada"""
+        normalized = normalize_result(result)
+        try:
+            key = self.make_key(self.fingerprint(source), model, language, word_timestamps, variant)
+            self.cache.put(key, normalized)
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar a transcrição em cache: {e}")
+        return normalized
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,114 @@
+"""
+Motores de transcrição intercambiáveis
+
+Todos os motores recebem o áudio decodificado (float32 mono, 16 kHz) e
+retornam o mesmo formato: {"text", "language", "segments": [{"start", "end",
+"text", "words": [{"word", "start", "end", "probability"}]}]}.
+
+- whisper: openai-whisper (PyTorch), o motor original
+- faster-whisper: CTranslate2 com pesos int8, bem mais rápido na CPU
+"""
+
+import os
+import importlib.util
+
+import whisper_models
+from transcription_cache import normalize_result
+
+DEFAULT_ENGINE = os.getenv("AUTOCUTTER_ASR_ENGINE", "whisper")
+
+
+class WhisperEngine:
+    """openai-whisper em PyTorch (fp32 na CPU)"""
+
+    name = "whisper"
+    package = "openai-whisper"
+    default_dtype = "fp32"
+
+    def __init__(self, device="cpu", dtype=None):
+        self.device = device
+        self.dtype = dtype or self.default_dtype
+
+    @staticmethod
+    def is_available():
+        return importlib.util.find_spec("whisper") is not None
+
+    def load(self, model_size):
+        return whisper_models.load_model(model_size, self.device, self.dtype, backend=self.name)
+
+    def transcribe(self, audio, model_size="base", language=None, word_timestamps=True, **options):
+        model = self.load(model_size)
+        if language:
+            options["language"] = language
+        result = model.transcribe(audio, word_timestamps=word_timestamps, **options)
+        return normalize_result(result)
+
+
+class FasterWhisperEngine(WhisperEngine):
+    """faster-whisper (CTranslate2) com quantização int8 na CPU"""
+
+    name = "faster-whisper"
+    package = "faster-whisper"
+    default_dtype = "int8"
+
+    # Opções do openai-whisper que o faster-whisper também aceita
+    SUPPORTED_OPTIONS = {"beam_size", "best_of", "temperature", "condition_on_previous_text", "initial_prompt"}
+
+    @staticmethod
+    def is_available():
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def transcribe(self, audio, model_size="base", language=None, word_timestamps=True, **options):
+        model = self.load(model_size)
+        options = {k: v for k, v in options.items() if k in self.SUPPORTED_OPTIONS}
+
+        # O resultado é um gerador: a transcrição acontece enquanto é consumido
+        segments, info = model.transcribe(audio, language=language, word_timestamps=word_timestamps, **options)
+
+        result_segments = []
+        for segment in segments:
+            result_segments.append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "words": [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in (segment.words or [])
+                ],
+            })
+
+        return normalize_result({"segments": result_segments, "language": info.language})
+
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def available_engines():
+    """Nomes dos motores cujas dependências estão instaladas"""
+    return [name for name, engine in ENGINES.items() if engine.is_available()]
+
+
+def get_engine(name=None, device="cpu", dtype=None):
+    """Instancia o motor pedido
+
+    Levanta ValueError para nomes desconhecidos e ImportError se a dependência
+    do motor não estiver instalada.
+    """
+    name = name or DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Motor de transcrição desconhecido: {name} (opções: {', '.join(ENGINES)})")
+
+    engine = ENGINES[name]
+    if not engine.is_available():
+        raise ImportError(f"Motor '{name}' não instalado. Instale com: pip install {engine.package}")
+    return engine(device=device, dtype=dtype)
+
+
+def cache_model_name(engine_name, model_size):
+    """Nome do modelo usado na chave do cache de transcrições (o motor muda o resultado)"""
+    if not engine_name or engine_name == WhisperEngine.name:
+        return model_size
+    return f"{engine_name}/{model_size}"
@@ -0,0 +1,76 @@
+"""
+Transcrição em duas passadas
+
+A primeira passada usa um modelo pequeno no vídeo inteiro (texto aproximado,
+suficiente para escolher os clipes). A segunda re-transcreve com o modelo
+grande apenas os trechos dos clipes escolhidos (com margem) e substitui os
+segmentos do rascunho nesses trechos.
+"""
+
+import time
+
+from chunked_transcription import SAMPLE_RATE, shift_segments
+
+
+def merge_ranges(ranges, padding_seconds=2.0, total_seconds=None):
+    """Aplica a margem a cada intervalo (início, fim) em segundos e junta os que se sobrepõem"""
+    padded = []
+    for start, end in sorted(ranges):
+        start = max(0.0, start - padding_seconds)
+        end = end + padding_seconds
+        if total_seconds is not None:
+            end = min(end, total_seconds)
+        if end <= start:
+            continue
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(padded[-1][1], end))
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def _midpoint_in(segment, ranges):
+    midpoint = (segment["start"] + segment["end"]) / 2
+    return any(start <= midpoint < end for start, end in ranges)
+
+
+def splice_segments(draft_segments, refined):
+    """Troca os segmentos do rascunho pelos refinados dentro de cada intervalo
+
+    `refined` é uma lista de (início_s, fim_s, segmentos_com_tempo_global).
+    """
+    ranges = [(start, end) for start, end, _ in refined]
+    segments = [s for s in draft_segments if not _midpoint_in(s, ranges)]
+    for start, end, range_segments in refined:
+        segments.extend(s for s in range_segments if _midpoint_in(s, [(start, end)]))
+    segments.sort(key=lambda s: s["start"])
+    return segments
+
+
+def refine_ranges(audio, ranges, transcribe_fn, sample_rate=SAMPLE_RATE):
+    """Re-transcreve os intervalos do áudio decodificado
+
+    `transcribe_fn(audio_slice)` deve retornar um resultado no formato do Whisper.
+    Retorna (refinados, estatísticas).
+    """
+    total_seconds = len(audio) / sample_rate
+    refined = []
+    started = time.perf_counter()
+
+    for i, (start, end) in enumerate(ranges, 1):
+        print(f"🎯 Refinando trecho {i}/{len(ranges)}: {start:.1f}s - {end:.1f}s")
+        audio_slice = audio[int(start * sample_rate):int(end * sample_rate)]
+        result = transcribe_fn(audio_slice)
+        refined.append((start, end, shift_segments(result.get("segments", []), start)))
+
+    refined_seconds = sum(end - start for start, end in ranges)
+    stats = {
+        "ranges": len(ranges),
+        "refined_seconds": round(refined_seconds, 2),
+        "total_seconds": round(total_seconds, 2),
+        "refined_percent": round(100 * refined_seconds / total_seconds, 1) if total_seconds else 0.0,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+    print(f"📉 Modelo grande usado em {stats['refined_seconds']:.0f}s de {stats['total_seconds']:.0f}s "
+          f"({stats['refined_percent']:.1f}% do áudio, economia de {100 - stats['refined_percent']:.1f}%)")
+    return refined, stats
@@ -0,0 +1,201 @@
+"""
+Detecção de atividade de voz (VAD) por energia, vetorizada com NumPy
+
+Marca os quadros de fala pela energia RMS (com histerese entre um limiar de
+entrada e um de saída) e pela taxa de cruzamentos por zero, junta os trechos
+em regiões de fala e permite transcrever apenas essas regiões, remapeando os
+tempos de volta para o áudio original.
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+DEFAULT_OPTIONS = {
+    "frame_ms": 30,
+    "threshold_db": None,      # None = adaptativo (piso de ruído + margem)
+    "hysteresis_db": 6.0,
+    "zcr_max": 0.5,
+    "min_speech_ms": 250,
+    "min_silence_ms": 500,
+    "padding_ms": 200,
+}
+
+
+def frame_features(audio, sample_rate=SAMPLE_RATE, frame_ms=30):
+    """Energia (dBFS) e taxa de cruzamentos por zero de cada quadro"""
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0), np.zeros(0), frame
+
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20 * np.log10(np.maximum(rms, 1e-10))
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame
+
+    return energy_db, zcr, frame
+
+
+def hysteresis(above_on, above_off):
+    """Máscara de fala: liga quando passa do limiar de entrada e só desliga abaixo do de saída"""
+    idx = np.arange(len(above_on))
+    last_on = np.maximum.accumulate(np.where(above_on, idx, -1))
+    last_off = np.maximum.accumulate(np.where(~above_off, idx, -1))
+    return last_on > last_off
+
+
+def _mask_to_runs(mask):
+    """Converte uma máscara booleana em pares (início, fim) de quadros"""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return changes[0::2], changes[1::2]
+
+
+def detect_speech_regions(audio, sample_rate=SAMPLE_RATE, frame_ms=30, threshold_db=None, hysteresis_db=6.0,
+                          zcr_max=0.5, min_speech_ms=250, min_silence_ms=500, padding_ms=200):
+    """Retorna a lista de regiões de fala [(início_s, fim_s), ...]"""
+    energy_db, zcr, frame = frame_features(audio, sample_rate, frame_ms)
+    if len(energy_db) == 0:
+        return []
+
+    if threshold_db is None:
+        # Piso de ruído estimado pelos quadros mais silenciosos
+        noise_floor = np.percentile(energy_db, 10)
+        threshold_db = max(noise_floor + 12.0, -50.0)
+
+    above_on = (energy_db > threshold_db) & (zcr < zcr_max)
+    above_off = energy_db > threshold_db - hysteresis_db
+    starts, ends = _mask_to_runs(hysteresis(above_on, above_off))
+    if len(starts) == 0:
+        return []
+
+    frame_s = frame / sample_rate
+    starts = starts * frame_s
+    ends = ends * frame_s
+
+    # Junta regiões separadas por silêncios curtos
+    keep_gap = (starts[1:] - ends[:-1]) >= min_silence_ms / 1000
+    group_starts = np.concatenate(([0], np.flatnonzero(keep_gap) + 1))
+    group_ends = np.concatenate((np.flatnonzero(keep_gap), [len(starts) - 1]))
+    starts, ends = starts[group_starts], ends[group_ends]
+
+    # Descarta regiões curtas demais e aplica a margem
+    long_enough = (ends - starts) >= min_speech_ms / 1000
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    duration = len(audio) / sample_rate
+    pad = padding_ms / 1000
+    starts = np.maximum(starts - pad, 0.0)
+    ends = np.minimum(ends + pad, duration)
+
+    regions = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def compact_regions(audio, regions, sample_rate=SAMPLE_RATE, gap_seconds=0.3):
+    """Concatena as regiões de fala (com um pequeno silêncio entre elas)
+
+    Retorna (áudio_compactado, mapa) onde o mapa tem os inícios das regiões no
+    áudio compactado e no original, em segundos.
+    """
+    gap = np.zeros(int(gap_seconds * sample_rate), dtype=np.float32)
+    pieces = []
+    compact_starts = []
+    source_starts = []
+    durations = []
+    position = 0
+
+    for start, end in regions:
+        a, b = int(start * sample_rate), int(end * sample_rate)
+        if b <= a:
+            continue
+        compact_starts.append(position / sample_rate)
+        source_starts.append(a / sample_rate)
+        durations.append((b - a) / sample_rate)
+        pieces.append(np.asarray(audio[a:b], dtype=np.float32))
+        pieces.append(gap)
+        position += (b - a) + len(gap)
+
+    compact = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    mapping = {
+        "compact_starts": np.array(compact_starts),
+        "source_starts": np.array(source_starts),
+        "durations": np.array(durations),
+    }
+    return compact, mapping
+
+
+def remap_times(times, mapping):
+    """Converte tempos do áudio compactado para o tempo do áudio original"""
+    times = np.asarray(times, dtype=np.float64)
+    if len(mapping["compact_starts"]) == 0:
+        return times
+    idx = np.clip(np.searchsorted(mapping["compact_starts"], times, side="right") - 1, 0, None)
+    offset = np.clip(times - mapping["compact_starts"][idx], 0.0, mapping["durations"][idx])
+    return mapping["source_starts"][idx] + offset
+
+
+def remap_result(result, mapping):
+    """Aplica remap_times a todos os segmentos e palavras de um resultado do Whisper"""
+    segments = result.get("segments", [])
+
+    times = []
+    for segment in segments:
+        times.extend((segment["start"], segment["end"]))
+        for word in segment.get("words", []):
+            times.extend((word["start"], word["end"]))
+    remapped = iter(remap_times(times, mapping).tolist())
+
+    new_segments = []
+    for segment in segments:
+        new_segment = dict(segment)
+        new_segment["start"], new_segment["end"] = next(remapped), next(remapped)
+        new_words = []
+        for word in segment.get("words", []):
+            new_word = dict(word)
+            new_word["start"], new_word["end"] = next(remapped), next(remapped)
+            new_words.append(new_word)
+        new_segment["words"] = new_words
+        new_segments.append(new_segment)
+
+    new_result = dict(result)
+    new_result["segments"] = new_segments
+    return new_result
+
+
+def transcribe_speech_only(audio, transcribe_fn, sample_rate=SAMPLE_RATE, **vad_options):
+    """Roda o VAD, transcreve só as regiões de fala e devolve (resultado, estatísticas)
+
+    `transcribe_fn(audio)` deve retornar um resultado no formato do Whisper.
+    """
+    options = dict(DEFAULT_OPTIONS)
+    options.update({k: v for k, v in vad_options.items() if v is not None})
+
+    regions = detect_speech_regions(audio, sample_rate, **options)
+    total = len(audio) / sample_rate
+    speech = sum(end - start for start, end in regions)
+    stats = {
+        "total_seconds": round(total, 2),
+        "speech_seconds": round(speech, 2),
+        "skipped_seconds": round(total - speech, 2),
+        "skipped_percent": round(100 * (total - speech) / total, 1) if total else 0.0,
+        "regions": len(regions),
+    }
+
+    print(f"🔇 VAD: {stats['regions']} regiões de fala, {stats['skipped_seconds']:.0f}s "
+          f"de {stats['total_seconds']:.0f}s ignorados ({stats['skipped_percent']:.1f}%)")
+
+    if not regions:
+        return {"text": "", "segments": [], "language": None}, stats
+
+    compact, mapping = compact_regions(audio, regions, sample_rate)
+    result = transcribe_fn(compact)
+    return remap_result(result, mapping), stats
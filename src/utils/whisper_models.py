@@ -0,0 +1,218 @@
+"""
+Registro de modelos Whisper compartilhado pelo processo
+
+Mantém os modelos carregados entre execuções (CLI, aba de transcrição e
+geração de clipes da GUI), evitando recarregar o mesmo modelo a cada vídeo.
+Cada backend (openai-whisper, faster-whisper) tem seu próprio carregador.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Número aproximado de parâmetros de cada modelo, usado para estimar a memória
+# antes do carregamento (evita o pico de RAM de carregar e só depois despejar)
+MODEL_PARAMS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large": 1_550_000_000,
+}
+
+DTYPE_BYTES = {
+    "fp32": 4,
+    "fp16": 2,
+    "int8": 1,
+}
+
+# Limite padrão de memória para os modelos mantidos em cache (MB)
+DEFAULT_MAX_MEMORY_MB = int(os.getenv("AUTOCUTTER_WHISPER_CACHE_MB", "6144"))
+
+
+def _default_loader(model_size, device, dtype):
+    """Carrega um modelo openai-whisper no dispositivo e precisão pedidos"""
+    import whisper
+
+    model = whisper.load_model(model_size, device=device)
+    if dtype == "fp16" and device != "cpu":
+        model = model.half()
+    return model
+
+
+def _faster_whisper_loader(model_size, device, dtype):
+    """Carrega um modelo CTranslate2 do faster-whisper (int8 por padrão na CPU)"""
+    from faster_whisper import WhisperModel
+
+    compute_type = {"fp32": "float32", "fp16": "float16"}.get(dtype, dtype)
+    return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+
+DEFAULT_BACKEND = "whisper"
+
+
+def estimate_model_bytes(model_size, dtype="fp32"):
+    """Estima o tamanho em bytes de um modelo ainda não carregado"""
+    base_size = model_size.split(".")[0].split("-")[0]
+    params = MODEL_PARAMS.get(base_size, MODEL_PARAMS["large"])
+    return params * DTYPE_BYTES.get(dtype, 4)
+
+
+def measure_model_bytes(model):
+    """Mede o tamanho real dos pesos de um modelo carregado"""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+class WhisperModelRegistry:
+    """Cache LRU thread-safe de modelos Whisper, indexado por (modelo, dispositivo, precisão, backend)"""
+
+    def __init__(self, max_memory_mb=DEFAULT_MAX_MEMORY_MB, loader=None, estimator=None):
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else 0
+        self.loaders = {
+            DEFAULT_BACKEND: loader or _default_loader,
+            "faster-whisper": _faster_whisper_loader,
+        }
+        self.estimator = estimator or estimate_model_bytes
+
+        self._models = OrderedDict()  # chave -> (modelo, bytes)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_times = {}
+
+    @staticmethod
+    def _label(key):
+        # O backend padrão fica fora do rótulo ("base/cpu/fp32")
+        return "/".join(key if key[3] != DEFAULT_BACKEND else key[:3])
+
+    def register_loader(self, backend, loader):
+        """Registra (ou substitui) o carregador de um backend"""
+        with self._lock:
+            self.loaders[backend] = loader
+
+    def get(self, model_size="base", device="cpu", dtype="fp32", backend=DEFAULT_BACKEND):
+        """Retorna o modelo pedido, carregando-o apenas se ainda não estiver em memória"""
+        if backend not in self.loaders:
+            raise ValueError(f"Backend de transcrição desconhecido: {backend}")
+        key = (model_size, device, dtype, backend)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Um carregamento por chave; chamadas concorrentes pela mesma chave esperam aqui
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+                self.misses += 1
+                self._evict_for(self.estimator(model_size, dtype))
+
+            start = time.perf_counter()
+            model = self.loaders[backend](model_size, device, dtype)
+            elapsed = time.perf_counter() - start
+
+            size = measure_model_bytes(model) or self.estimator(model_size, dtype)
+            with self._lock:
+                self._models[key] = (model, size)
+                self.load_times[key] = elapsed
+                self._evict_for(0, keep=key)
+
+        return model
+
+    def _evict_for(self, incoming_bytes, keep=None):
+        """Remove os modelos menos usados até caber `incoming_bytes` no limite (chamar com o lock)"""
+        if not self.max_memory_bytes:
+            return
+
+        while self._models:
+            used = sum(size for _, size in self._models.values())
+            if used + incoming_bytes <= self.max_memory_bytes:
+                break
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                # O modelo recém-carregado sozinho excede o limite: mantém mesmo assim
+                if len(self._models) == 1:
+                    break
+                self._models.move_to_end(oldest)
+                oldest = next(iter(self._models))
+            del self._models[oldest]
+            self.evictions += 1
+
+    def evict(self, model_size=None, device=None, dtype=None, backend=None):
+        """Remove manualmente modelos do cache (todos, se nenhum filtro for passado)"""
+        with self._lock:
+            for key in list(self._models):
+                if all(f is None or f == k for f, k in zip((model_size, device, dtype, backend), key)):
+                    del self._models[key]
+                    self.evictions += 1
+
+    def loaded_models(self):
+        """Lista as chaves dos modelos em memória, do menos para o mais usado"""
+        with self._lock:
+            return list(self._models)
+
+    def stats(self):
+        """Estatísticas de uso do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "loaded": [self._label(key) for key in self._models],
+                "memory_mb": sum(size for _, size in self._models.values()) / (1024 * 1024),
+                "max_memory_mb": self.max_memory_bytes / (1024 * 1024),
+                "load_time_s": {self._label(key): round(t, 3) for key, t in self.load_times.items()},
+            }
+
+    def format_stats(self):
+        """Resumo das estatísticas em uma linha, para logs"""
+        s = self.stats()
+        total_load = sum(s["load_time_s"].values())
+        return (f"Modelos Whisper: {s['hits']} acertos, {s['misses']} carregamentos "
+                f"({total_load:.1f}s), {s['evictions']} despejos, "
+                f"{s['memory_mb']:.0f}/{s['max_memory_mb']:.0f} MB em uso")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Retorna o registro global do processo, criando-o na primeira chamada"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = WhisperModelRegistry()
+        return _registry
+
+
+def configure(max_memory_mb=None, loader=None):
+    """Ajusta o limite de memória (e opcionalmente o carregador) do registro global"""
+    registry = get_registry()
+    with registry._lock:
+        if max_memory_mb is not None:
+            registry.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+            registry._evict_for(0)
+        if loader is not None:
+            registry.loaders[DEFAULT_BACKEND] = loader
+    return registry
+
+
+def load_model(model_size="base", device="cpu", dtype="fp32", backend=DEFAULT_BACKEND):
+    """Atalho para obter um modelo do registro global"""
+    return get_registry().get(model_size, device, dtype, backend)
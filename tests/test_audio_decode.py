@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Testes para a decodificação de áudio direto para NumPy
+"""
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import audio_decode
+
+
+def make_tone(path, seconds=5, frequency=440):
+    """Gera um arquivo de áudio estéreo 44.1 kHz com um tom puro"""
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={frequency}:duration={seconds}",
+        "-ac", "2", "-ar", "44100", "-y", path
+    ], check=True)
+
+
+def test_decode_audio_to_array():
+    """Testar decodificação para float32 mono 16 kHz, em memória e mapeada"""
+    print("=== TESTANDO DECODIFICAÇÃO DE ÁUDIO ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "tone.wav")
+        make_tone(source)
+
+        for threshold in (audio_decode.MMAP_THRESHOLD_SECONDS, 0):
+            audio = audio_decode.decode_audio(source, mmap_threshold_seconds=threshold, tmp_dir=temp_dir)
+
+            assert audio.dtype == np.float32
+            assert abs(len(audio) - 5 * audio_decode.SAMPLE_RATE) < audio_decode.SAMPLE_RATE // 100
+
+            spectrum = np.abs(np.fft.rfft(audio))
+            peak_hz = np.argmax(spectrum) * audio_decode.SAMPLE_RATE / len(audio)
+            assert abs(peak_hz - 440) < 2, peak_hz
+            print(f"✅ {type(audio).__name__}: {len(audio)} amostras, pico em {peak_hz:.0f} Hz")
+
+        # Nenhum WAV temporário deixado para trás
+        assert sorted(os.listdir(temp_dir)) == ["tone.wav"]
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando decodificação de áudio...")
+    try:
+        result = test_decode_audio_to_array()
+    except Exception as e:
+        print(f"❌ ERRO FATAL: {e}")
+        result = False
+    print(f"\nResultado Final: {1 if result else 0}/1 testes passaram")
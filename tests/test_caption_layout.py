@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Testes para a quebra de linhas de legenda por largura em pixels
+"""
+import sys
+import os
+import time
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from caption_layout import CaptionLayout, load_font
+
+
+def make_segments(count, words_per_segment=12):
+    """Segmentos com palavras de larguras bem diferentes (fonte proporcional)"""
+    vocabulary = ["mmmm", "il", "WWW", "a", "ótimo", "iii", "MMMMMM", "de", "ilustração", "w"]
+    segments = []
+    t = 0.0
+    for s in range(count):
+        words = []
+        for w in range(words_per_segment):
+            text = vocabulary[(s + w * 3) % len(vocabulary)]
+            words.append({"word": f" {text}", "start": t, "end": t + 0.3})
+            t += 0.4
+        segments.append({"start": words[0]["start"], "end": words[-1]["end"],
+                          "text": "".join(w["word"] for w in words), "words": words})
+    return segments
+
+
+def test_lines_fit_pixel_width():
+    """Testar que cada linha cabe na largura e que os tempos seguem as palavras"""
+    print("=== TESTANDO QUEBRA POR LARGURA EM PIXELS ===")
+
+    layout = CaptionLayout(font_size=40, max_width=300)
+    segments = make_segments(20)
+    all_lines = layout.layout_segments(segments)
+
+    for segment, lines in zip(segments, all_lines):
+        words = [w["word"].strip() for w in segment["words"]]
+        assert " ".join(line["text"] for line in lines) == " ".join(words)
+        assert lines[0]["start"] == segment["words"][0]["start"]
+        assert lines[-1]["end"] == segment["words"][-1]["end"]
+        for line, following in zip(lines, lines[1:]):
+            assert line["end"] == following["start"]
+        for line in lines:
+            width = layout.font.getlength(line["text"])
+            assert width <= layout.max_width + 1 or " " not in line["text"], (line["text"], width)
+
+    # Palavras largas ocupam mais espaço que palavras estreitas com o mesmo número de letras
+    assert layout.word_width("WWW") > layout.word_width("iii")
+    assert layout.wrap_text("") == []
+    print(f"✅ {sum(len(lines) for lines in all_lines)} linhas dentro de {layout.max_width}px")
+    return True
+
+
+def test_layout_reuses_font_and_measurements():
+    """Testar que a fonte é carregada uma vez e cada palavra medida uma vez"""
+    print("\n=== TESTANDO CACHE DE FONTE E MEDIDAS ===")
+
+    load_font.cache_clear()
+    segments = make_segments(3000)
+
+    started = time.perf_counter()
+    layout = CaptionLayout()
+    layout.layout_segments(segments)
+    elapsed = time.perf_counter() - started
+
+    CaptionLayout()
+    info = load_font.cache_info()
+    assert info.misses == 1 and info.hits == 1, info
+    assert len(layout._word_widths) == 10
+    print(f"✅ 3000 segmentos em {elapsed * 1000:.0f} ms, {len(layout._advances)} glifos medidos")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando layout de legendas...")
+
+    tests = [
+        ("Quebra por Largura em Pixels", test_lines_fit_pixel_width),
+        ("Cache de Fonte e Medidas", test_layout_reuses_font_and_measurements),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
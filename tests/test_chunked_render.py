@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Testes para a renderização em partes paralelas (vídeo inteiro com legendas)
+"""
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import media_probe
+from chunked_render import chunk_filter, default_chunks, plan_chunks, render_chunked
+from keyframes import KeyframeIndex
+
+SRT = """1
+00:00:05,500 --> 00:00:06,500
+Legenda atravessando a emenda
+
+2
+00:00:11,000 --> 00:00:12,500
+Outra legenda na emenda
+"""
+
+
+def frame_hashes(path):
+    stdout = subprocess.run(["ffmpeg", "-v", "error", "-i", path, "-map", "0:v:0", "-f", "framemd5", "-"],
+                            capture_output=True, text=True, check=True).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in stdout.splitlines() if not line.startswith("#")]
+
+
+def test_chunk_plan():
+    """Testar a divisão da linha do tempo em keyframes e o filtro de cada parte"""
+    print("=== TESTANDO DIVISÃO EM PARTES ===")
+
+    keyframes = [float(t) for t in range(0, 600, 4)]
+    assert plan_chunks(keyframes, 600, 4) == [(0.0, 148.0), (148.0, 300.0), (300.0, 448.0), (448.0, None)]
+    # Keyframes esparsos: partes repetidas são descartadas
+    assert plan_chunks([0.0, 500.0], 600, 4) == [(0.0, 500.0), (500.0, None)]
+    assert default_chunks(600, cores=16) == 10 and default_chunks(45, cores=16) == 1
+
+    graph = chunk_filter(148.0, 300.0, ["scale=1280:720", "subtitles='x.srt'"], "30")
+    assert graph == ("setpts=PTS+148.000000/TB,scale=1280:720,subtitles='x.srt',fps=30,"
+                     "trim=start=148.000000:end=300.000000,setpts=PTS-STARTPTS")
+    # Sem conversão de taxa (origem já na taxa pedida): só os filtros e o corte
+    assert chunk_filter(448.0, None, ["subtitles='x.srt'"], None) == (
+        "setpts=PTS+448.000000/TB,subtitles='x.srt',trim=start=448.000000,setpts=PTS-STARTPTS")
+    print("✅ Divisões no keyframe mais próximo; legendas com o tempo original em cada parte")
+    return True
+
+
+def test_chunked_vs_single_benchmark():
+    """Benchmark: um ffmpeg x partes em paralelo, com saída idêntica quadro a quadro (sem perdas)"""
+    print("\n=== BENCHMARK: RENDERIZAÇÃO EM PARTES ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "fonte.mp4")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=24:size=320x180:rate=25",
+                        "-f", "lavfi", "-i", "sine=duration=24", "-c:v", "libx264", "-preset", "ultrafast",
+                        "-g", "50", "-c:a", "aac", "-shortest", "-y", source], check=True)
+        subtitle_path = os.path.join(temp_dir, "legenda.srt")
+        with open(subtitle_path, "w", encoding="utf-8") as f:
+            f.write(SRT)
+
+        filters = ["scale=256:144", f"subtitles='{subtitle_path}'"]
+        # Sem perdas (-qp 0): as duas saídas só batem quadro a quadro se as emendas forem exatas
+        video_args = ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0"]
+        audio_args = ["-c:a", "aac", "-b:a", "128k"]
+
+        single = os.path.join(temp_dir, "inteiro.mp4")
+        started = time.perf_counter()
+        subprocess.run(["ffmpeg", "-v", "error", "-i", source, "-vf", ",".join(filters), "-r", "30"]
+                       + video_args + audio_args + ["-y", single], check=True)
+        single_seconds = time.perf_counter() - started
+
+        info = media_probe.probe(source)
+        keyframes = KeyframeIndex(cache_dir=os.path.join(temp_dir, "cache")).get(source)
+        chunked = os.path.join(temp_dir, "partes.mp4")
+        events = []
+        started = time.perf_counter()
+        ok, error = render_chunked(source, chunked, filters, "30", video_args, audio_args, info["duration"],
+                                   keyframes, n_chunks=4, on_progress=events.append)
+        chunked_seconds = time.perf_counter() - started
+        assert ok, error
+
+        frames = frame_hashes(chunked)
+        assert frames == frame_hashes(single)
+        expected, result = media_probe.run_probe(single), media_probe.run_probe(chunked)
+        assert abs(result["duration"] - expected["duration"]) < 0.05, (result["duration"], expected["duration"])
+        assert media_probe.first_stream(result, "audio") is not None
+        assert events and events[-1]["done"]
+
+        # Origem já na qualidade pedida: sem scale nem -r, e ainda idêntico a um ffmpeg só
+        same_rate = os.path.join(temp_dir, "sem_taxa.mp4")
+        subprocess.run(["ffmpeg", "-v", "error", "-i", source, "-vf", filters[1]] + video_args + audio_args
+                       + ["-y", same_rate], check=True)
+        chunked_same = os.path.join(temp_dir, "partes_sem_taxa.mp4")
+        ok, error = render_chunked(source, chunked_same, filters[1:], None, video_args, audio_args,
+                                   info["duration"], keyframes, n_chunks=2)
+        assert ok, error
+        assert frame_hashes(chunked_same) == frame_hashes(same_rate)
+        assert media_probe.first_stream(media_probe.run_probe(chunked_same), "video")["width"] == 320
+
+        cores = os.cpu_count() or 1
+        if cores >= 4:
+            assert chunked_seconds < single_seconds, (chunked_seconds, single_seconds)
+        print(f"✅ {len(frames)} quadros idênticos; um ffmpeg {single_seconds:.2f}s, "
+              f"4 partes {chunked_seconds:.2f}s ({single_seconds / chunked_seconds:.2f}x em {cores} núcleos)")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando renderização em partes...")
+
+    tests = [
+        ("Divisão em Partes", test_chunk_plan),
+        ("Benchmark: Renderização em Partes", test_chunked_vs_single_benchmark),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Testes para a transcrição em janelas paralelas (divisão e costura)
+"""
+import sys
+import os
+
+import numpy as np
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from chunked_transcription import SAMPLE_RATE, plan_windows, stitch_windows
+
+
+def make_speech_with_pauses(total_seconds, pauses):
+    """Ruído com amplitude de fala e trechos silenciosos em `pauses` (lista de (início, fim) em s)"""
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(total_seconds * SAMPLE_RATE) * 0.3).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_windows_split_at_silence():
+    """Testar que as janelas são cortadas nos silêncios próximos ao tamanho alvo"""
+    print("=== TESTANDO DIVISÃO EM SILÊNCIOS ===")
+
+    audio = make_speech_with_pauses(150, [(58.0, 59.0), (121.0, 122.0)])
+    windows = plan_windows(audio, window_seconds=60, overlap_seconds=1.0, search_seconds=5)
+
+    assert len(windows) == 3, windows
+    splits = [core_end / SAMPLE_RATE for _, core_end, _, _ in windows[:-1]]
+    assert 58.0 <= splits[0] <= 59.0, splits
+    assert 121.0 <= splits[1] <= 122.0, splits
+
+    # Núcleos contíguos e sobreposição de 1 s nas bordas
+    assert windows[0][0] == 0 and windows[-1][1] == len(audio)
+    for (_, core_end, _, padded_end), (core_start, _, padded_start, _) in zip(windows, windows[1:]):
+        assert core_end == core_start
+        assert padded_end - core_end == SAMPLE_RATE and core_start - padded_start == SAMPLE_RATE
+
+    print(f"✅ Cortes em {[round(s, 2) for s in splits]}s")
+    return True
+
+
+def test_stitch_deduplicates_overlap():
+    """Testar que palavras da sobreposição aparecem uma única vez, com tempos globais"""
+    print("\n=== TESTANDO COSTURA DAS JANELAS ===")
+
+    def word(text, start, end):
+        return {"word": text, "start": start, "end": end, "probability": 1.0}
+
+    first = [{
+        "start": 55.0, "end": 60.8, "text": " bom dia a todos",
+        "words": [word(" bom", 55.0, 56.0), word(" dia", 56.0, 57.0),
+                  word(" a", 59.0, 59.4), word(" todos", 59.6, 60.8)],
+    }]
+    second = [{
+        "start": 59.0, "end": 62.0, "text": " a todos hoje",
+        "words": [word(" a", 59.05, 59.45), word(" todos", 59.6, 60.8), word(" hoje", 61.0, 62.0)],
+    }]
+
+    segments = stitch_windows([(0.0, 60.0, first), (60.0, 120.0, second)])
+    words = [w["word"].strip() for s in segments for w in s["words"]]
+
+    assert words == ["bom", "dia", "a", "todos", "hoje"], words
+    assert segments[0]["text"] == " bom dia a"
+    assert segments[-1]["text"] == " todos hoje"
+    assert segments[-1]["start"] == 59.6
+    print(f"✅ Palavras costuradas: {' '.join(words)}")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando transcrição em janelas...")
+
+    tests = [
+        ("Divisão em Silêncios", test_windows_split_at_silence),
+        ("Costura das Janelas", test_stitch_deduplicates_overlap),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
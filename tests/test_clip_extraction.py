@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Testes para a extração dos clipes em paralelo (pool limitado de ffmpeg)
+"""
+import sys
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from clip_extraction import (ClipExtractor, batch_command, default_workers, extract_ranges, plan_batches,
+                             run_ordered, threads_per_job, unique_path)
+
+# Codificação rápida para o benchmark (o padrão da GUI é libx264 fast/crf 23)
+BENCH_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"]
+
+
+def media_duration(path):
+    """Duração pelo cabeçalho que o ffmpeg imprime (o ffprobe nem sempre está instalado)"""
+    stderr = subprocess.run(["ffmpeg", "-hide_banner", "-i", path], capture_output=True, text=True).stderr
+    h, m, s = re.search(r"Duration: (\d+):(\d+):([\d.]+)", stderr).groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def test_pool_bounds_and_order():
+    """Testar o limite de processos, as threads por processo e a ordem dos resultados"""
+    print("=== TESTANDO POOL DE EXTRAÇÃO ===")
+
+    assert default_workers(10, cores=8) == 8 and default_workers(3, cores=8) == 3
+    assert threads_per_job(3, cores=8) == 2 and threads_per_job(16, cores=8) == 1
+
+    active, peak, completion = [0], [0], []
+    lock = threading.Lock()
+
+    def job(seconds, threads):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(seconds)
+        with lock:
+            active[0] -= 1
+        if seconds == 0.05:
+            raise RuntimeError("ffmpeg falhou")
+        return seconds, threads
+
+    durations = [0.3, 0.1, 0.2, 0.05, 0.1, 0.15]
+    started = time.perf_counter()
+    results = run_ordered(durations, job, cores=3,
+                          on_done=lambda index, result, error, done: completion.append(index))
+    elapsed = time.perf_counter() - started
+
+    assert peak[0] == 3 and elapsed < sum(durations) * 0.7, (peak, elapsed)
+    # Resultados na ordem dos jobs, mesmo terminando fora de ordem
+    assert completion != sorted(completion)
+    assert [r[0][0] if r[0] else None for r in results] == [0.3, 0.1, 0.2, None, 0.1, 0.15]
+    assert all(r[0][1] == 1 for r in results if r[0]) and str(results[3][1]) == "ffmpeg falhou"
+
+    used = set()
+    names = [unique_path(os.path.join("saida", name), used) for name in ("a.mp4", "b.mp4", "a.mp4", "a.mp4")]
+    assert names[2:] == [os.path.join("saida", "a_2.mp4"), os.path.join("saida", "a_3.mp4")], names
+    print(f"✅ {len(durations)} jobs em {elapsed:.2f}s (pico de {peak[0]}), ordem de conclusão {completion}")
+    return True
+
+
+def test_parallel_ffmpeg_cuts():
+    """Testar cortes reais com o ffmpeg pelo ClipExtractor"""
+    print("\n=== TESTANDO CORTES COM FFMPEG ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "fonte.mp4")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=8:size=160x120:rate=10",
+                        "-f", "lavfi", "-i", "sine=duration=8", "-shortest", "-y", source], check=True)
+
+        done = []
+        extractor = ClipExtractor(max_workers=2, on_done=lambda key, path, error, seconds: done.append(key))
+
+        def cut(start, output_path):
+            cmd = ["ffmpeg", "-v", "error", "-threads", str(extractor.threads), "-ss", str(start), "-i", source,
+                   "-t", "2", "-c", "copy", "-y", output_path]
+            subprocess.run(cmd, check=True)
+            return output_path
+
+        paths = [extractor.reserve_path(os.path.join(temp_dir, "clipe.mp4")) for _ in range(4)]
+        futures = [extractor.submit(i, cut, i * 2, path) for i, path in enumerate(paths)]
+        outputs = [future.result() for future in futures]
+        extractor.shutdown()
+
+        assert outputs == paths and len(set(paths)) == 4
+        assert all(os.path.getsize(path) > 0 for path in paths) and sorted(done) == [0, 1, 2, 3]
+        print(f"✅ {len(paths)} clipes: {[os.path.basename(p) for p in paths]}")
+    return True
+
+
+def test_batch_plan():
+    """Testar o agrupamento dos trechos em lotes e o grafo de filtros"""
+    print("\n=== TESTANDO LOTES ===")
+
+    ranges = [(600, 620), (100, 130), (140, 160), (3000, 3030), (170, 200)]
+    assert plan_batches(ranges, max_gap_seconds=60) == [[1, 2, 4], [0], [3]]
+    assert plan_batches(ranges, max_outputs=2, max_gap_seconds=60) == [[1, 2], [4], [0], [3]]
+
+    cmd = batch_command("fonte.mp4", [(100, 130), (140, 160)], ["a.mp4", "b.mp4"])
+    assert cmd[cmd.index("-ss") + 1] == "100.000" and cmd.index("-ss") < cmd.index("-i")
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "split=2[v0][v1]" in graph and "trim=start=40.000:end=60.000" in graph and "asplit=2" in graph
+    single = batch_command("fonte.mp4", [(100, 130)], ["a.mp4"], audio=False)
+    assert "-filter_complex" not in single and "0:a:0" not in single
+    print("✅ Trechos próximos no mesmo lote; busca antes do -i")
+    return True
+
+
+def test_bad_range_in_batch():
+    """Testar que um trecho inválido (ou uma saída que falha) não derruba os outros clipes do lote"""
+    print("\n=== TESTANDO TRECHO INVÁLIDO NO LOTE ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "fonte.mp4")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=20:size=160x120:rate=10",
+                        "-f", "lavfi", "-i", "sine=duration=20", "-c:v", "libx264", "-preset", "ultrafast",
+                        "-shortest", "-y", source], check=True)
+        ranges = [(2, 5), (6, 9), (30, 35), (12, 10), (11, 11), (15, 25)]
+        outputs = [os.path.join(temp_dir, f"clipe_{i}.mp4") for i in range(len(ranges))]
+        done = []
+        results = extract_ranges(source, ranges, outputs, BENCH_ENCODE_ARGS,
+                                 on_done=lambda index, path, error, count: done.append(index))
+
+        assert [error is None for _, error in results] == [True, True, False, False, False, True], results
+        assert all(isinstance(results[i][1], ValueError) for i in (2, 3, 4))
+        assert sorted(done) == list(range(len(ranges)))
+        # Fim além da duração: limitado aos 20 s do vídeo
+        assert abs(media_duration(results[5][0]) - 5) < 0.6
+
+        # Saída impossível de criar: o lote falha e os outros clipes saem um processo por vez
+        outputs[1] = os.path.join(temp_dir, "nao_existe", "clipe_1.mp4")
+        results = extract_ranges(source, ranges[:2], outputs[:2], BENCH_ENCODE_ARGS)
+        assert results[0] == (outputs[0], None) and results[1][0] is None
+        assert isinstance(results[1][1], RuntimeError)
+        print(f"✅ {sum(error is None for _, error in results)} clipe salvo mesmo com o lote falhando")
+    return True
+
+
+def test_batch_vs_per_clip_benchmark():
+    """Benchmark em uma fonte sintética de 1 h: por clipe (busca depois/antes do -i) x em lote"""
+    print("\n=== BENCHMARK: EXTRAÇÃO EM LOTE ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "fonte_1h.mkv")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=3600:size=32x32:rate=2",
+                        "-f", "lavfi", "-i", "sine=duration=3600:sample_rate=8000", "-c:v", "libx264",
+                        "-preset", "ultrafast", "-g", "20", "-c:a", "pcm_s16le", "-shortest", "-y", source],
+                       check=True)
+        # 6 clipes de 20 s em uma região de 3 min perto dos 40 min
+        ranges = [(2400 + i * 30, 2420 + i * 30) for i in range(6)]
+
+        def outputs(label):
+            return [os.path.join(temp_dir, f"{label}_{i}.mp4") for i in range(len(ranges))]
+
+        # Como era na GUI: -ss depois do -i, decodificando desde o início em cada clipe
+        started = time.perf_counter()
+        for (start, end), output in zip(ranges, outputs("antigo")):
+            subprocess.run(["ffmpeg", "-y", "-v", "error", "-i", source, "-ss", str(start), "-t", str(end - start)]
+                           + BENCH_ENCODE_ARGS + [output], check=True)
+        legacy = time.perf_counter() - started
+
+        timings = {}
+        for label, max_outputs in (("por_clipe", 1), ("lote", 8)):
+            started = time.perf_counter()
+            results = extract_ranges(source, ranges, outputs(label), BENCH_ENCODE_ARGS, max_outputs=max_outputs)
+            timings[label] = time.perf_counter() - started
+            assert all(error is None for _, error in results), results
+            for (start, end), (path, _) in zip(ranges, results):
+                assert abs(media_duration(path) - (end - start)) < 0.6, (path, media_duration(path))
+
+        assert timings["lote"] < legacy and timings["por_clipe"] < legacy, (legacy, timings)
+        print(f"✅ {len(ranges)} clipes: antigo {legacy:.2f}s, por clipe {timings['por_clipe']:.2f}s, "
+              f"em lote {timings['lote']:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando extração de clipes em paralelo...")
+
+    tests = [
+        ("Pool de Extração", test_pool_bounds_and_order),
+        ("Cortes com FFmpeg", test_parallel_ffmpeg_cuts),
+        ("Lotes", test_batch_plan),
+        ("Trecho Inválido no Lote", test_bad_range_in_batch),
+        ("Benchmark: Extração em Lote", test_batch_vs_per_clip_benchmark),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Testes para a detecção de clipes em map-reduce (janelas, chamadas paralelas e reduce local)
+"""
+import sys
+import os
+import json
+import random
+import threading
+import time
+from itertools import combinations
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import clip_selection
+from prompt_corte_youtube import get_reduce_prompt
+
+
+def make_segments(total_seconds, step=5):
+    return [{"start": float(t), "end": float(t + step), "text": f" trecho {t}"}
+            for t in range(0, total_seconds, step)]
+
+
+def test_windows_overlap_and_cover():
+    """Testar que as janelas cobrem toda a transcrição com sobreposição"""
+    print("=== TESTANDO DIVISÃO EM JANELAS ===")
+
+    windows = clip_selection.split_windows(make_segments(3600), window_seconds=600, overlap_seconds=60)
+
+    assert windows[0][0] == 0.0 and windows[-1][1] == 3600.0
+    for (start, end, _), (next_start, _, _) in zip(windows, windows[1:]):
+        assert end - next_start == 60.0
+    assert len(windows) == 7, [(s, e) for s, e, _ in windows]
+    print(f"✅ {len(windows)} janelas de 10 min")
+    return True
+
+
+def test_map_is_concurrent_and_bounded():
+    """Testar que as janelas são chamadas em paralelo, respeitando o limite"""
+    print("\n=== TESTANDO CHAMADAS PARALELAS ===")
+
+    windows = clip_selection.split_windows(make_segments(3600), window_seconds=600, overlap_seconds=60)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call(index, start, end, segments):
+        with lock:
+            active.append(index)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(index)
+        if index == 2:
+            raise RuntimeError("cota excedida")
+        return {"clips": [{"start": clip_selection.format_time(start + 30),
+                           "end": clip_selection.format_time(start + 90), "caption": f"janela {index}"}]}
+
+    started = time.perf_counter()
+    reports = clip_selection.map_windows(windows, call, max_concurrency=3)
+    elapsed = time.perf_counter() - started
+
+    assert max(peak) == 3, peak
+    assert elapsed < 0.05 * len(windows), elapsed
+    assert [r["index"] for r in reports] == list(range(len(windows)))
+    assert reports[2]["error"] == "cota excedida" and reports[2]["clips"] == []
+    assert all(r["latency_s"] >= 0.05 for r in reports)
+    assert clip_selection.summarize_latency(reports)["failed"] == 1
+    print(f"✅ {len(windows)} janelas em {elapsed:.2f}s com pico de {max(peak)} chamadas")
+    return True
+
+
+def test_reduce_merges_and_ranks():
+    """Testar que candidatos repetidos nas sobreposições viram um clipe só, ranqueado por votos"""
+    print("\n=== TESTANDO REDUCE LOCAL ===")
+
+    candidates = [
+        {"start": "09:10", "end": "10:30", "caption": "história (janela 1)"},
+        {"start": "09:20", "end": "10:50", "caption": "história (janela 2)"},
+        {"start": "20:00", "end": "20:40", "caption": "dica"},
+        {"start": "35:00", "end": "36:00", "caption": "piada", "importance": "alta"},
+        {"start": "50:00", "end": "50:20", "caption": "curto"},
+        {"start": "xx", "end": "01:00", "caption": "inválido"},
+    ]
+
+    clips = clip_selection.reduce_candidates(candidates, max_clips=3)
+
+    assert [c["caption"] for c in clips] == ["história (janela 2)", "dica", "piada"], clips
+    assert clips[0]["start"] == "09:20" and clips[0]["end"] == "10:50"
+
+    budget = clip_selection.reduce_candidates(candidates, max_total_seconds=150)
+    assert sum(clip_selection.parse_time(c["end"]) - clip_selection.parse_time(c["start"]) for c in budget) <= 150
+    assert clip_selection.parse_time("01:02:03") == 3723 and clip_selection.parse_time(42) == 42
+
+    # O exemplo de resposta no prompt de reduce é JSON estrito (sem o "..." de continuação)
+    prompt = get_reduce_prompt(json.dumps(candidates), max_clips=3)
+    example = prompt.split("estrutura:", 1)[1].split("RESPONDA", 1)[0].replace(",\n    ...", "")
+    assert json.loads(example)["clips"][0]["start"] == "mm:ss"
+    print(f"✅ {len(candidates)} candidatos -> {[c['caption'] for c in clips]}")
+    return True
+
+
+def test_duration_knapsack():
+    """Testar a seleção do resumo: ótima, dentro da duração, cronológica, com intervalo e reproduzível"""
+    print("\n=== TESTANDO SELEÇÃO PELA DURAÇÃO ===")
+
+    rng = random.Random(7)
+    candidates = []
+    for _ in range(12):
+        start = rng.randrange(0, 1800)
+        candidates.append({"start": start, "end": start + rng.randrange(20, 240),
+                           "importance": rng.choice(["alta", "média", "baixa"])})
+
+    def feasible(subset, gap):
+        spans = sorted((c["start"], c["end"]) for c in subset)
+        return all(b[0] - a[1] >= gap for a, b in zip(spans, spans[1:]))
+
+    for budget, gap in ((300, 0), (600, 5), (900, 30)):
+        clips, stats = clip_selection.select_for_duration(candidates, budget, min_gap_seconds=gap)
+        spans = [(clip_selection.parse_time(c["start"]), clip_selection.parse_time(c["end"])) for c in clips]
+        assert spans == sorted(spans) and sum(e - s for s, e in spans) <= budget
+        assert all(b[0] - a[1] >= gap for a, b in zip(spans, spans[1:])), spans
+
+        # Força bruta sobre todos os subconjuntos
+        optimum = max(sum(clip_selection.clip_value(c) for c in subset)
+                      for size in range(len(candidates) + 1) for subset in combinations(candidates, size)
+                      if sum(c["end"] - c["start"] for c in subset) <= budget and feasible(subset, gap))
+        assert stats["value"] == optimum, (stats, optimum)
+        assert clip_selection.select_for_duration(candidates, budget, min_gap_seconds=gap)[0] == clips
+
+    # Vídeo de 3 h com 300 candidatos e resumo de 30 min: bem abaixo de um segundo
+    many = [{"start": t, "end": t + rng.randrange(15, 120), "score": rng.uniform(-2, 3)}
+            for t in sorted(rng.sample(range(0, 3 * 3600), 300))]
+    _, stats = clip_selection.select_for_duration(many, 30 * 60, min_gap_seconds=2)
+    assert stats["elapsed_ms"] < 1000 and 0.9 * 1800 <= stats["selected_s"] <= 1800, stats
+    print(f"✅ Ótimo igual à força bruta; 300 candidatos em {stats['elapsed_ms']:.0f} ms "
+          f"({stats['selected_s'] / 60:.1f} de 30 min)")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando map-reduce de clipes...")
+
+    tests = [
+        ("Divisão em Janelas", test_windows_overlap_and_cover),
+        ("Chamadas Paralelas", test_map_is_concurrent_and_bounded),
+        ("Reduce Local", test_reduce_merges_and_ranks),
+        ("Seleção pela Duração", test_duration_knapsack),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Testes para a validação dos tempos dos clipes e o prompt de correção
+"""
+import sys
+import os
+import json
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from clip_validation import parse_clip_time, repair_clips, validate_clips
+
+
+def make_segments(total_seconds=600, step=6.0):
+    return [{"start": t + 0.4, "end": t + step - 0.3, "text": f" frase {int(t)}"}
+            for t in range(0, total_seconds, int(step))]
+
+
+def test_parse_clip_time():
+    """Testar a leitura estrita dos tempos"""
+    print("=== TESTANDO LEITURA DOS TEMPOS ===")
+
+    assert parse_clip_time("75:30") == 4530
+    assert parse_clip_time("01:15:30") == 4530
+    assert parse_clip_time("02:03.5") == 123.5 and parse_clip_time(42) == 42
+    for bad in ("12:75", "1:75:00", "-00:10", "abc", "", "1::2", True):
+        try:
+            parse_clip_time(bad)
+            assert False, f"{bad!r} deveria ser rejeitado"
+        except ValueError:
+            pass
+    print("✅ Minutos acima de 59 aceitos; segundos >= 60, negativos e texto rejeitados")
+    return True
+
+
+def test_validate_clamp_snap_merge():
+    """Testar a duração do vídeo, o ajuste às bordas da transcrição e a junção de sobreposições"""
+    print("\n=== TESTANDO VALIDAÇÃO ===")
+
+    clips = [
+        {"start": "09:00", "end": "11:30", "caption": "passa do fim"},
+        {"start": "01:00", "end": "01:50", "caption": "primeiro"},
+        {"start": "01:30", "end": "02:20", "caption": "sobreposto"},
+        {"start": "04:00", "end": "03:00", "caption": "invertido"},
+        {"start": "12:00", "end": "12:30", "caption": "depois do fim"},
+        {"start": "05:10", "end": "05:75", "caption": "segundos inválidos"},
+        {"start": "06:00", "end": "06:01", "caption": "curto"},
+    ]
+    valid, failures, report = validate_clips(clips, duration=600.0, segments=make_segments())
+
+    assert [c["caption"] for c in valid] == ["primeiro", "passa do fim"], valid
+    # Juntado com o sobreposto; o fim que passava da duração foi ajustado ao último segmento (599,7 s)
+    assert valid[0]["start"] == "01:00" and valid[0]["end"] == "02:20", valid[0]
+    assert valid[1]["start"] == "09:00" and valid[1]["end"] == "10:00"
+    assert sorted(c["caption"] for c, _ in failures) == ["curto", "depois do fim", "invertido",
+                                                          "segundos inválidos"]
+    assert report["clamped"] == 1 and report["merged"] == 1 and report["invalid"] == 4, report
+
+    # Validar de novo não muda nada
+    again, _, _ = validate_clips([dict(c) for c in valid], duration=600.0, segments=make_segments())
+    assert again == valid
+
+    # Clipe já cortado (travado) não muda; quem termina dentro dele é encurtado
+    cut = {"start": "03:00", "end": "04:00", "caption": "já cortado"}
+    other = {"start": "02:00", "end": "03:30", "caption": "depois"}
+    valid, _, _ = validate_clips([other, cut], duration=600.0, locked={id(cut)})
+    assert valid == [other, cut] and cut["end"] == "04:00" and other["end"] == "03:00", valid
+
+    # O ajuste às bordas não é idempotente (início truncado): o clipe travado não passa por ele de novo
+    segments = [{"start": 11.5, "end": 12.8, "text": "a"}, {"start": 12.9, "end": 20.0, "text": "b"}]
+    cut = {"start": "00:12.8", "end": "00:20", "caption": "já cortado"}
+    assert validate_clips([cut], duration=600.0, segments=segments)[0][0]["start"] == "00:12"
+    validate_clips([cut], duration=600.0, segments=segments, locked={id(cut)})
+    assert cut["start"] == "00:12", cut
+
+    # Encurtado abaixo do mínimo: descartado em vez de virar um clipe de 1 s
+    cut = {"start": "03:00", "end": "04:00", "caption": "já cortado"}
+    other = {"start": "02:59", "end": "03:30", "caption": "quase igual"}
+    valid, _, report = validate_clips([other, cut], duration=600.0, locked={id(cut)})
+    assert valid == [cut] and report["merged"] == 1, valid
+    print(f"✅ {report}")
+    return True
+
+
+def test_repair_budget():
+    """Testar que só as falhas vão para o prompt de correção, com tentativas limitadas"""
+    print("\n=== TESTANDO CORREÇÃO PELO LLM ===")
+
+    failures = [({"start": "05:10", "end": "05:75", "caption": "segundos inválidos"}, "segundos fora de 00-59")]
+    prompts = []
+
+    def still_wrong(prompt):
+        prompts.append(prompt)
+        return {"clips": [{"start": "05:10", "end": "05:99", "caption": "segundos inválidos"}]}
+
+    repaired, remaining = repair_clips(failures, still_wrong, duration=600.0, attempts=2)
+    assert repaired == [] and len(remaining) == 1 and len(prompts) == 2
+    assert "05:75" in prompts[0] and "10:00" in prompts[0] and "segundos fora de 00-59" in prompts[0]
+    # O exemplo de resposta no prompt é JSON estrito (sem o "..." de continuação)
+    example = prompts[0].split("estrutura:", 1)[1].split("RESPONDA", 1)[0].replace(",\n    ...", "")
+    assert json.loads(example)["clips"][0]["caption"] == "legenda do clip"
+
+    def fixed(prompt):
+        prompts.append(prompt)
+        return {"clips": [{"start": "05:10", "end": "05:45", "caption": "segundos inválidos"}]}
+
+    prompts.clear()
+    repaired, remaining = repair_clips(failures, fixed, duration=600.0, attempts=3)
+    assert len(prompts) == 1 and remaining == [] and repaired[0]["end"] == "05:45"
+    print("✅ Tentativas limitadas; clipe corrigido na primeira resposta válida")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando validação de clipes...")
+
+    tests = [
+        ("Leitura dos Tempos", test_parse_clip_time),
+        ("Validação", test_validate_clamp_snap_merge),
+        ("Correção pelo LLM", test_repair_budget),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Testes para a execução do ffmpeg com progresso (-progress pipe:1)
+"""
+import sys
+import os
+import shutil
+import tempfile
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from ffmpeg_runner import format_progress, out_seconds, progress_event, run_ffmpeg
+
+
+def test_progress_event():
+    """Testar porcentagem, velocidade e ETA a partir de um bloco do -progress"""
+    print("=== TESTANDO EVENTOS DE PROGRESSO ===")
+
+    block = {"frame": "750", "fps": "50.00", "out_time_us": "30000000", "out_time": "00:00:30.000000",
+             "speed": "2.00x", "progress": "continue"}
+    event = progress_event(block, duration=120, elapsed=15)
+    assert event["percent"] == 25 and event["speed"] == 2 and event["eta"] == 45 and event["frame"] == 750
+    assert format_progress(event) == "25% · 50 fps · 2.00x · ETA 00:45"
+
+    # Sem "speed" (N/A) a velocidade vem do tempo decorrido; sem duração, só a posição
+    event = progress_event({"out_time": "00:01:00.000000", "speed": "N/A", "progress": "continue"},
+                           duration=240, elapsed=30)
+    assert event["speed"] == 2 and event["eta"] == 90
+    assert progress_event({"out_time_us": "5000000"})["percent"] is None
+    assert out_seconds({"out_time_us": "N/A", "out_time": "01:00:01.5"}) == 3601.5
+
+    done = progress_event({"out_time_us": "119000000", "progress": "end"}, duration=120, elapsed=60)
+    assert done["done"] and done["percent"] == 100 and done["eta"] == 0
+    print(f"✅ {format_progress(event)} / {format_progress(done)}")
+    return True
+
+
+def test_run_with_progress():
+    """Testar eventos durante uma renderização real e o final limitado do stderr"""
+    print("\n=== TESTANDO EXECUÇÃO COM PROGRESSO ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, "saida.mp4")
+        events = []
+        cmd = ["ffmpeg", "-y", "-f", "lavfi", "-i", "testsrc=duration=20:size=320x180:rate=25",
+               "-c:v", "libx264", "-preset", "medium", output]
+        returncode, tail = run_ffmpeg(cmd, duration=20, on_progress=events.append)
+
+        assert returncode == 0 and os.path.getsize(output) > 0
+        assert events and events[-1]["done"] and events[-1]["percent"] == 100
+        percents = [e["percent"] for e in events]
+        assert percents == sorted(percents), percents
+        # Só o final do stderr fica guardado
+        assert len(tail.splitlines()) <= 50
+
+        returncode, tail = run_ffmpeg(["ffmpeg", "-i", os.path.join(temp_dir, "nao_existe.mp4"), output],
+                                      tail_lines=3)
+        assert returncode != 0 and "nao_existe" in tail and len(tail.splitlines()) <= 3
+        print(f"✅ {len(events)} eventos; último: {format_progress(events[-1])}")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando execução do ffmpeg com progresso...")
+
+    tests = [
+        ("Eventos de Progresso", test_progress_event),
+        ("Execução com Progresso", test_run_with_progress),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
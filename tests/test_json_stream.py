@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Testes para a análise incremental e tolerante do JSON de clipes
+"""
+import sys
+import os
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from json_stream import ClipStreamParser, loads_tolerant, parse_clip_response
+
+RESPONSE = """```json
+{
+  "clips": [
+    {"start": "00:10", "end": "00:55", "caption": "Primeiro {clipe}", "reason": "tem \\"aspas\\" e ]"},
+    {"start": "02:00", "end": "02:40", "caption": "Segundo", "reason": "pergunta?"},
+    {"start": "05:00", "end": "05:45", "caption": "Terceiro", "reason": "final"}
+  ]
+}
+```"""
+
+
+def test_clips_yielded_as_they_close():
+    """Testar que cada clipe sai do parser assim que o objeto fecha"""
+    print("=== TESTANDO ANÁLISE INCREMENTAL ===")
+
+    parser = ClipStreamParser()
+    first_at = None
+    for i in range(0, len(RESPONSE), 7):
+        found = parser.feed(RESPONSE[i:i + 7])
+        if found and first_at is None:
+            first_at = i + 7
+            assert found[0]["caption"] == "Primeiro {clipe}"
+            # O segundo clipe ainda não terminou de chegar
+            assert "Terceiro" not in parser.text
+
+    assert [clip["start"] for clip in parser.clips] == ["00:10", "02:00", "05:00"]
+    document = parser.close()
+    assert document["clips"][0] is parser.clips[0]
+    print(f"✅ Primeiro clipe entregue após {first_at} de {len(RESPONSE)} caracteres")
+    return True
+
+
+def test_truncated_and_trailing_commas():
+    """Testar a recuperação de respostas truncadas e com vírgulas sobrando"""
+    print("\n=== TESTANDO RESPOSTAS MALFORMADAS ===")
+
+    assert loads_tolerant('{"clips": [{"start": "00:01", "end": "00:09",},],}') == {
+        "clips": [{"start": "00:01", "end": "00:09"}]}
+
+    truncated = RESPONSE[:RESPONSE.index('"Terceiro"') + 5]
+    document = parse_clip_response(truncated)
+    assert [clip["caption"] for clip in document["clips"]] == ["Primeiro {clipe}", "Segundo"], document
+
+    # Truncado no meio do segundo clipe: só o primeiro está completo
+    cut = RESPONSE[:RESPONSE.index('"end": "02:40"')]
+    assert len(parse_clip_response(cut)["clips"]) == 1
+
+    parser = ClipStreamParser()
+    parser.feed(truncated)
+    assert len(parser.close()["clips"]) == 2
+    assert parse_clip_response("Não encontrei clipes.") is None
+
+    # Colchetes no texto antes do JSON não viram a raiz
+    prefixed = 'Resposta [formato JSON]: {"clips":[{"start":"1:00","end":"1:20"}]}'
+    assert parse_clip_response(prefixed)["clips"] == [{"start": "1:00", "end": "1:20"}]
+    parser = ClipStreamParser()
+    streamed = [clip for i in range(0, len(prefixed), 5) for clip in parser.feed(prefixed[i:i + 5])]
+    assert streamed == [{"start": "1:00", "end": "1:20"}] and parser.close()["clips"] == streamed
+    print("✅ Clipes completos recuperados de respostas truncadas")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando análise do JSON em streaming...")
+
+    tests = [
+        ("Análise Incremental", test_clips_yielded_as_they_close),
+        ("Respostas Malformadas", test_truncated_and_trailing_commas),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
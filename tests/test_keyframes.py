@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Testes para o índice de keyframes e o corte smart render
+"""
+import sys
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from keyframes import KeyframeIndex, keyframe_before, plan_smart_cut, smart_cut, stream_info
+
+
+def frame_hashes(path):
+    """MD5 de cada quadro decodificado do vídeo"""
+    stdout = subprocess.run(["ffmpeg", "-v", "error", "-i", path, "-map", "0:v:0", "-f", "framemd5", "-"],
+                            capture_output=True, text=True, check=True).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in stdout.splitlines() if not line.startswith("#")]
+
+
+def make_source(temp_dir):
+    """20 s a 25 fps com um keyframe a cada 2 s, com áudio"""
+    source = os.path.join(temp_dir, "fonte.mp4")
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=20:size=160x120:rate=25",
+                    "-f", "lavfi", "-i", "sine=duration=20", "-c:v", "libx264", "-preset", "ultrafast",
+                    "-g", "50", "-keyint_min", "50", "-sc_threshold", "0", "-c:a", "aac", "-shortest", "-y",
+                    source], check=True)
+    return source
+
+
+def test_cut_plan():
+    """Testar a divisão do clipe em bordas reencodadas e meio copiado"""
+    print("=== TESTANDO PLANO DO CORTE ===")
+
+    keyframes = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+    assert plan_smart_cut(keyframes, 3.3, 9.7) == [("encode", 3.3, 4.0), ("copy", 4.0, 8.0), ("encode", 8.0, 9.7)]
+    assert plan_smart_cut(keyframes, 4.0, 8.0) == [("copy", 4.0, 8.0)]
+    # Sem dois keyframes dentro do clipe: tudo reencodado
+    assert plan_smart_cut(keyframes, 0.5, 3.9) == [("encode", 0.5, 3.9)]
+    assert plan_smart_cut(keyframes, 3.5, 6.2, min_copy_seconds=3) == [("encode", 3.5, 6.2)]
+    assert keyframe_before(keyframes, 3.3) == 2.0 and keyframe_before(keyframes, 4.0) == 4.0
+    print("✅ Bordas até os keyframes reencodadas, GOPs do meio copiados")
+    return True
+
+
+def test_index_and_smart_cut():
+    """Testar o índice (com cache) e o corte exato: quadros do meio idênticos aos do original"""
+    print("\n=== TESTANDO ÍNDICE E SMART RENDER ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_source(temp_dir)
+        index = KeyframeIndex(cache_dir=os.path.join(temp_dir, "cache"))
+        keyframes = index.get(source)
+        assert keyframes == [float(t) for t in range(0, 20, 2)], keyframes
+        assert index.get(source) == keyframes and index.stats()["hits"] == 1
+
+        info = stream_info(source)
+        assert info["codec"] == "h264" and info["audio"]
+        original = frame_hashes(source)
+
+        output = os.path.join(temp_dir, "clipe.mp4")
+        started = time.perf_counter()
+        smart_cut(source, 3.3, 9.7, output, keyframes, info)
+        smart = time.perf_counter() - started
+        frames = frame_hashes(output)
+
+        # 3,32 s (primeiro quadro a partir do corte) até 9,68 s: 160 quadros
+        assert len(frames) == 160, len(frames)
+        # De 4 s a 8 s (quadros 100 a 199) copiados sem reencodar
+        assert frames[17:117] == original[100:200]
+        stderr = subprocess.run(["ffmpeg", "-hide_banner", "-i", output], capture_output=True, text=True).stderr
+        assert "Audio:" in stderr and re.search(r"Duration: 00:00:06\.[34]", stderr), stderr
+
+        # Referência: o clipe inteiro reencodado
+        started = time.perf_counter()
+        subprocess.run(["ffmpeg", "-v", "error", "-ss", "3.3", "-i", source, "-t", "6.4", "-c:v", "libx264",
+                        "-preset", "veryfast", "-crf", "18", "-c:a", "aac", "-y",
+                        os.path.join(temp_dir, "inteiro.mp4")], check=True)
+        full = time.perf_counter() - started
+        print(f"✅ {len(keyframes)} keyframes; 160 quadros, 100 copiados; smart {smart:.2f}s x reencodado {full:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando índice de keyframes e smart render...")
+
+    tests = [
+        ("Plano do Corte", test_cut_plan),
+        ("Índice e Smart Render", test_index_and_smart_cut),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Testes para o cache em disco das respostas do LLM
+"""
+import sys
+import os
+import time
+import tempfile
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from llm_cache import LLMResponseCache
+
+
+PROMPT = """
+Aqui está uma transcrição com carimbos de tempo:
+
+[00:00 - 00:05]  Olá   pessoal
+"""
+
+
+def test_cache_key_and_counters():
+    """Testar chave por (modelo, prompt normalizado, parâmetros) e contadores"""
+    print("=== TESTANDO CHAVE E CONTADORES ===")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = LLMResponseCache(cache_dir=temp_dir)
+        parsed = {"clips": [{"start": "00:00", "end": "00:05", "caption": "Olá"}]}
+
+        assert cache.get("gemini-2.0-flash", PROMPT) is None
+        cache.put("gemini-2.0-flash", PROMPT, '{"clips": [...]}', parsed)
+
+        # Espaços extras não mudam a chave; modelo e parâmetros mudam
+        reformatted = "\n".join(line.strip() for line in PROMPT.splitlines()).replace("Olá   pessoal", "Olá pessoal")
+        assert cache.get("gemini-2.0-flash", reformatted)["parsed"] == parsed
+        assert cache.get("gemini-1.5-pro", PROMPT) is None
+        assert cache.get("gemini-2.0-flash", PROMPT, {"temperature": 0.2}) is None
+        assert cache.get("gemini-2.0-flash", PROMPT)["text"] == '{"clips": [...]}'
+
+        stats = cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 3, stats
+        print(f"✅ {cache.format_stats()}")
+
+    return True
+
+
+def test_cache_ttl_expires():
+    """Testar que respostas mais antigas que o TTL são descartadas"""
+    print("\n=== TESTANDO EXPIRAÇÃO (TTL) ===")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = LLMResponseCache(cache_dir=temp_dir, ttl_hours=0.3 / 3600)
+        cache.put("gemini-2.0-flash", PROMPT, "{}", {"clips": []})
+        assert cache.get("gemini-2.0-flash", PROMPT) is not None
+
+        time.sleep(0.4)
+        assert cache.get("gemini-2.0-flash", PROMPT) is None
+        assert cache.stats()["evictions"] == 1
+
+        # TTL 0: toda resposta em cache já está vencida (não "nunca expira")
+        stale = LLMResponseCache(cache_dir=os.path.join(temp_dir, "zero"), ttl_hours=0)
+        stale.put("gemini-2.0-flash", PROMPT, "{}", {"clips": []})
+        assert stale.get("gemini-2.0-flash", PROMPT) is None
+        print("✅ Entrada expirada removida")
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando cache do LLM...")
+
+    tests = [
+        ("Chave e Contadores", test_cache_key_and_counters),
+        ("Expiração (TTL)", test_cache_ttl_expires),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Testes para o cliente LLM compartilhado (novas tentativas, limite de cota e fila justa)
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from llm_client import FairQueue, LLMClient, LLMError, RateLimiter, estimate_timeout
+from llm_standin_server import start_server
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Responde 429 nas duas primeiras requisições e depois no formato do Gemini/OpenAI"""
+
+    calls = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FlakyHandler.calls.append((self.path, dict(self.headers), body))
+
+        if "cortado" in self.path:
+            # Chunked com o corpo cortado no meio: um evento inteiro e depois a conexão cai
+            event = json.dumps({"candidates": [{"content": {"parts": [{"text": "um "}]}}]})
+            first = f"data: {event}\r\n\r\n".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(f"{len(first):x}\r\n".encode() + first + b"\r\n")
+            self.wfile.write(b"400\r\ndata: {\"candid")
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        if "streamGenerateContent" in self.path:
+            # Um evento SSE por palavra, no formato do Gemini
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in body["contents"][0]["parts"][0]["text"].split():
+                event = {"candidates": [{"content": {"parts": [{"text": word + " "}]}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                self.wfile.flush()
+            return
+        if "fail" in self.path:
+            self.send_response(400)
+            self.end_headers()
+            return
+        if len(FlakyHandler.calls) <= 2:
+            self.send_response(429)
+            self.send_header("Retry-After", "0.05")
+            self.end_headers()
+            return
+
+        if self.path.endswith(":generateContent"):
+            text = body["contents"][0]["parts"][0]["text"].upper()
+            payload = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        else:
+            payload = {"choices": [{"message": {"content": body["messages"][0]["content"].upper()}}]}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_retry_on_429():
+    """Testar novas tentativas em 429 (respeitando Retry-After) e erros não recuperáveis"""
+    print("=== TESTANDO NOVAS TENTATIVAS ===")
+
+    FlakyHandler.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        client = LLMClient(max_concurrency=2, base_delay=0.01)
+        text = client.complete("gemini", "gemini-2.0-flash", "olá", api_key="chave", base_url=base_url)
+        assert text == "OLÁ", text
+        assert len(FlakyHandler.calls) == 3
+        path, headers, _ = FlakyHandler.calls[-1]
+        assert path == "/v1beta/models/gemini-2.0-flash:generateContent"
+        assert headers["x-goog-api-key"] == "chave"
+
+        text = client.complete("openai", "gpt-4", "oi", api_key="sk", params={"temperature": 0.7},
+                               base_url=base_url)
+        _, headers, body = FlakyHandler.calls[-1]
+        assert text == "OI" and headers["Authorization"] == "Bearer sk" and body["temperature"] == 0.7
+
+        try:
+            client.complete("openai", "fail", "oi", base_url=base_url + "/fail")
+            assert False, "erro 400 deveria ser repassado"
+        except LLMError as e:
+            assert e.status == 400 and not e.retryable
+
+        stats = client.stats()
+        assert stats["retries"] == 2 and stats["failures"] == 1, stats
+        print(f"✅ {client.format_stats()}")
+    finally:
+        server.shutdown()
+
+    return True
+
+
+def test_streaming():
+    """Testar a geração em streaming (SSE), entregue em pedaços"""
+    print("\n=== TESTANDO STREAMING ===")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        client = LLMClient(max_concurrency=2)
+        chunks = list(client.stream("gemini", "gemini-2.0-flash", "um dois três ação", base_url=base_url))
+        assert chunks == ["um ", "dois ", "três ", "ação "], chunks
+
+        # Corpo truncado no meio: o erro vira LLMError sem nova tentativa (o texto já foi entregue)
+        received = []
+        try:
+            for chunk in client.stream("gemini", "gemini-2.0-flash", "x", base_url=base_url + "/cortado"):
+                received.append(chunk)
+            assert False, "stream truncado deveria falhar"
+        except LLMError as e:
+            assert not e.retryable
+        assert received == ["um "], received
+        assert client.stats()["retries"] == 0
+        print(f"✅ {len(chunks)} pedaços recebidos em streaming; corpo truncado vira LLMError")
+    finally:
+        server.shutdown()
+
+    return True
+
+
+def test_local_provider():
+    """Testar o provedor local: protocolo da OpenAI, tempo limite pelo prompt e limite de simultâneas"""
+    print("\n=== TESTANDO PROVEDOR LOCAL ===")
+
+    short, long = "[0-30] oi", "[0-30] " + "palavra " * 20000
+    assert estimate_timeout("local", long) > estimate_timeout("local", short) > 30
+    assert estimate_timeout("openai", long) == estimate_timeout("openai", short)
+
+    server = start_server(latency_ms=100)
+    try:
+        client = LLMClient(max_concurrency=8)
+
+        def run_batch():
+            started = time.monotonic()
+            threads = [threading.Thread(target=client.complete, args=("local", "qwen", short),
+                                        kwargs={"base_url": server.base_url}) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return time.monotonic() - started
+
+        # Um servidor local atende uma requisição por vez por padrão
+        serial = run_batch()
+        client.set_concurrency("local", 4)
+        parallel = run_batch()
+        assert serial >= 0.4 and parallel < serial * 0.6, (serial, parallel)
+        assert server.counters["ok"] == 8
+        print(f"✅ 4 requisições: {serial:.2f}s com 1 vaga, {parallel:.2f}s com 4 vagas")
+    finally:
+        server.shutdown()
+
+    return True
+
+
+def test_rate_limiter_and_fairness():
+    """Testar o limite de tokens/min e o rodízio entre vídeos"""
+    print("\n=== TESTANDO LIMITE DE COTA E FILA JUSTA ===")
+
+    async def run():
+        # 6000 tokens/min = 100 tokens/s: depois de esgotar o balde, 20 tokens esperam ~0,2s
+        limiter = RateLimiter(tpm=6000)
+        assert await limiter.acquire(6000) == 0
+        start = time.monotonic()
+        await limiter.acquire(20)
+        waited = time.monotonic() - start
+        assert 0.15 <= waited < 0.5, waited
+
+        queue = FairQueue()
+        for i in range(3):
+            queue.put("video_a", f"a{i}")
+        queue.put("video_b", "b0")
+        queue.put("video_c", "c0")
+        order = [await queue.get() for _ in range(5)]
+        assert order == ["a0", "b0", "c0", "a1", "a2"], order
+        return waited
+
+    waited = asyncio.run(run())
+    print(f"✅ Espera de {waited:.2f}s pelo limite; pedidos atendidos em rodízio")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando cliente LLM...")
+
+    tests = [
+        ("Novas Tentativas", test_retry_on_429),
+        ("Streaming", test_streaming),
+        ("Provedor Local", test_local_provider),
+        ("Limite de Cota e Fila Justa", test_rate_limiter_and_fairness),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes para o servidor local que imita as APIs do Gemini e da OpenAI
+"""
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from llm_standin_server import deterministic_clips, start_server
+from llm_client import LLMClient
+from json_stream import ClipStreamParser
+from clip_selection import parse_time
+from transcript_encoder import encode_transcript
+from prompt_corte_youtube import get_clip_detection_prompt
+
+
+def make_prompt(minutes=20):
+    segments = [{"start": i * 6.0, "end": i * 6.0 + 5.5, "text": f" Frase número {i} sobre o assunto {i % 7}."}
+                for i in range(int(minutes * 10))]
+    transcript, _ = encode_transcript(segments)
+    return get_clip_detection_prompt(transcript, 2, 5)
+
+
+def test_deterministic_clips():
+    """Testar clipes determinísticos tirados dos tempos do prompt (ou estimados em texto corrido)"""
+    print("=== TESTANDO CLIPES DETERMINÍSTICOS ===")
+
+    prompt = make_prompt()
+    clips = deterministic_clips(prompt)["clips"]
+    assert clips and clips == deterministic_clips(prompt)["clips"]
+    for clip in clips:
+        start, end = parse_time(clip["start"]), parse_time(clip["end"])
+        assert 0 <= start < end <= 20 * 60, clip
+
+    plain_prompt = "Transcrição do vídeo:\n" + "palavra " * 2000 + "\n- Gere entre 2 e 4 clipes\n" \
+                   "- Cada clipe deve ter no máximo 30 segundos\n"
+    plain_clips = deterministic_clips(plain_prompt)["clips"]
+    assert len(plain_clips) == 4 and all(c["end_time"] - c["start_time"] == 30 for c in plain_clips)
+    print(f"✅ {len(clips)} clipes (com tempos) e {len(plain_clips)} clipes (texto corrido), iguais a cada chamada")
+    return True
+
+
+def test_throughput_with_injected_faults():
+    """Medir vazão e novas tentativas com latência, 429 e respostas truncadas"""
+    print("\n=== TESTANDO VAZÃO COM FALHAS INJETADAS ===")
+
+    server = start_server(latency_ms=50, rate_429=0.3, rate_truncate=0.2, retry_after=0.01, seed=1)
+    try:
+        client = LLMClient(max_concurrency=8, base_delay=0.01)
+        client.set_limits("gemini", "bench")
+        prompts = [make_prompt(minutes=10 + i) for i in range(16)]
+
+        def run(prompt):
+            parser = ClipStreamParser()
+            for chunk in client.stream("gemini", "bench", prompt, base_url=server.base_url, job_id=prompt[-40:]):
+                parser.feed(chunk)
+            return parser.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(run, prompts))
+        elapsed = time.perf_counter() - started
+
+        counters = server.counters
+        assert all(result and result["clips"] for result in results), results
+        assert counters["429"] > 0 and counters["truncated"] > 0, counters
+        assert client.stats()["retries"] == counters["429"], (client.stats(), counters)
+        print(f"✅ {len(prompts)} prompts em {elapsed:.2f}s ({len(prompts) / elapsed:.1f}/s), "
+              f"{counters['429']} respostas 429 e {counters['truncated']} truncadas recuperadas")
+    finally:
+        server.shutdown()
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando servidor LLM local...")
+
+    tests = [
+        ("Clipes Determinísticos", test_deterministic_clips),
+        ("Vazão com Falhas Injetadas", test_throughput_with_injected_faults),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
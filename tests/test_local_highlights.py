@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Testes para a seleção local de destaques (sem LLM)
+"""
+import sys
+import os
+import time
+
+import numpy as np
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from local_highlights import find_highlights
+from clip_selection import parse_time
+
+
+def make_long_transcript(hours=3, hot_start=5400):
+    """Transcrição sintética longa com um trecho marcante (rápido, com perguntas e assunto novo)"""
+    segments = []
+    for i in range(int(hours * 3600 / 5)):
+        start = i * 5.0
+        if hot_start <= start < hot_start + 45:
+            text = " Vocês sabiam disso? Criptomoedas despencaram! Bitcoin, ethereum, solana, tudo caiu!"
+        else:
+            text = " Então a gente continua falando sobre o mesmo tema aqui no programa"
+        words = text.split()
+        step = 4.5 / len(words)
+        segments.append({
+            "start": start, "end": start + 4.5, "text": text,
+            "words": [{"start": start + k * step, "end": start + (k + 1) * step, "word": w}
+                      for k, w in enumerate(words)],
+        })
+    return segments
+
+
+def test_long_transcript_text_only():
+    """Testar esquema, janelas sem sobreposição e tempo em uma transcrição de 3 h"""
+    print("=== TESTANDO TRANSCRIÇÃO DE 3 HORAS ===")
+
+    segments = make_long_transcript()
+    started = time.perf_counter()
+    result = find_highlights(segments, clip_seconds=45, max_clips=5)
+    elapsed = time.perf_counter() - started
+
+    clips = result["clips"]
+    assert len(clips) == 5
+    assert all({"start", "end", "caption", "reason", "importance"} <= set(clip) for clip in clips)
+    spans = [(parse_time(c["start"]), parse_time(c["end"])) for c in clips]
+    assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(spans, spans[1:])), spans
+
+    best = max(clips, key=lambda c: c["score"])
+    assert abs(parse_time(best["start"]) - 5400) <= 10, best
+    assert best["importance"] == "alta" and "Criptomoedas" in best["caption"]
+    assert elapsed < 5, elapsed
+    print(f"✅ {len(clips)} trechos em {elapsed:.2f}s; melhor em {best['start']} ({best['reason']})")
+    return True
+
+
+def test_audio_features_find_expressive_section():
+    """Testar que volume e entonação destacam o trecho mais expressivo quando o texto é neutro"""
+    print("\n=== TESTANDO CARACTERÍSTICAS DE ÁUDIO ===")
+
+    sr = 16000
+    t = np.arange(60 * sr) / sr
+    # Voz monótona (120 Hz, baixa) com 10 s altos e de entonação variável a partir de 30 s
+    pitch = np.where((t >= 30) & (t < 40), 160 + 80 * np.sin(2 * np.pi * 1.5 * t), 120)
+    amplitude = np.where((t >= 30) & (t < 40), 0.5, 0.05)
+    audio = (amplitude * np.sign(np.sin(2 * np.pi * np.cumsum(pitch) / sr))).astype(np.float32)
+
+    segments = [{"start": float(s), "end": s + 1.9, "text": " o mesmo texto de sempre"} for s in range(0, 60, 2)]
+    result = find_highlights(segments, audio=audio, sample_rate=sr, clip_seconds=10, max_clips=1)
+
+    assert "pitch_var" in result["local_engine"]["features"]
+    start = parse_time(result["clips"][0]["start"])
+    assert 28 <= start <= 32, result["clips"]
+    print(f"✅ Trecho escolhido em {result['clips'][0]['start']}: {result['clips'][0]['reason']}")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando seleção local de destaques...")
+
+    tests = [
+        ("Transcrição de 3 Horas", test_long_transcript_text_only),
+        ("Características de Áudio", test_audio_features_find_expressive_section),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Testes para a sondagem de mídia com cache
+"""
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import media_probe
+from media_probe import MediaProbe, first_stream, parse_ffmpeg_listing
+
+LISTING = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'entrevista.mp4':
+  Metadata:
+    major_brand     : isom
+  Duration: 01:02:03.50, start: 1.400000, bitrate: 2500 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(tv, bt709, progressive), 1920x1080 [SAR 1:1 DAR 16:9], 2300 kb/s, 29.97 fps, 29.97 tbr, 30k tbn (default)
+  Stream #0:1[0x2](eng): Audio: aac (LC) (mp4a / 0x6134706D), 48000 Hz, 5.1, fltp, 192 kb/s (default)
+At least one output file must be specified
+"""
+
+
+def test_parse_listing():
+    """Testar a leitura da listagem do ffmpeg (usada quando não há ffprobe)"""
+    print("=== TESTANDO LEITURA DA LISTAGEM ===")
+
+    info = parse_ffmpeg_listing(LISTING)
+    assert info["duration"] == 3723.5 and info["start"] == 1.4 and info["bit_rate"] == 2500000
+    video, audio = first_stream(info, "video"), first_stream(info, "audio")
+    assert (video["codec"], video["width"], video["height"]) == ("h264", 1920, 1080)
+    assert video["pix_fmt"] == "yuv420p" and video["fps"] == 29.97
+    assert (audio["codec"], audio["sample_rate"], audio["channels"]) == ("aac", 48000, 6)
+    try:
+        parse_ffmpeg_listing("x.mp4: No such file or directory")
+        assert False, "listagem sem entrada deveria falhar"
+    except RuntimeError:
+        pass
+    print(f"✅ {video['width']}x{video['height']} {video['codec']} + {audio['codec']} {audio['channels']} canais")
+    return True
+
+
+def test_probe_cache():
+    """Testar uma sondagem por arquivo: memória, disco e invalidação por tamanho/mtime"""
+    print("\n=== TESTANDO CACHE DA SONDAGEM ===")
+
+    if not shutil.which("ffmpeg"):
+        print("⚠️ FFmpeg não encontrado, pulando teste")
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "fonte.mp4")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=3:size=320x180:rate=10",
+                        "-f", "lavfi", "-i", "sine=duration=3", "-shortest", "-y", source], check=True)
+        cache_dir = os.path.join(temp_dir, "cache")
+
+        prober = MediaProbe(cache_dir=cache_dir)
+        info = prober.probe(source)
+        assert abs(info["duration"] - 3.0) < 0.2 and first_stream(info, "video")["width"] == 320
+        assert first_stream(info, "audio") is not None
+        prober.probe(source)
+        assert prober.probes == 1 and prober.cache.hits == 0
+
+        # Outro processo: lê do disco sem sondar de novo
+        other = MediaProbe(cache_dir=cache_dir)
+        assert other.probe(source) == info and other.probes == 0 and other.cache.hits == 1
+
+        # Arquivo regravado (mtime/tamanho diferentes): sonda de novo
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=2:size=180x320:rate=10",
+                        "-y", source], check=True)
+        changed = other.probe(source)
+        assert other.probes == 1 and first_stream(changed, "video")["height"] == 320
+        assert first_stream(changed, "audio") is None
+
+        # Linha de comando usada pelos scripts converter-*.sh
+        script = os.path.join(os.path.dirname(media_probe.__file__), "media_probe.py")
+        env = dict(os.environ, AUTOCUTTER_CACHE_DIR=os.path.join(temp_dir, "cli"))
+        output = subprocess.run([sys.executable, script, source, "width", "height"], capture_output=True,
+                                text=True, check=True, env=env).stdout
+        assert output.split() == ["180", "320"], output
+        print(f"✅ 1 sondagem por versão do arquivo; CLI: {output.strip()}")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando sondagem de mídia...")
+
+    tests = [
+        ("Leitura da Listagem", test_parse_listing),
+        ("Cache da Sondagem", test_probe_cache),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
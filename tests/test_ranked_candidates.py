@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Testes para os candidatos ranqueados (uma chamada ao LLM, vários recortes locais)
+"""
+import sys
+import os
+import time
+import tempfile
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import ranked_candidates
+from clip_selection import parse_time
+from json_stream import parse_clip_response
+from llm_client import LLMClient
+from llm_standin_server import start_server
+from prompt_corte_youtube import get_ranked_candidates_prompt
+from transcript_encoder import encode_transcript
+
+
+def make_segments(minutes=30):
+    return [{"start": i * 6.0, "end": i * 6.0 + 5.5, "text": f" Frase número {i} sobre o assunto {i % 7}."}
+            for i in range(minutes * 10)]
+
+
+def test_rank_and_slice():
+    """Testar a normalização das notas e os recortes por contagem e por duração"""
+    print("=== TESTANDO RANQUEAMENTO E RECORTE ===")
+
+    raw = [
+        {"start": "10:00", "end": "11:00", "caption": "c", "score": 70},
+        {"start": "01:00", "end": "02:00", "caption": "a", "score": 95},
+        {"start": "01:10", "end": "01:50", "caption": "a repetido", "score": 90},
+        {"start": "20:00", "end": "24:00", "caption": "d", "importance": "alta"},
+        {"start": "05:00", "end": "04:00", "caption": "inválido", "score": 99},
+        {"start": "30:00", "end": "30:30", "caption": "e", "score": "60"},
+    ]
+    candidates = ranked_candidates.rank_candidates(raw)
+    assert [c["caption"] for c in candidates] == ["a", "a repetido", "d", "c", "e"]
+    assert [c["rank"] for c in candidates] == [1, 2, 3, 4, 5]
+
+    # Sobrepostos ficam de fora; o resultado volta em ordem cronológica
+    top2 = ranked_candidates.slice_candidates(candidates, max_clips=2)
+    assert [c["caption"] for c in top2] == ["a", "d"], top2
+    top4 = ranked_candidates.slice_candidates(candidates, max_clips=4)
+    assert [c["caption"] for c in top4] == ["a", "c", "d", "e"], top4
+
+    summary = ranked_candidates.slice_candidates(candidates, mode="summary", target_duration=2)
+    assert sum(parse_time(c["end"]) - parse_time(c["start"]) for c in summary) <= 120
+    assert [c["caption"] for c in summary] == ["a", "c"], summary
+    print(f"✅ {len(candidates)} candidatos válidos; recortes de 2, 4 clipes e 2 min de resumo")
+    return True
+
+
+def test_one_llm_call_many_slices():
+    """Testar que a lista é pedida uma vez e as execuções seguintes não usam a rede"""
+    print("\n=== TESTANDO REAPROVEITAMENTO DA LISTA ===")
+
+    segments = make_segments()
+    fingerprint = ranked_candidates.transcript_fingerprint(segments)
+    server = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, ranked_candidates.CANDIDATES_FILE)
+            assert ranked_candidates.load_candidates(path, fingerprint) is None
+
+            transcript, _ = encode_transcript(segments)
+            text = LLMClient().complete("gemini", "bench", get_ranked_candidates_prompt(transcript, 12),
+                                        base_url=server.base_url)
+            candidates = ranked_candidates.rank_candidates(parse_clip_response(text)["clips"])
+            ranked_candidates.save_candidates(path, candidates, fingerprint, "bench")
+            assert len(candidates) > 3 and server.counters["requests"] == 1
+
+            started = time.perf_counter()
+            sizes = []
+            for max_clips in (1, 3, 5, 8):
+                loaded = ranked_candidates.load_candidates(path, fingerprint)
+                sizes.append(len(ranked_candidates.slice_candidates(loaded, max_clips=max_clips)))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            assert sizes == sorted(sizes) and sizes[0] == 1, sizes
+            assert server.counters["requests"] == 1 and elapsed_ms < 100, elapsed_ms
+
+            # Outra transcrição (outro vídeo ou modelo do Whisper) invalida a lista salva
+            other = ranked_candidates.transcript_fingerprint(segments[:-1])
+            assert ranked_candidates.load_candidates(path, other) is None
+    finally:
+        server.shutdown()
+
+    print(f"✅ 1 chamada ao LLM, 4 recortes ({sizes}) em {elapsed_ms:.1f} ms")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando candidatos ranqueados...")
+
+    tests = [
+        ("Ranqueamento e Recorte", test_rank_and_slice),
+        ("Reaproveitamento da Lista", test_one_llm_call_many_slices),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
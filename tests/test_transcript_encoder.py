@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Testes para a codificação compacta da transcrição nos prompts
+"""
+import sys
+import os
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from transcript_encoder import clean_text, encode_transcript, estimate_tokens
+from prompt_corte_youtube import get_clip_detection_prompt
+
+
+def make_segments():
+    """Segmentos curtos (1-3 palavras), como o Whisper costuma gerar em fala rápida"""
+    pieces = [" Ahn, bom dia", " pessoal, hoje", " eu eu vou", " explicar como", " funciona a inflação."]
+    pieces += [" Né,", " né."] * 15
+    pieces += [" Então é isso aí,", " tipo assim,", " é isso aí."]
+    pieces += [" A inflação", " corrói o poder", " de compra dos salários."]
+    pieces += [" Bom, então,", " assim, né,", " vamos lá."]
+    pieces += [" Juros altos", " encarecem o crédito", " e reduzem o consumo das famílias."]
+    return [{"start": i * 1.5, "end": i * 1.5 + 1.4, "text": text} for i, text in enumerate(pieces)]
+
+
+def test_compact_encoding_saves_tokens():
+    """Testar a junção em frases, tempos em segundos e remoção de vícios"""
+    print("=== TESTANDO TRANSCRIÇÃO COMPACTA ===")
+
+    assert clean_text(" Ahn, eu eu acho que, né, a gente a gente precisa") == "eu acho que, a gente precisa"
+
+    segments = make_segments()
+    text, stats = encode_transcript(segments)
+    lines = text.strip().splitlines()[1:]
+
+    assert lines[0] == "[0-7] bom dia pessoal, hoje eu vou explicar como funciona a inflação.", lines[0]
+    assert len(lines) == 5 and all(line.startswith("[") and ":" not in line.split("]")[0] for line in lines), lines
+    assert not any("né" in line.lower().split() for line in lines), lines
+    assert stats["tokens_after"] < stats["tokens_before"] / 2, stats
+
+    # O texto entra no prompt sem alterações
+    prompt = get_clip_detection_prompt(text, 1, 3)
+    assert text in prompt
+    print(f"✅ ~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens, {stats['units']} trechos")
+    return True
+
+
+def test_token_budget_drops_low_information():
+    """Testar que o orçamento corta primeiro os trechos menos informativos"""
+    print("\n=== TESTANDO ORÇAMENTO DE TOKENS ===")
+
+    segments = make_segments()
+    full, _ = encode_transcript(segments)
+    budget = estimate_tokens(full) - 15
+    text, stats = encode_transcript(segments, token_budget=budget)
+
+    assert stats["tokens_after"] <= budget + 2, stats
+    assert stats["dropped_units"] == 2, stats
+    assert "é isso aí" not in text and "vamos lá" not in text
+    assert "Juros altos encarecem o crédito" in text and "poder de compra" in text and "inflação." in text
+    print(f"✅ {stats['dropped_units']} trechos cortados para caber em ~{budget} tokens")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando codificação da transcrição...")
+
+    tests = [
+        ("Transcrição Compacta", test_compact_encoding_saves_tokens),
+        ("Orçamento de Tokens", test_token_budget_drops_low_information),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Testes para o cache em disco de transcrições
+"""
+import sys
+import os
+import time
+import tempfile
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from disk_cache import DiskCache
+from transcription_cache import TranscriptionCache
+
+WHISPER_RESULT = {
+    "text": " Olá mundo",
+    "language": "pt",
+    "segments": [
+        {"start": 0.0, "end": 1.5, "text": " Olá mundo", "tokens": [1, 2, 3],
+         "words": [{"word": " Olá", "start": 0.0, "end": 0.6, "probability": 0.9},
+                   {"word": " mundo", "start": 0.6, "end": 1.5, "probability": 0.8}]},
+    ],
+}
+
+
+def test_transcription_cache_roundtrip():
+    """Testar gravação e leitura de transcrições por vídeo, modelo e idioma"""
+    print("=== TESTANDO CACHE DE TRANSCRIÇÃO ===")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = os.path.join(temp_dir, "video.mp4")
+        with open(video_path, "wb") as f:
+            f.write(os.urandom(4 * 1024 * 1024))
+
+        cache = TranscriptionCache(cache_dir=os.path.join(temp_dir, "cache"))
+
+        assert cache.get(video_path, "base", language="pt") is None
+        stored = cache.put(video_path, "base", WHISPER_RESULT, language="pt")
+        assert "tokens" not in stored["segments"][0]
+
+        cached = cache.get(video_path, "base", language="pt")
+        assert cached == stored
+        print("✅ Transcrição recuperada do cache")
+
+        # Transcrição com timestamps por palavra atende pedido sem eles
+        assert cache.get(video_path, "base", language="pt", word_timestamps=False) == stored
+        # Outro modelo ou idioma não compartilha a entrada
+        assert cache.get(video_path, "small", language="pt") is None
+        assert cache.get(video_path, "base", language="en") is None
+        print("✅ Chave considera modelo, idioma e timestamps por palavra")
+
+        # Alterar o arquivo invalida a entrada
+        stat = os.stat(video_path)
+        os.utime(video_path, (stat.st_atime, stat.st_mtime + 10))
+        assert cache.get(video_path, "base", language="pt") is None
+        print("✅ Alteração do arquivo invalida o cache")
+
+    return True
+
+
+def test_disk_cache_eviction():
+    """Testar despejo por tamanho (LRU) e expiração por TTL"""
+    print("\n=== TESTANDO DESPEJO DO CACHE EM DISCO ===")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = DiskCache(temp_dir, max_size_mb=0.25)
+        payload = "x" * (100 * 1024)
+
+        cache.put("a", payload)
+        time.sleep(0.01)
+        cache.put("b", payload)
+        time.sleep(0.01)
+        assert cache.get("a") == payload  # "a" passa a ser o mais recente
+        time.sleep(0.01)
+        cache.put("c", payload)  # excede o limite: despeja "b"
+
+        assert cache.get("b") is None
+        assert cache.get("a") == payload and cache.get("c") == payload
+        assert cache.stats()["evictions"] == 1
+        print("✅ Entrada menos usada despejada")
+
+        ttl_cache = DiskCache(os.path.join(temp_dir, "ttl"), ttl_seconds=0.05)
+        ttl_cache.put("k", {"v": 1})
+        assert ttl_cache.get("k") == {"v": 1}
+        time.sleep(0.1)
+        assert ttl_cache.get("k") is None
+        print("✅ Entrada expirada por TTL")
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando cache de transcrições...")
+
+    tests = [
+        ("Cache de Transcrição", test_transcription_cache_roundtrip),
+        ("Despejo do Cache em Disco", test_disk_cache_eviction),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Testes de conformidade e desempenho dos motores de transcrição
+
+Cada motor instalado transcreve um clipe sintético e precisa devolver o
+formato comum; o fator de tempo real (RTF) de cada um é reportado. Os
+adaptadores também são verificados com modelos falsos, sem depender do
+whisper/faster-whisper instalados.
+"""
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+import whisper_models
+from transcription_engines import ENGINES, FasterWhisperEngine, WhisperEngine, get_engine
+
+SAMPLE_RATE = 16000
+
+
+def make_synthetic_clip(seconds=10):
+    """Sílabas sintéticas: tons harmônicos com envelope, separados por pausas curtas"""
+    t = np.arange(seconds * SAMPLE_RATE) / SAMPLE_RATE
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 280, 420, 700, 1100)))
+    envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0, None)
+    return (0.2 * voice * envelope).astype(np.float32)
+
+
+def check_schema(result, duration):
+    """Verifica o formato comum de saída dos motores"""
+    assert set(result) >= {"text", "language", "segments"}, result.keys()
+    assert isinstance(result["text"], str)
+    previous_start = 0.0
+    for segment in result["segments"]:
+        assert set(segment) >= {"start", "end", "text", "words"}, segment.keys()
+        assert isinstance(segment["start"], float) and isinstance(segment["end"], float)
+        assert 0.0 <= segment["start"] <= segment["end"] <= duration + 1.0, segment
+        assert segment["start"] >= previous_start - 1e-6
+        previous_start = segment["start"]
+        for word in segment["words"]:
+            assert set(word) == {"word", "start", "end", "probability"}, word.keys()
+            assert word["start"] <= word["end"]
+
+
+class FakeWhisperModel:
+    """Imita openai-whisper: transcribe() devolve um dicionário"""
+
+    def transcribe(self, audio, word_timestamps=True, **options):
+        words = [{"word": " olá", "start": 0.5, "end": 0.9, "probability": 0.9}] if word_timestamps else []
+        return {"text": " olá", "language": options.get("language", "pt"),
+                "segments": [{"id": 0, "start": 0.5, "end": 0.9, "text": " olá", "words": words, "tokens": [1]}]}
+
+
+class FakeFasterWhisperModel:
+    """Imita faster-whisper: transcribe() devolve (gerador de segmentos, info)"""
+
+    def transcribe(self, audio, language=None, word_timestamps=True, **options):
+        assert "verbose" not in options
+        words = [SimpleNamespace(word=" olá", start=0.5, end=0.9, probability=0.9)] if word_timestamps else None
+        segments = (SimpleNamespace(start=0.5, end=0.9, text=" olá", words=words) for _ in range(1))
+        return segments, SimpleNamespace(language=language or "pt")
+
+
+def test_adapters_share_schema():
+    """Testar que os adaptadores convertem para o mesmo formato"""
+    print("=== TESTANDO FORMATO COMUM DOS MOTORES ===")
+
+    registry = whisper_models.get_registry()
+    original = dict(registry.loaders)
+    registry.register_loader("whisper", lambda *args: FakeWhisperModel())
+    registry.register_loader("faster-whisper", lambda *args: FakeFasterWhisperModel())
+
+    try:
+        outputs = []
+        for engine in (WhisperEngine(), FasterWhisperEngine()):
+            result = engine.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), "fake-model",
+                                       language="pt", verbose=False)
+            check_schema(result, 1.0)
+            outputs.append(result)
+            print(f"✅ {engine.name}: {result['segments'][0]['words']}")
+
+        assert outputs[0] == outputs[1], outputs
+        assert ("fake-model", "cpu", "int8", "faster-whisper") in registry.loaded_models()
+    finally:
+        registry.loaders.clear()
+        registry.loaders.update(original)
+        registry.evict(model_size="fake-model")
+
+    return True
+
+
+def test_installed_engines_benchmark():
+    """Rodar cada motor instalado em um clipe sintético e reportar o RTF"""
+    print("\n=== TESTANDO MOTORES INSTALADOS ===")
+
+    audio = make_synthetic_clip()
+    duration = len(audio) / SAMPLE_RATE
+
+    for name in ENGINES:
+        try:
+            engine = get_engine(name)
+        except ImportError as e:
+            print(f"⚠️ {e}, pulando")
+            continue
+
+        engine.load("tiny")  # O carregamento não entra na medição
+        started = time.perf_counter()
+        result = engine.transcribe(audio, "tiny", language="pt", word_timestamps=True)
+        elapsed = time.perf_counter() - started
+
+        check_schema(result, duration)
+        print(f"✅ {name}: RTF {elapsed / duration:.3f} ({elapsed:.2f}s para {duration:.0f}s de áudio)")
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando motores de transcrição...")
+
+    tests = [
+        ("Formato Comum dos Motores", test_adapters_share_schema),
+        ("Benchmark dos Motores Instalados", test_installed_engines_benchmark),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
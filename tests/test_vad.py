@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Testes para o pré-filtro de atividade de voz (VAD)
+"""
+import sys
+import os
+
+import numpy as np
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from vad import SAMPLE_RATE, detect_speech_regions, transcribe_speech_only
+
+
+def make_audio(total_seconds, speech):
+    """Ruído de fundo fraco com trechos de "fala" (tom modulado) em `speech` (lista de (início, fim) em s)"""
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(total_seconds * SAMPLE_RATE) * 0.001).astype(np.float32)
+    for start, end in speech:
+        a, b = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        t = np.arange(b - a) / SAMPLE_RATE
+        audio[a:b] += (0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+    return audio
+
+
+def test_detect_speech_regions():
+    """Testar que só os trechos com fala viram regiões"""
+    print("=== TESTANDO DETECÇÃO DE REGIÕES DE FALA ===")
+
+    audio = make_audio(60, [(10.0, 20.0), (20.3, 25.0), (40.0, 45.0)])
+    regions = detect_speech_regions(audio, padding_ms=0)
+
+    # A pausa de 0,3 s é menor que o silêncio mínimo e não separa as regiões
+    assert len(regions) == 2, regions
+    assert abs(regions[0][0] - 10.0) < 0.1 and abs(regions[0][1] - 25.0) < 0.1, regions
+    assert abs(regions[1][0] - 40.0) < 0.1 and abs(regions[1][1] - 45.0) < 0.1, regions
+
+    assert detect_speech_regions(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)) == []
+    print(f"✅ Regiões: {[(round(a, 2), round(b, 2)) for a, b in regions]}")
+    return True
+
+
+def test_timestamps_remapped_to_source():
+    """Testar que os tempos do áudio compactado voltam para o tempo original"""
+    print("\n=== TESTANDO REMAPEAMENTO DE TEMPOS ===")
+
+    audio = make_audio(60, [(10.0, 20.0), (40.0, 45.0)])
+    seen = []
+
+    def fake_transcribe(speech):
+        seen.append(len(speech) / SAMPLE_RATE)
+        # Uma palavra no início de cada região do áudio compactado (a 2ª começa após 10,4 s + 0,3 s)
+        return {"text": " a b", "language": "pt", "segments": [
+            {"start": 0.5, "end": 1.0, "text": " a", "words": [{"word": " a", "start": 0.5, "end": 1.0}]},
+            {"start": 11.2, "end": 11.7, "text": " b", "words": [{"word": " b", "start": 11.2, "end": 11.7}]},
+        ]}
+
+    result, stats = transcribe_speech_only(audio, fake_transcribe, padding_ms=200)
+
+    assert len(seen) == 1 and seen[0] < 20, seen
+    first, second = result["segments"]
+    assert abs(first["start"] - 10.3) < 0.1, first
+    assert abs(second["start"] - 40.3) < 0.1, second
+    assert second["words"][0]["end"] == second["end"]
+    assert stats["regions"] == 2 and stats["skipped_seconds"] > 40, stats
+    print(f"✅ {stats['skipped_seconds']}s ignorados, segmentos em {first['start']:.2f}s e {second['start']:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando VAD...")
+
+    tests = [
+        ("Detecção de Regiões de Fala", test_detect_speech_regions),
+        ("Remapeamento de Tempos", test_timestamps_remapped_to_source),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")
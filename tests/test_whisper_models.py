@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Testes para o registro compartilhado de modelos Whisper
+"""
+import sys
+import os
+import threading
+import time
+
+# Adicionar src/utils ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+
+from whisper_models import WhisperModelRegistry
+
+
+class FakeModel:
+    """Modelo falso com tamanho fixo, sem depender do whisper/torch"""
+
+    def __init__(self, name, size_mb):
+        self.name = name
+        self.size_bytes = size_mb * 1024 * 1024
+
+    def parameters(self):
+        return [FakeParam(self.size_bytes)]
+
+
+class FakeParam:
+    def __init__(self, size):
+        self.size = size
+
+    def numel(self):
+        return self.size
+
+    def element_size(self):
+        return 1
+
+
+def make_loader(sizes_mb, calls, delay=0.0):
+    def loader(model_size, device, dtype):
+        calls.append((model_size, device, dtype))
+        time.sleep(delay)
+        return FakeModel(model_size, sizes_mb[model_size])
+    return loader
+
+
+def test_registry_reuses_models():
+    """Testar que o mesmo modelo é carregado apenas uma vez"""
+    print("=== TESTANDO REUSO DE MODELOS ===")
+
+    calls = []
+    registry = WhisperModelRegistry(max_memory_mb=0, loader=make_loader({"base": 10}, calls))
+
+    first = registry.get("base")
+    second = registry.get("base")
+
+    assert first is second
+    assert len(calls) == 1
+    stats = registry.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert "base/cpu/fp32" in stats["load_time_s"]
+    print(f"✅ {registry.format_stats()}")
+    return True
+
+
+def test_registry_lru_eviction():
+    """Testar despejo do modelo menos usado ao exceder o limite de memória"""
+    print("\n=== TESTANDO DESPEJO LRU ===")
+
+    calls = []
+    sizes = {"tiny": 40, "base": 40, "small": 40}
+    registry = WhisperModelRegistry(max_memory_mb=100, loader=make_loader(sizes, calls),
+                                    estimator=lambda size, dtype: sizes[size] * 1024 * 1024)
+
+    registry.get("tiny")
+    registry.get("base")
+    registry.get("tiny")  # tiny passa a ser o mais recente
+    registry.get("small")  # precisa despejar base
+
+    loaded = [key[0] for key in registry.loaded_models()]
+    assert loaded == ["tiny", "small"], loaded
+    assert registry.stats()["evictions"] == 1
+    print(f"✅ Modelos em memória após despejo: {loaded}")
+    return True
+
+
+def test_registry_concurrent_callers():
+    """Testar que chamadas concorrentes pela mesma chave carregam uma única vez"""
+    print("\n=== TESTANDO CHAMADAS CONCORRENTES ===")
+
+    calls = []
+    registry = WhisperModelRegistry(max_memory_mb=0, loader=make_loader({"medium": 10}, calls, delay=0.05))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("medium"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(model is results[0] for model in results)
+    assert registry.stats()["hits"] == 7
+    print("✅ 8 chamadas concorrentes, 1 carregamento")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testando registro de modelos Whisper...")
+
+    tests = [
+        ("Reuso de Modelos", test_registry_reuses_models),
+        ("Despejo LRU", test_registry_lru_eviction),
+        ("Chamadas Concorrentes", test_registry_concurrent_callers),
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n{'='*50}")
+        print(f"EXECUTANDO: {test_name}")
+        print('='*50)
+
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ ERRO FATAL em {test_name}: {e}")
+            results.append((test_name, False))
+
+    passed = sum(1 for _, result in results if result)
+    print(f"\nResultado Final: {passed}/{len(results)} testes passaram")